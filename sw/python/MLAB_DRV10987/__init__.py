@@ -1,5 +1,18 @@
 # __init__.py
 from .driver import MLAB_DRV10987
 from .driver import print_status_registers
+from .driver import print_write
+from .fleet import DriverFleet
+from .aio import AsyncDRV10987
+from .telemetry import TelemetryRecorder
+from .simulator import SimulatedSMBus
+from .eeprom import EepromProgrammer
+from .regulator import SpeedRegulator
+from .scheduler import Scheduler
+from .faults import FaultMonitor
+from .transport import ResilientBus
+from .profiles import MotorProfile
+from .mux import TCA9548A
+from .mux import MuxScheduler
 
-__all__ = ['MLAB_DRV10987', 'print_status_registers']
\ No newline at end of file
+__all__ = ['MLAB_DRV10987', 'print_status_registers', 'print_write', 'DriverFleet', 'AsyncDRV10987', 'TelemetryRecorder', 'SimulatedSMBus', 'EepromProgrammer', 'SpeedRegulator', 'Scheduler', 'FaultMonitor', 'ResilientBus', 'MotorProfile', 'TCA9548A', 'MuxScheduler']
\ No newline at end of file
@@ -0,0 +1,223 @@
+#! /usr/bin/python3
+
+import asyncio
+import functools
+import weakref
+
+from .driver import MLAB_DRV10987
+
+class AsyncDRV10987():
+    """
+    asyncio interface for the DRV10987V01 module.
+
+    All bus I/O of the wrapped MLAB_DRV10987 instance runs in an executor, so the event loop is
+    never blocked. Transactions are serialized with one asyncio lock per bus object and event
+    loop, which keeps several drivers sharing one bus from interleaving their transfers.
+
+    Example usage:
+    drv = await AsyncDRV10987.create(smbus.SMBus(1))
+    await drv.set_SpeedCtrl(50)
+    async for status in drv.stream_status(rate=20, fields=["MotorSpeed"]):
+        print(status["MotorSpeed"])
+    """
+
+    # Event loop -> {bus object -> asyncio.Lock}, an asyncio.Lock is bound to one loop
+    _bus_locks = weakref.WeakKeyDictionary()
+
+    def __init__(self, driver: MLAB_DRV10987, executor=None) -> None:
+        """
+        Wrap an already created driver.
+
+        Args:
+            driver (MLAB_DRV10987): The blocking driver instance.
+            executor (concurrent.futures.Executor, optional): Executor running the bus I/O. Default is the loop's default executor.
+        """
+        self.driver = driver
+        self.executor = executor
+
+    @classmethod
+    def _bus_lock(cls, bus) -> asyncio.Lock:
+        """
+        Return the lock shared by all drivers using the given bus object in the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        locks = cls._bus_locks.get(loop)
+        if locks is None:
+            locks = cls._bus_locks[loop] = weakref.WeakKeyDictionary()
+        lock = locks.get(bus)
+        if lock is None:
+            lock = locks[bus] = asyncio.Lock()
+        return lock
+
+    @classmethod
+    async def create(cls, bus, addr: int = 0b1010010, initialize: bool = True, enable_motor: bool = True, shadow: bool = True, executor=None) -> "AsyncDRV10987":
+        """
+        Create the driver without blocking the event loop.
+
+        Args:
+            bus (smbus.SMBus or int): The I2C bus object for communication, or the number of the bus to open.
+            addr (int, optional): The address of the device. Default is 0b1010010.
+            initialize (bool, optional): Run the `initialize` sequence. Default is True.
+            enable_motor (bool, optional): Enable the motor output after initialization. Default is True.
+            shadow (bool, optional): Use the shadow register mode. Default is True.
+            executor (concurrent.futures.Executor, optional): Executor running the bus I/O.
+
+        Returns:
+            AsyncDRV10987: The initialized driver.
+        """
+        loop = asyncio.get_running_loop()
+        factory = functools.partial(MLAB_DRV10987, bus, addr, initialize=False, enable_motor=False, shadow=shadow)
+        if isinstance(bus, int):
+            # The driver opens a bus object of its own, no other driver can use it yet
+            driver = await loop.run_in_executor(executor, factory)
+        else:
+            async with cls._bus_lock(bus):
+                driver = await loop.run_in_executor(executor, factory)
+        self = cls(driver, executor)
+        if initialize:
+            await self.initialize(enable_motor=enable_motor)
+        elif enable_motor:
+            await self.enable_motor()
+        return self
+
+    async def call(self, func, *args, **kwargs):
+        """
+        Run a blocking driver method in the executor while holding the bus lock.
+
+        Args:
+            func (callable): The function to run, typically a bound method of `driver`.
+
+        Returns:
+            The return value of `func`.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._bus_lock(self.driver.bus):
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def initialize(self, enable_motor: bool = True) -> None:
+        """
+        Awaitable version of the MLAB_DRV10987 initialization sequence.
+
+        When the cached CONFIG registers already hold the default configuration, nothing is
+        written. Otherwise the motor is disabled, the device is polled until it responds without
+        holding the bus between polls, and finally the CONFIG registers that differ are written.
+
+        Raises:
+            TimeoutError: The device did not respond within the `wait_ready` timeout.
+        """
+        if self.driver.needs_configuration():
+            await self.disable_motor()
+            if not await self.wait_ready():
+                raise TimeoutError(f"DRV10987 at address 0x{self.driver.addr:02x} is not ready")
+            await self.call(self._configure_all)
+        if enable_motor:
+            await self.enable_motor()
+
+    async def wait_ready(self, timeout: float = 1.0, interval: float = 0.005) -> bool:
+        """
+        Poll the device until it answers with a valid register read, see MLAB_DRV10987.wait_ready.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                if await self.read(MLAB_DRV10987.DeviceId) != 0xffff:
+                    return True
+            except OSError:
+                pass
+            if loop.time() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+
+    def _configure_all(self) -> None:
+        """
+        Write the default values of all CONFIG registers.
+        """
+        self.driver.configure_CONFIG1()
+        self.driver.configure_CONFIG2()
+        self.driver.configure_CONFIG3()
+        self.driver.configure_CONFIG4()
+        self.driver.configure_CONFIG5()
+        self.driver.configure_CONFIG6()
+        self.driver.configure_CONFIG7()
+
+    async def read(self, reg: int) -> int:
+        """
+        Read a 16-bit value from the specified register address.
+        """
+        return await self.call(self.driver.read, reg)
+
+    async def write(self, reg: int, value: int) -> None:
+        """
+        Write a 16-bit value to the specified register address.
+        """
+        await self.call(self.driver.write, reg, value)
+
+    async def read_registers(self, regs) -> list:
+        """
+        Read several 16-bit registers in as few bus transactions as possible.
+        """
+        return await self.call(self.driver.read_registers, list(regs))
+
+    async def read_status_registers(self, fields=None) -> dict:
+        """
+        Read status registers and return them as a dictionary, see MLAB_DRV10987.read_status_registers.
+        """
+        return await self.call(self.driver.read_status_registers, fields)
+
+    async def set_SpeedCtrl(self, speed: float, override: bool = True) -> bool:
+        """
+        Set the speed of the motor (0-100%).
+        """
+        return await self.call(self.driver.set_SpeedCtrl, speed, override)
+
+    async def set_SpeedCtrl_raw(self, counts: int, override: bool = True) -> None:
+        """
+        Set the speed of the motor as a raw 9-bit duty command (0-511).
+        """
+        await self.call(self.driver.set_SpeedCtrl_raw, counts, override)
+
+    async def enable_motor(self) -> None:
+        """
+        Enable the motor output.
+        """
+        await self.call(self.driver.enable_motor)
+
+    async def disable_motor(self) -> None:
+        """
+        Disable the motor output.
+        """
+        await self.call(self.driver.disable_motor)
+
+    async def clear_faults(self) -> None:
+        """
+        Clear faults by writing 0xFF to the Fault Register.
+        """
+        await self.call(self.driver.clear_faults)
+
+    async def stream_status(self, rate: float, fields=None):
+        """
+        Asynchronously iterate over status snapshots read at a fixed rate.
+
+        The period is kept on absolute deadlines of the event loop clock, so bus latency does
+        not accumulate. When a read takes longer than one period, the stream continues
+        immediately without trying to catch up.
+
+        Args:
+            rate (float): Requested rate in Hz.
+            fields (iterable, optional): Status fields to read, see MLAB_DRV10987.read_status_registers.
+
+        Yields:
+            dict: Status dictionary of every read.
+        """
+        loop = asyncio.get_running_loop()
+        period = 1.0 / rate
+        deadline = loop.time()
+        while True:
+            yield await self.read_status_registers(fields)
+            deadline += period
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                deadline = loop.time()
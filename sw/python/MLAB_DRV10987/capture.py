@@ -0,0 +1,230 @@
+#! /usr/bin/python3
+
+"""
+Compact binary storage of oscilloscope captures.
+
+A scope CSV is converted once, in chunks, into a file holding the header metadata followed by
+the samples as row-major float32 (one row per sample, one column per channel). The file is
+opened with numpy.memmap, so nothing is parsed or copied on open, and the analysis iterates
+over chunks so captures larger than RAM are processed in constant memory.
+
+Example usage:
+capture = convert_csv("tools/measurements/df45m024053-a2_fast.csv", "fast.drvcap")
+print(len(capture), capture.increment, analyze_capture(capture)["kt"])
+
+python -m MLAB_DRV10987.capture tools/measurements/*.csv -o captures/
+python -m MLAB_DRV10987.kt captures/*.drvcap
+"""
+
+import argparse
+import itertools
+import os
+import struct
+import sys
+
+import numpy as np
+
+from . import kt as kt_analysis
+
+FILE_MAGIC = b"DRVCAP01"
+# magic, header size, number of channels, number of samples, start time, sample interval
+_FILE_HEADER = struct.Struct("<8sHHQdd")
+_CHANNEL = struct.Struct("<16s16s")  # channel name, unit
+_ALIGN = 64
+
+
+def _header_bytes(names, units, samples: int, start: float, increment: float) -> bytes:
+    for text in itertools.chain(names, units):
+        if len(text.encode("ascii")) > 16:
+            raise ValueError(f"Channel name or unit {text!r} is longer than 16 bytes")
+    size = _FILE_HEADER.size + _CHANNEL.size * len(names)
+    size += -size % _ALIGN
+    header = _FILE_HEADER.pack(FILE_MAGIC, size, len(names), samples, start, increment)
+    header += b"".join(_CHANNEL.pack(name.encode("ascii"), unit.encode("ascii")) for name, unit in zip(names, units))
+    return header.ljust(size, b"\0")
+
+
+def is_capture(path: str) -> bool:
+    """
+    Return True if the file starts with the magic of a binary capture.
+    """
+    with open(path, "rb") as f:
+        return f.read(len(FILE_MAGIC)) == FILE_MAGIC
+
+
+class Capture():
+    """
+    Read-only view of a binary capture file.
+
+    Attributes:
+        data (numpy.memmap): float32 samples, shape (samples, channels).
+        names (tuple): Channel names, e.g. ("CH1", "CH2").
+        units (tuple): Units of the channels.
+        start (float): Time of the first sample in s.
+        increment (float): Sampling interval in s.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Path of a file written by `convert_csv`.
+        """
+        with open(path, "rb") as f:
+            magic, header_size, channels, samples, self.start, self.increment = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+            if magic != FILE_MAGIC:
+                raise ValueError(f"{path} is not a DRV10987 capture")
+            fields = [_CHANNEL.unpack(f.read(_CHANNEL.size)) for _ in range(channels)]
+        self.path = path
+        self.names = tuple(name.rstrip(b"\0").decode("ascii") for name, _ in fields)
+        self.units = tuple(unit.rstrip(b"\0").decode("ascii") for _, unit in fields)
+        if samples:
+            self.data = np.memmap(path, dtype="<f4", mode="r", offset=header_size, shape=(samples, channels))
+        else:
+            self.data = np.empty((0, channels), dtype="<f4")
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def channel(self, name: str):
+        """
+        Return the samples of one channel as a strided view of the memory map.
+        """
+        return self.data[:, self.names.index(name)]
+
+    def chunks(self, size: int = 1 << 20, before: int = 0, after: int = 0):
+        """
+        Iterate over the capture in chunks of rows.
+
+        Args:
+            size (int, optional): Number of rows per chunk. Default is 1M rows.
+            before (int, optional): Extra rows preceding every chunk, e.g. for filter history.
+            after (int, optional): Extra rows following every chunk.
+
+        Yields:
+            tuple: (start, stop, rows), where rows are the samples [start - before, stop + after)
+                clipped to the capture, as a view of the memory map.
+        """
+        for start in range(0, len(self.data), size):
+            stop = min(start + size, len(self.data))
+            yield start, stop, self.data[max(start - before, 0):stop + after]
+
+
+def convert_csv(csv_path: str, path: str, chunk_size: int = 1 << 18) -> Capture:
+    """
+    Convert a Rigol CSV capture to the binary format.
+
+    The CSV is parsed in chunks of lines, so the memory use does not depend on its length.
+
+    Args:
+        csv_path (str): Path of the CSV file.
+        path (str): Path of the binary file to write.
+        chunk_size (int, optional): Number of lines parsed at once. Default is 256k lines.
+
+    Returns:
+        Capture: The converted capture.
+
+    Raises:
+        ValueError: If a channel name or unit does not fit in 16 ASCII characters.
+    """
+    with open(csv_path) as f, open(path, "wb") as out:
+        header = kt_analysis.read_scope_header(f)
+        columns = header["columns"]
+        names = list(columns)
+        units = [header["units"][name] for name in names]
+        out.write(_header_bytes(names, units, 0, header["start"], header["increment"]))
+        samples = 0
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                break
+            rows = np.loadtxt(lines, delimiter=",", usecols=list(columns.values()), dtype="<f4", ndmin=2)
+            out.write(rows.tobytes())
+            samples += len(rows)
+        out.seek(0)
+        out.write(_header_bytes(names, units, samples, header["start"], header["increment"]))
+    return Capture(path)
+
+
+def analyze_capture(capture, window: int = 10, chunk_size: int = 1 << 20) -> dict:
+    """
+    Compute Kt of all channels of a binary capture in constant memory.
+
+    The result equals `kt.analyze_channel` on the whole signal: the moving average is continued
+    across chunk borders with `window` rows of overlap, and only the running minimum and
+    maximum and the first, last and number of zero crossings are kept.
+
+    Args:
+        capture (Capture or str): The capture or the path of a binary capture file.
+        window (int, optional): Length of the smoothing window in samples. Default is 10.
+        chunk_size (int, optional): Number of rows processed at once. Default is 1M rows.
+
+    Returns:
+        dict: The same structure as `kt.analyze_file`.
+    """
+    if isinstance(capture, str):
+        capture = Capture(capture)
+    length = len(capture)
+    left, right = window // 2, window - 1 - window // 2
+    channels = len(capture.names)
+    minimum = np.full(channels, np.inf)
+    maximum = np.full(channels, -np.inf)
+    first = np.full(channels, -1)
+    last = np.full(channels, -1)
+    count = np.zeros(channels, dtype=np.int64)
+
+    # The smoothed value at index i + 1 is needed to detect a crossing after index i
+    for start, stop, rows in capture.chunks(chunk_size, before=left, after=right + 1):
+        lo = start - left
+        end = min(stop + 1, length)
+        padding = ((max(-lo, 0), max(end + right - length, 0)), (0, 0))
+        positive = kt_analysis.moving_average(np.pad(rows, padding, mode="symmetric"), window) >= 0
+        own = rows[start - max(lo, 0):][:stop - start]
+        minimum = np.minimum(minimum, own.min(axis=0))
+        maximum = np.maximum(maximum, own.max(axis=0))
+        for n in range(channels):
+            crossings = np.flatnonzero(np.diff(positive[:, n])) + start
+            if len(crossings):
+                if first[n] < 0:
+                    first[n] = crossings[0]
+                last[n] = crossings[-1]
+                count[n] += len(crossings)
+
+    results = {}
+    for n, name in enumerate(capture.names):
+        if count[n] < 2:
+            frequency = float("nan")
+        else:
+            frequency = 1 / ((last[n] - first[n]) / (count[n] - 1) * capture.increment) / 2
+        amplitude = float(maximum[n] - minimum[n]) / 2
+        kt = amplitude / float(frequency)
+        results[name] = {
+            "amplitude": amplitude,
+            "frequency": float(frequency),
+            "kt": kt,
+            "kt_mV_Hz": kt * 1000,
+        }
+    kt = float(np.mean([result["kt"] for result in results.values()]))
+    return {
+        "file": capture.path,
+        "channels": results,
+        "kt": kt,
+        "KtValue": kt_analysis.kt_value(kt),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert oscilloscope CSV captures to the binary capture format.")
+    parser.add_argument("files", nargs="+", help="CSV captures")
+    parser.add_argument("-o", "--output", default=None, help="output directory (default: next to the CSV)")
+    args = parser.parse_args(argv)
+
+    for csv_path in args.files:
+        name = os.path.splitext(os.path.basename(csv_path))[0] + ".drvcap"
+        path = os.path.join(args.output or os.path.dirname(csv_path), name)
+        capture = convert_csv(csv_path, path)
+        print(f"{csv_path} -> {path}: {len(capture)} samples, {', '.join(capture.names)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#! /usr/bin/python3
+
+"""
+Conversion of raw DRV10987 status register words to physical values.
+
+The functions are independent of the bus I/O and use only arithmetic and bitwise operators,
+so they accept both plain integers and NumPy integer arrays. The scalar path of
+MLAB_DRV10987.read_status_registers and the vectorized decoding of recorded telemetry share
+this code.
+"""
+
+# Status register addresses, see MLAB_DRV10987 for the complete register map
+FaultReg = 0x00
+MotorSpeed = 0x01
+MotorPeriod = 0x02
+MotorXt = 0x03
+MotorCurrent = 0x04
+SupplyVoltage = 0x05
+IPDPosition = 0x05
+SpeedCmd = 0x06
+SpdCmdBuffer = 0x06
+
+# Bit positions of the flags in the FaultReg register
+FAULT_BITS = {
+    "Lock0": 0,
+    "Lock1": 1,
+    "Lock2": 2,
+    "Lock3": 3,
+    "Lock4": 4,
+    "Lock5": 5,
+    "V3P3_UVLO": 7,
+    "VCC_UVLO": 8,
+    "VREG_UVLO": 9,
+    "CP_UVLO": 10,
+    "OverCurr": 11,
+    "VREG_OC": 12,
+    "VCC_OC": 13,
+    "TempWarning": 14,
+    "OverTemp": 15,
+}
+
+
+def _signed(raw):
+    """
+    Widen unsigned NumPy arrays so that arithmetic cannot wrap around. Integers are returned unchanged.
+    """
+    if hasattr(raw, "astype"):
+        return raw.astype("i8")
+    return raw
+
+
+def fault_flags(raw) -> dict:
+    """
+    Decode the FaultReg register.
+
+    Args:
+        raw (int or numpy.ndarray): Value(s) of the FaultReg register.
+
+    Returns:
+        dict: Flag name -> bool, or boolean array when `raw` is an array.
+    """
+    return {name: ((raw >> bit) & 1) != 0 for name, bit in FAULT_BITS.items()}
+
+
+def fault_mask(names) -> int:
+    """
+    Return the FaultReg bitmask of the given flags, e.g. for testing `raw & mask` on whole arrays.
+
+    Args:
+        names (iterable): Flag names, keys of FAULT_BITS.
+    """
+    mask = 0
+    for name in names:
+        mask |= 1 << FAULT_BITS[name]
+    return mask
+
+
+def motor_speed(raw):
+    """
+    MotorSpeed register -> speed of the motor in Hz.
+    """
+    return raw / 10 * (1 / (16 / 2))
+
+
+def motor_period(raw):
+    """
+    MotorPeriod register -> electrical period of the motor in microseconds.
+    """
+    return _signed(raw) * 10
+
+
+def bemf_kt(raw):
+    """
+    MotorXt register -> BEMF constant in V/Hz.
+    """
+    return raw / 2 / 1090
+
+
+def motor_current(raw):
+    """
+    MotorCurrent register -> current of the motor in amperes.
+    """
+    raw = _signed(raw)
+    return (raw - 1023 * (raw >= 1023)) / 512.0
+
+
+def supply_voltage(raw):
+    """
+    SupplyVoltage register -> supply voltage in volts.
+    """
+    return (raw & 0b11111111) * 30 / 255
+
+
+def power(current_raw, supply_raw):
+    """
+    MotorCurrent and SupplyVoltage registers -> power consumption in watts.
+    """
+    return motor_current(current_raw) * supply_voltage(supply_raw)
+
+
+def speed_cmd(raw):
+    """
+    SpeedCmd register -> speed command in percent (duty cycle).
+    """
+    return (raw >> 8) * 100.0 / 255
+
+
+def speed_buffer(raw):
+    """
+    SpdCmdBuffer register -> speed buffer in percent (duty cycle).
+    """
+    return (raw & 0xff) * 100.0 / 255
+
+
+def ipd_position(raw):
+    """
+    IPDPosition register -> inductive position detect value.
+    """
+    return (_signed(raw) >> 8) - 1
+
+
+# Status fields of MLAB_DRV10987.read_status_registers: decoder and the registers passed to it
+STATUS_FIELDS = {
+    "FaultFlags": (fault_flags, (FaultReg,)),
+    "MotorSpeed": (motor_speed, (MotorSpeed,)),
+    "MotorPeriod": (motor_period, (MotorPeriod,)),
+    "BEMF_KT": (bemf_kt, (MotorXt,)),
+    "MotorCurrent": (motor_current, (MotorCurrent,)),
+    "SupplyVoltage": (supply_voltage, (SupplyVoltage,)),
+    "Power": (power, (MotorCurrent, SupplyVoltage)),
+    "SpeedCmd": (speed_cmd, (SpeedCmd,)),
+    "SpeedBuff": (speed_buffer, (SpdCmdBuffer,)),
+    "IPD": (ipd_position, (IPDPosition,)),
+}
+
+
+def decode_status(words: dict, fields=None) -> dict:
+    """
+    Decode raw status register words into the status dictionary.
+
+    Args:
+        words (dict): Register address -> raw value (int or NumPy array).
+        fields (iterable, optional): Fields to decode. Default is all fields.
+
+    Returns:
+        dict: Dictionary with the structure of MLAB_DRV10987.read_status_registers. With array
+            inputs every value is an array (FaultFlags is a dictionary of boolean arrays).
+    """
+    if fields is None:
+        fields = STATUS_FIELDS
+    status = {}
+    for field in fields:
+        decoder, regs = STATUS_FIELDS[field]
+        status[field] = decoder(*[words[reg] for reg in regs])
+    return status
+
+
+def decode_status_array(words: dict, fields=None):
+    """
+    Decode arrays of raw status register words into a NumPy structured array.
+
+    The fault flags are stored as a single "FaultReg" uint16 bitmask column, use `fault_mask`
+    or `fault_flags` to test individual flags.
+
+    Args:
+        words (dict): Register address -> NumPy array of raw values. All arrays have the same length.
+        fields (iterable, optional): Fields to decode. Default is all fields the given registers allow.
+
+    Returns:
+        numpy.ndarray: Structured array with one row per sample.
+    """
+    import numpy as np
+    if fields is None:
+        fields = [field for field, (_, regs) in STATUS_FIELDS.items() if all(reg in words for reg in regs)]
+    columns = {}
+    for field in fields:
+        if field == "FaultFlags":
+            columns["FaultReg"] = np.asarray(words[FaultReg], dtype=np.uint16)
+        else:
+            decoder, regs = STATUS_FIELDS[field]
+            columns[field] = np.asarray(decoder(*[np.asarray(words[reg]) for reg in regs]))
+    length = len(next(iter(columns.values()))) if columns else 0
+    out = np.empty(length, dtype=[(name, column.dtype) for name, column in columns.items()])
+    for name, column in columns.items():
+        out[name] = column
+    return out
@@ -1,8 +1,17 @@
 #! /usr/bin/python3
 
+import errno
+import inspect
 import smbus2 as smbus
+from smbus2 import i2c_msg
 import time
 
+from . import decode
+from . import registers
+
+# errno values reported by adapters that cannot do a requested transfer type
+_UNSUPPORTED_ERRNOS = (errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOSYS, errno.EINVAL)
+
 class MLAB_DRV10987():
     """
     Class for controlling BLDC motor using the DRV10987V01 MLAB module.
@@ -54,25 +63,72 @@ class MLAB_DRV10987():
 
     EepromProgramming5_ShadowMode = 1 << 12  # Bit 12 for enabling shadow mode in EepromProgramming5
 
-    def __init__(self, bus: smbus.SMBus = smbus.SMBus(1), addr: int = 0b1010010, initialize: bool = True, enable_motor: bool = True, shadow: bool = True) -> None:
+    # Contiguous block of status registers read by read_status_registers()
+    STATUS_REGISTERS = (FaultReg, MotorSpeed, MotorPeriod, MotorXt, MotorCurrent, SupplyVoltage, SpeedCmd)
+
+    # Status fields returned by read_status_registers() and the registers each of them needs
+    STATUS_FIELDS = {field: regs for field, (_, regs) in decode.STATUS_FIELDS.items()}
+
+    # How read_registers() fetches several registers:
+    #   "combined" - one I2C_RDWR ioctl with a write/read message pair per register,
+    #   "block"    - one block read per contiguous run, relying on register auto-increment,
+    #   "single"   - one SMBus transaction per register.
+    read_mode = "combined"
+
+    # Transfer strategy of write_registers: "combined" sends one I2C_RDWR ioctl with a write
+    # message per register, "single" one SMBus transaction per register.
+    write_mode = "combined"
+
+    # Writable configuration registers mirrored in the in-memory shadow cache. Command and
+    # data registers of the EEPROM interface are not cached, writes to them always go to the bus.
+    SHADOWED_REGISTERS = frozenset((SpeedCtrl, EepromProgramming5, EECTRL, CONFIG1, CONFIG2, CONFIG3, CONFIG4, CONFIG5, CONFIG6, CONFIG7))
+
+    RDWR_MAX_REGISTERS = 21  # Linux limits one I2C_RDWR ioctl to 42 messages
+    RDWR_MAX_WRITES = 42
+    BLOCK_MAX_REGISTERS = 16  # SMBus block transfers are limited to 32 bytes
+
+    def __init__(self, bus=1, addr: int = 0b1010010, initialize: bool = True, enable_motor: bool = True, shadow: bool = True) -> None:
         """
         Initialize the DRV10xx motor driver class.
 
+        The current register values are read in one bulk read first. When the CONFIG registers
+        already hold the default configuration, a running motor is left running and nothing is
+        written. Otherwise the motor is disabled, the device is polled until it responds and
+        only the CONFIG registers that differ are written.
+
         Args:
-            bus (smbus.SMBus, optional): The I2C bus object for communication. Default is /dev/i2c-1.
+            bus (smbus.SMBus or int, optional): The I2C bus object for communication, or the number of
+                the bus (N in /dev/i2c-N) to open on first use. Default is /dev/i2c-1.
             addr (int, optional): The address of the device. Default is 0b1010010.
-        """
-        self.bus = bus
+            initialize (bool, optional): Write the default configuration to the CONFIG registers. Default is True.
+            enable_motor (bool, optional): Enable the motor output. Default is True.
+            shadow (bool, optional): Run the device from the CONFIG registers (shadow mode). When False,
+                the device keeps running from the configuration stored in its EEPROM, see EepromProgrammer.
+                Default is True.
+
+        Raises:
+            TimeoutError: The device did not respond within the `wait_ready` timeout.
+        """
+        if isinstance(bus, int):
+            self.bus_number = bus
+            self._bus = None
+        else:
+            self.bus_number = None
+            self._bus = bus
         self.addr = addr
+        self._shadow = {}
+        # Optional callable trace(reg, value) invoked after every register write on the bus
+        self.trace = None
 
-        if not shadow:
-            raise "Non shadow mode is not supported yet" # type: ignore
-        else:
+        self.resync_shadow()
+
+        if shadow:
             self.set_shadow_mode()
         
-        if initialize:
+        if initialize and self.needs_configuration():
             self.disable_motor()
-            time.sleep(1)
+            if not self.wait_ready():
+                raise TimeoutError(f"DRV10987 at address 0x{self.addr:02x} is not ready")
             self.configure_CONFIG1()
             self.configure_CONFIG2()
             self.configure_CONFIG3()
@@ -84,41 +140,51 @@ class MLAB_DRV10987():
         if enable_motor:
             self.enable_motor()
 
-    def _crop(self, val, min, max):
+    @property
+    def bus(self):
         """
-        Crop the value to be within the given range.
+        The I2C bus object. A bus given by its number is opened on first access.
+        """
+        if self._bus is None:
+            self._bus = smbus.SMBus(self.bus_number)
+        return self._bus
 
-        Args:
-            val (float): The value to be cropped.
-            min (float): The minimum value of the range.
-            max (float): The maximum value of the range.
+    @bus.setter
+    def bus(self, bus) -> None:
+        self._bus = bus
+
+    def needs_configuration(self) -> bool:
+        """
+        Check the shadow cache against the default configuration written at initialization.
 
         Returns:
-            float: The cropped value within the range.
+            bool: True if a CONFIG register differs from its default or is not cached.
         """
-        if val < min:
-            return min
-        elif val > max:
-            return max
-        else:
-            return val
+        return any(self._shadow.get(reg) != value for reg, value in DEFAULT_CONFIG.items())
 
-    def _write_config_register(self, reg: int, bit_values: dict) -> None:
+    def wait_ready(self, timeout: float = 1.0, interval: float = 0.005) -> bool:
         """
-        Write the configuration register with the specified bit values.
+        Poll the device until it answers with a valid register read.
+
+        A floating bus reads as 0xFFFF, so a DeviceId of 0xFFFF does not count as an answer.
 
         Args:
-            reg (int): The address of the configuration register.
-            bit_values (dict): A dictionary with bit positions as keys and their values.
+            timeout (float, optional): Maximum time to wait in seconds. Default is 1 s.
+            interval (float, optional): Delay between polls in seconds. Default is 5 ms.
 
-        Note:
-            The `bit_values` dictionary should contain the bit positions as keys (0 to 15) and
-            the corresponding bit values (0 or 1) to be written to the register.
-        """
-        value = 0
-        for bit_pos, bit_value in bit_values.items():
-            value |= bit_value << bit_pos
-        self.write(reg, value)
+        Returns:
+            bool: True if the device is ready, False if the timeout expired.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self.read(self.DeviceId) != 0xffff:
+                    return True
+            except OSError:
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
 
     def read(self, reg: int) -> int:
         """
@@ -132,21 +198,203 @@ class MLAB_DRV10987():
         """
         # Implement the logic to read from the I2C bus
         a = self.bus.read_i2c_block_data(self.addr, reg, 2)
-        return (a[1]) | (a[0]) << 8
+        value = (a[1]) | (a[0]) << 8
+        if reg in self.SHADOWED_REGISTERS:
+            self._shadow[reg] = value
+        return value
     
-    def write(self, reg: int, value: int) -> None:
+    def write(self, reg: int, value: int, force: bool = False) -> None:
         """
         Write a 16-bit value to the specified register address.
 
+        Writes to registers in `SHADOWED_REGISTERS` are skipped when the shadow cache
+        already holds the same value. Every write done on the bus is reported to the
+        `trace` callable if one is set, e.g. `drv.trace = print_write`.
+
         Args:
             reg (int): The address of the register to write to.
             value (int): The 16-bit value to be written to the register.
+            force (bool, optional): Write to the bus even if the cached value is the same. Default is False.
         """
+        shadowed = reg in self.SHADOWED_REGISTERS
+        if shadowed and not force and self._shadow.get(reg) == value:
+            return
+
         # Implement the logic to write to the I2C bus
-        self.bus.write_i2c_block_data(self.DRVADDR, reg, [value>>8, value&0xff])
+        try:
+            self.bus.write_i2c_block_data(self.addr, reg, [value>>8, value&0xff])
+        except Exception:
+            # The register content is unknown after a failed write
+            self._shadow.pop(reg, None)
+            raise
+        if shadowed:
+            self._shadow[reg] = value
+
+        if self.trace is not None:
+            self.trace(reg, value)
+
+    def write_registers(self, values: dict, force: bool = False) -> list:
+        """
+        Write several 16-bit registers in as few bus transactions as possible.
+
+        Shadowed registers that already hold the value are skipped like in `write`. The remaining
+        writes are sent as combined I2C_RDWR transfers, see `write_mode`; when the adapter does
+        not support them, the driver permanently falls back to "single" mode.
+
+        Args:
+            values (dict): Register address -> 16-bit value, written in this order.
+            force (bool, optional): Write all registers even if the cached values are the same. Default is False.
+
+        Returns:
+            list: The addresses of the registers written to the bus.
+        """
+        regs = [reg for reg, value in values.items()
+                if force or reg not in self.SHADOWED_REGISTERS or self._shadow.get(reg) != value]
+        if len(regs) > 1 and self.write_mode == "combined":
+            try:
+                self._write_combined([(reg, values[reg]) for reg in regs])
+                return regs
+            except (AttributeError, NotImplementedError):
+                self.write_mode = "single"
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                self.write_mode = "single"
+        for reg in regs:
+            self.write(reg, values[reg], force=True)
+        return regs
+
+    def _write_combined(self, items: list) -> None:
+        """
+        Write registers using combined I2C_RDWR transfers with one write message per register.
+        """
+        for i in range(0, len(items), self.RDWR_MAX_WRITES):
+            chunk = items[i:i + self.RDWR_MAX_WRITES]
+            msgs = [i2c_msg.write(self.addr, [reg, value >> 8, value & 0xff]) for reg, value in chunk]
+            try:
+                self.bus.i2c_rdwr(*msgs)
+            except Exception:
+                # The register content is unknown after a failed write
+                for reg, _ in chunk:
+                    self._shadow.pop(reg, None)
+                raise
+            for reg, value in chunk:
+                if reg in self.SHADOWED_REGISTERS:
+                    self._shadow[reg] = value
+                if self.trace is not None:
+                    self.trace(reg, value)
+
+    def read_cached(self, reg: int) -> int:
+        """
+        Return the value of a register from the shadow cache, reading it from the device on a cache miss.
+
+        Args:
+            reg (int): The address of the register.
+
+        Returns:
+            int: The 16-bit value of the register.
+        """
+        value = self._shadow.get(reg)
+        if value is None:
+            value = self.read(reg)
+        return value
+
+    def invalidate_shadow(self, reg: int = None) -> None:
+        """
+        Drop cached register values, e.g. after the device has been reset or power cycled.
+
+        Args:
+            reg (int, optional): The register to invalidate. Default is all registers.
+        """
+        if reg is None:
+            self._shadow.clear()
+        else:
+            self._shadow.pop(reg, None)
+
+    def resync_shadow(self) -> dict:
+        """
+        Refill the shadow cache by reading all shadowed registers from the device in one bulk read.
+
+        Returns:
+            dict: The cached register values with register addresses as keys.
+        """
+        self._shadow.clear()
+        regs = sorted(self.SHADOWED_REGISTERS)
+        self._shadow.update(zip(regs, self.read_registers(regs)))
+        return dict(self._shadow)
+
+    def read_registers(self, regs) -> list:
+        """
+        Read several 16-bit registers in as few bus transactions as possible.
 
-        print(f"WRITE: reg 0x{reg:0x} -> 0b{value:016b}")
+        The transfer strategy is selected by the `read_mode` attribute. When the adapter
+        does not support the selected strategy, the driver permanently falls back to
+        "single" mode and reads one register per transaction.
 
+        Args:
+            regs (iterable): Addresses of the registers to read.
+
+        Returns:
+            list: The 16-bit values read, in the same order as `regs`.
+        """
+        regs = list(regs)
+        if len(regs) > 1 and self.read_mode != "single":
+            try:
+                if self.read_mode == "block":
+                    return self._read_block(regs)
+                return self._read_combined(regs)
+            except (AttributeError, NotImplementedError):
+                self.read_mode = "single"
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                self.read_mode = "single"
+        return [self.read(reg) for reg in regs]
+
+    def _read_combined(self, regs: list) -> list:
+        """
+        Read registers using combined I2C_RDWR transfers (register write + repeated start read).
+        """
+        values = []
+        for i in range(0, len(regs), self.RDWR_MAX_REGISTERS):
+            msgs = []
+            for reg in regs[i:i + self.RDWR_MAX_REGISTERS]:
+                msgs.append(i2c_msg.write(self.addr, [reg]))
+                msgs.append(i2c_msg.read(self.addr, 2))
+            self.bus.i2c_rdwr(*msgs)
+            for msg in msgs[1::2]:
+                data = bytes(msg)
+                values.append(data[1] | data[0] << 8)
+        self._update_shadow(regs, values)
+        return values
+
+    def _read_block(self, regs: list) -> list:
+        """
+        Read registers with one block read per contiguous run of register addresses.
+        """
+        words = {}
+        ordered = sorted(set(regs))
+        start = 0
+        while start < len(ordered):
+            end = start + 1
+            while (end < len(ordered) and end - start < self.BLOCK_MAX_REGISTERS
+                   and ordered[end] == ordered[end - 1] + 1):
+                end += 1
+            data = self.bus.read_i2c_block_data(self.addr, ordered[start], 2 * (end - start))
+            for n, reg in enumerate(ordered[start:end]):
+                words[reg] = data[2 * n + 1] | data[2 * n] << 8
+            start = end
+        values = [words[reg] for reg in regs]
+        self._update_shadow(regs, values)
+        return values
+
+    def _update_shadow(self, regs: list, values: list) -> None:
+        """
+        Store freshly read values of shadowed registers in the shadow cache.
+        """
+        for reg, value in zip(regs, values):
+            if reg in self.SHADOWED_REGISTERS:
+                self._shadow[reg] = value
 
 
     def clear_faults(self) -> None:
@@ -166,16 +414,34 @@ class MLAB_DRV10987():
         Returns:
             bool: True if successful.
         """
-        val = (0b1 << 15) if override else 0b0
-        val |= int(511.0 * self._crop(speed, 0.0, 100.0)/100.0)
-        self.write(self.SpeedCtrl, val)
+        if speed < 0.0:
+            speed = 0.0
+        elif speed > 100.0:
+            speed = 100.0
+        self.set_SpeedCtrl_raw(int(511.0 * speed/100.0), override)
         return True
 
+    def set_SpeedCtrl_raw(self, counts: int, override: bool = True) -> None:
+        """
+        Set the speed of the motor as a raw 9-bit duty command, for fast control loops.
+
+        The write is skipped when the command did not change since the last write.
+
+        Args:
+            counts (int): Duty command 0-511 (511 is 100%).
+            override (bool): Override (Binary) - True by default. Override analogue/PWM input.
+        """
+        if not 0 <= counts <= 511:
+            raise ValueError(f"Speed command {counts} is out of range 0-511")
+        value = (counts | 0x8000) if override else counts
+        if self._shadow.get(self.SpeedCtrl) != value:
+            self.write(self.SpeedCtrl, value, force=True)
+
     def enable_motor(self):
         """
         Enable the motor by writing 1 to the motor enable bit (15th bit) in the control register (0x60).
         """
-        control_reg = self.read(self.EECTRL)
+        control_reg = self.read_cached(self.EECTRL)
         control_reg &= ~(1 << 15)
         self.write(self.EECTRL, control_reg)
 
@@ -183,7 +449,7 @@ class MLAB_DRV10987():
         """
         Disable the motor by writing 0 to the motor enable bit (15th bit) in the control register (0x60).
         """
-        control_reg = self.read(self.EECTRL)
+        control_reg = self.read_cached(self.EECTRL)
         control_reg |= 1 << 15
         self.write(self.EECTRL, control_reg)
 
@@ -194,8 +460,8 @@ class MLAB_DRV10987():
         This sets the EEPROM into the shadow mode.
         """
 
-        # Read the current value of the EepromProgramming5 register
-        eeprom_reg5 = self.read(self.EepromProgramming5)
+        # Get the current value of the EepromProgramming5 register
+        eeprom_reg5 = self.read_cached(self.EepromProgramming5)
         # Set the 12th bit to 1 to enable shadow mode
         eeprom_reg5 |= self.EepromProgramming5_ShadowMode
         # Write the modified value back to the EepromProgramming5 register
@@ -213,30 +479,18 @@ class MLAB_DRV10987():
             FGOLSel (int): FG Open-loop output select (2-bit value).
             SSMConfig (int): Spread spectrum modulation control (2-bit value).
         """
-        bit_values = {
-            0: RMValue,           # RMValue + RMShift
-            7: ClkCycleAdjust,    # 0: Full-cycle adjust, 1: Half-cycle
-            8: FGCycle,           # FG motor pole count
-            12: FGOLSel,          # FG Open-loop output select
-            14: SSMConfig,        # Spread spectrum modulation control
-        }
-        self._write_config_register(self.CONFIG1, bit_values)
+        self.write(self.CONFIG1, registers.CONFIG1.pack(RMValue=RMValue, ClkCycleAdjust=ClkCycleAdjust, FGCycle=FGCycle, FGOLSel=FGOLSel, SSMConfig=SSMConfig))
 
     def configure_CONFIG2(self, KtValue: int = 0x28, CommAdvMode: int = 0, TCtrlAdvValue: int = 0b0111011):
         """
         Configure the CONFIG2 register.
 
         Args:
-            KtValue (int): BEMF Kt value (8-bit value).
-            CommAdvMode (int): Commutation advanced value (1-bit value).
-            TCtrlAdvValue (int): Commutation advanced mode (1-bit value).
+            KtValue (int): BEMF Kt value, KtShift + KtValue (7-bit value).
+            CommAdvMode (int): Commutation advanced mode (1-bit value).
+            TCtrlAdvValue (int): Commutation advanced value (7-bit value).
         """
-        bit_values = {
-            0: TCtrlAdvValue,    # Commutation advanced value
-            7: CommAdvMode,      # Commutation advanced mode
-            8: KtValue,          # BEMF Kt value
-        }
-        self._write_config_register(self.CONFIG2, bit_values)
+        self.write(self.CONFIG2, registers.CONFIG2.pack(TCtrlAdvValue=TCtrlAdvValue, CommAdvMode=CommAdvMode, KtValue=KtValue))
 
     def configure_CONFIG3(self, BrkDoneThr: int = 0b111, OpLCurrRt: int = 0b11, OpLCurr: int = 0b11, RvsDrThr: int = 0, RvsDrEn: int = 0, ISDEn: int = 1, BEMF_HYS: int = 0, BrkCurThrSel: int = 0, ISDThr: int = 0):
         """
@@ -244,27 +498,16 @@ class MLAB_DRV10987():
 
         Args:
             BrkDoneThr (int): Braking mode setting (3-bit value).
-            OpLCurrRt (int): Open-loop current ramp-up setting (2-bit value).
-            OpLCurr (int): Open-loop current setting (3-bit value).
+            OpLCurrRt (int): Open-loop current ramp-up setting (3-bit value).
+            OpLCurr (int): Open-loop current setting (2-bit value).
             RvsDrThr (int): The threshold where the device starts to process reverse drive or brake (2-bit value).
             RvsDrEn (int): Reverse drive (1-bit value).
             ISDEn (int): Initial speed detect (1-bit value).
             BEMF_HYS (int): 0: low hysteresis 20mV for BEMF comparator, 1: high 40mV (1-bit value).
             BrkCurThrSel (int): Brake current-level-threshold selection (1-bit value).
-            ISDThr (int): ISD stationary judgment threshold (1-bit value).
-        """
-        bit_values = {
-            0: BrkDoneThr,       # Braking mode setting
-            3: OpLCurrRt,        # Open-loop current ramp-up setting
-            6: OpLCurr,          # Open-loop current setting
-            8: RvsDrThr,         # The threshold where the device starts to process reverse drive or brake
-            10: RvsDrEn,         # Reverse drive
-            11: ISDEn,           # Initial speed detect
-            12: BEMF_HYS,        # 0: low hysteresis 20mV for BEMF comparator, 1: high 40 mV
-            13: BrkCurThrSel,    # Brake current-level-threshold selection
-            14: ISDThr,          # ISD stationary judgment threshold
-        }
-        self._write_config_register(self.CONFIG3, bit_values)
+            ISDThr (int): ISD stationary judgment threshold (2-bit value).
+        """
+        self.write(self.CONFIG3, registers.CONFIG3.pack(BrkDoneThr=BrkDoneThr, OpLCurrRt=OpLCurrRt, OpLCurr=OpLCurr, RvsDrThr=RvsDrThr, RvsDrEn=RvsDrEn, ISDEn=ISDEn, BEMF_HYS=BEMF_HYS, BrkCurThrSel=BrkCurThrSel, ISDThr=ISDThr))
 
     def configure_CONFIG4(self, AlginTime: int = 0b011, Op2ClsThr: int = 0b1111, StAccel: int = 0b0101000, AccelRangeSel: int = 0):
         """
@@ -272,17 +515,11 @@ class MLAB_DRV10987():
 
         Args:
             AlginTime (int): Align time (3-bit value).
-            Op2ClsThr (int): Typical open-to-closed loop threshold (frequency) (5-bit value).
+            Op2ClsThr (int): Typical open-to-closed loop threshold (frequency), range bit + 4-bit value (5-bit value).
             StAccel (int): Open-loop start-up acceleration (6-bit value).
             AccelRangeSel (int): Accel range selection (1-bit value).
         """
-        bit_values = {
-            0: AlginTime,        # Align time
-            3: Op2ClsThr,        # Typical open-to-closed loop threshold (frequency)
-            8: StAccel,          # Open-loop start-up acceleration
-            14: AccelRangeSel,   # Accel range selection
-        }
-        self._write_config_register(self.CONFIG4, bit_values)
+        self.write(self.CONFIG4, registers.CONFIG4.pack(AlginTime=AlginTime, Op2ClsThr=Op2ClsThr, StAccel=StAccel, AccelRangeSel=AccelRangeSel))
 
     def configure_CONFIG5(self, IPDasHwILimit: int = 0b1, HWiLimitThr: int = 0b111, SWiLimitThr: int = 0b111, LockEn0: int = 0, LockEn1: int = 0, LockEn2: int = 0, LockEn3: int = 0, LockEn4: int = 0, LockEn5: int = 0, OTWarningLimit: int = 0b1):
         """
@@ -300,19 +537,7 @@ class MLAB_DRV10987():
             LockEn5 (int): Closed-loop stuck lock detect (1-bit value).
             OTWarningLimit (int): Over-temperature warning current limit (1-bit value).
         """
-        bit_values = {
-            0: IPDasHwILimit,       # Range of current limit for lock detection
-            1: HWiLimitThr,         # Current limit for lock detection
-            4: SWiLimitThr,         # Software current limit threshold
-            8: LockEn0,             # Lock-detection current limit: 1=En
-            9: LockEn1,             # Abnormal speed, 1=en
-            10: LockEn2,            # Abnormal Kt, 1=en
-            11: LockEn3,            # No motor fault, 1=En
-            12: LockEn4,            # Open-loop stuck, 1=en
-            13: LockEn5,            # Closed-loop stuck, 1=En
-            14: OTWarningLimit,     # Over-temperature warning current limit
-        }
-        self._write_config_register(self.CONFIG5, bit_values)
+        self.write(self.CONFIG5, registers.CONFIG5.pack(IPDasHwILimit=IPDasHwILimit, HWiLimitThr=HWiLimitThr, SWiLimitThr=SWiLimitThr, LockEn0=LockEn0, LockEn1=LockEn1, LockEn2=LockEn2, LockEn3=LockEn3, LockEn4=LockEn4, LockEn5=LockEn5, OTWarningLimit=OTWarningLimit))
 
     def configure_CONFIG6(self, SlewRate: int = 0b11, DutyCycleLimit: int = 0b00, ClsLpAccel: int = 0b11, CLoopDis: int = 0, IPDRIsMd: int = 0b1, AVSMMd: int = 0b1, AVSMEn: int = 0b1, AVSIndEn: int = 0b1, KtLckThr: int = 0, PWMfreq: int = 0, SpedCtrlMd: int = 0):
         """
@@ -321,30 +546,17 @@ class MLAB_DRV10987():
         Args:
             SlewRate (int): Slew-rate control for phase node (2-bit value).
             DutyCycleLimit (int): Minimum duty-cycle limit (2-bit value).
-            ClsLpAccel (int): Closed-loop accelerate (1-bit value).
+            ClsLpAccel (int): Closed-loop accelerate (3-bit value).
             CLoopDis (int): 0: transfer to closed-loop enabled, 1: transfer to closed-loop disabled (1-bit value).
             IPDRIsMd (int): IPD release mode; 0=break when inductive release, 1=Hi-z when inductive release (1-bit value).
             AVSMMd (int): Mechanical AVS mode, 0: to Vcc, 1: to 24V (1-bit value).
             AVSMEn (int): Enable mechanical AVS, 1: enable (1-bit value).
             AVSIndEn (int): Enable inductive AVS, 1: enable (1-bit value).
-            KtLckThr (int): Abnormal Kt lock detect threshold (1-bit value).
+            KtLckThr (int): Abnormal Kt lock detect threshold (2-bit value).
             PWMfreq (int): PWM frequency control, 0: 25kHz, 1: 50kHz (1-bit value).
             SpedCtrlMd (int): 0: Analogue input at SPEED pin, 1: PWM input at SPED pin (1-bit value).
         """
-        bit_values = {
-            0: SlewRate,                # Slew-rate control for phase node
-            2: DutyCycleLimit,          # Minimum duty-cycle limit
-            4: ClsLpAccel,              # Closed-loop accelerate
-            7: CLoopDis,                # 0: transfer to closed-loop enabled, 1: transfer to closed-loop disabled
-            8: IPDRIsMd,                # IPD release mode; 0=break when inductive release, 1=Hi-z when inductive release
-            9: AVSMMd,                  # Mechanical AVS mode, 0: to Vcc, 1: to 24V
-            10: AVSMEn,                  # Enable mechanical AVS, 1: enable
-            11: AVSIndEn,                # Enable inductive AVS, 1: enable
-            12: KtLckThr,                # Abnormal Kt lock detect threshold
-            14: PWMfreq,                 # PWM frequency control, 0: 25kHz, 1: 50kHz
-            15: SpedCtrlMd,              # 0: Analogue input at SPEED pin, 1: PWM input at SPED pin
-        }
-        self._write_config_register(self.CONFIG6, bit_values)
+        self.write(self.CONFIG6, registers.CONFIG6.pack(SlewRate=SlewRate, DutyCycleLimit=DutyCycleLimit, ClsLpAccel=ClsLpAccel, CLoopDis=CLoopDis, IPDRIsMd=IPDRIsMd, AVSMMd=AVSMMd, AVSMEn=AVSMEn, AVSIndEn=AVSIndEn, KtLckThr=KtLckThr, PWMfreq=PWMfreq, SpedCtrlMd=SpedCtrlMd))
 
     def configure_CONFIG7(self, DeadTime: int = 0b1010, CtrlCoef: int = 0b01, IPDClk: int = 0b10, IPDCurrThr: int = 0b1111, IPDAdvcAg: int = 0b01):
         """
@@ -357,14 +569,17 @@ class MLAB_DRV10987():
             IPDCurrThr (int): IPD (inductive sense) current threshold (4-bit value).
             IPDAdvcAg (int): Advance angle after inductive sense, 0: 30 deg, 1: 60deg, 2: 90deg, 3: 120 deg (2-bit value).
         """
-        bit_values = {
-            0: DeadTime,            # Driver dead time
-            5: CtrlCoef,            # SCORE control constant
-            8: IPDClk,              # Inductive sense clock
-            10: IPDCurrThr,         # IPD (inductive sense) current threshold
-            14: IPDAdvcAg,          # Advance angle after inductive sense, 0: 30 deg, 1: 60deg, 2: 90deg, 3: 120 deg
-        }
-        self._write_config_register(self.CONFIG7, bit_values)
+        self.write(self.CONFIG7, registers.CONFIG7.pack(DeadTime=DeadTime, CtrlCoef=CtrlCoef, IPDClk=IPDClk, IPDCurrThr=IPDCurrThr, IPDAdvcAg=IPDAdvcAg))
+
+    def dump_registers(self) -> dict:
+        """
+        Read all readable registers of the register map and decode them into their bit fields.
+
+        Returns:
+            dict: Register name -> dictionary of raw field values.
+        """
+        regs = [register.address for register in registers.REGISTERS if "r" in register.access]
+        return registers.decode_registers(dict(zip(regs, self.read_registers(regs))))
 
     def decode_FaultReg(self, fault_register: int) -> dict:
         """
@@ -376,30 +591,20 @@ class MLAB_DRV10987():
         Returns:
             dict: Dictionary containing the decoded status flags from the fault register.
         """
-        fault_flags = {
-            "Lock0": bool(fault_register & 0b1),
-            "Lock1": bool(fault_register & 0b10),
-            "Lock2": bool(fault_register & 0b100),
-            "Lock3": bool(fault_register & 0b1000),
-            "Lock4": bool(fault_register & 0b10000),
-            "Lock5": bool(fault_register & 0b100000),
-            "V3P3_UVLO": bool(fault_register & 0b10000000),
-            "VCC_UVLO": bool(fault_register & 0b100000000),
-            "VREG_UVLO": bool(fault_register & 0b1000000000),
-            "CP_UVLO": bool(fault_register & 0b10000000000),
-            "OverCurr": bool(fault_register & 0b100000000000),
-            "VREG_OC": bool(fault_register & 0b1000000000000),
-            "VCC_OC": bool(fault_register & 0b10000000000000),
-            "TempWarning": bool(fault_register & 0b100000000000000),
-            "OverTemp": bool(fault_register & 0b1000000000000000),
-        }
-
-        return fault_flags
-
-    def read_status_registers(self) -> dict:
+        return decode.fault_flags(fault_register)
+
+    def read_status_registers(self, fields=None) -> dict:
         """
         Read status registers and return them as a dictionary.
 
+        All needed registers are fetched at once with `read_registers`, so a full status
+        snapshot costs a single combined bus transaction on adapters that support it.
+
+        Args:
+            fields (iterable, optional): Names of the status fields to read (keys of
+                `STATUS_FIELDS`). Only the registers these fields need are read from
+                the device. Default is all fields.
+
         Returns:
             dict: Dictionary containing the status registers with their names as keys.
 
@@ -425,6 +630,7 @@ class MLAB_DRV10987():
                     "OverTemp": bool       # True if OverTemp flag is set, False otherwise
                 },
                 "MotorSpeed": float,      # Speed of the motor in Hz
+                "MotorPeriod": float,     # Motor electrical period in microseconds
                 "BEMF_KT": float,         # BEMF value in volts per Hz
                 "MotorCurrent": float,    # Current of the motor in amperes
                 "SupplyVoltage": float,   # Supply voltage in volts
@@ -433,35 +639,43 @@ class MLAB_DRV10987():
                 "SpeedBuff": float,       # Speed buffer in percentage (duty cycle)
                 "IPD": int                # Inductive Position Detect value
             }
+
+            When `fields` is given, only the requested keys are present.
         """
-        FaultReg = self.read(self.FaultReg)
-        MotorSpeed = self.read(self.MotorSpeed) / 10
-        MotorPeriod = self.read(self.MotorPeriod) * 10
-        MotorXt = self.read(self.MotorXt)/2/1090
-        MotorCurrent = self.read(self.MotorCurrent)
-        if MotorCurrent>=1023:
-            MotorCurrent -= 1023
-        MotorCurrent /= 512.0
-        SupplyVoltageReg = self.read(self.SupplyVoltage)
-        SupplyVoltage = (SupplyVoltageReg & 0b11111111) * 30 / 255
-        SpeedCmd = self.read(self.SpeedCmd)
-
-        fault_flags = self.decode_FaultReg(FaultReg)
-
-        status_registers = {
-            "FaultFlags": fault_flags,
-            "MotorSpeed": MotorSpeed * (1 / (16 / 2)),
-            "MotorPeriod": MotorPeriod,
-            "BEMF_KT": MotorXt,
-            "MotorCurrent": MotorCurrent,
-            "SupplyVoltage": SupplyVoltage,
-            "Power": MotorCurrent * SupplyVoltage,
-            "SpeedCmd": (SpeedCmd >> 8) * 100.0 / 255,
-            "SpeedBuff": (SpeedCmd & 0xff) * 100.0 / 255,
-            "IPD": ((SupplyVoltageReg >> 8) - 1),
-        }
-
-        return status_registers
+        if fields is None:
+            fields = self.STATUS_FIELDS
+        regs = []
+        for field in fields:
+            if field not in self.STATUS_FIELDS:
+                raise ValueError(f"Unknown status field: {field}")
+            for reg in self.STATUS_FIELDS[field]:
+                if reg not in regs:
+                    regs.append(reg)
+        return decode.decode_status(dict(zip(regs, self.read_registers(regs))), fields)
+
+def _default_config() -> dict:
+    """
+    Pack the default arguments of the configure_CONFIGn methods, so the defaults are kept in one place.
+    """
+    config = {}
+    for register in registers.CONFIG_REGISTERS:
+        parameters = inspect.signature(getattr(MLAB_DRV10987, "configure_" + register.name)).parameters
+        config[register.address] = register.pack(**{name: parameter.default for name, parameter in parameters.items()
+                                                    if name != "self"})
+    return config
+
+# CONFIG register address -> value written by the configure_CONFIGn defaults at initialization
+DEFAULT_CONFIG = _default_config()
+
+def print_write(reg: int, value: int) -> None:
+    """
+    Print a register write, usable as the `trace` hook of MLAB_DRV10987.
+
+    Args:
+        reg (int): The address of the written register.
+        value (int): The 16-bit value written.
+    """
+    print(f"WRITE: reg 0x{reg:0x} -> 0b{value:016b}")
 
 def print_status_registers(status_registers: dict):
     """
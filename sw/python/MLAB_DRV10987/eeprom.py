@@ -0,0 +1,192 @@
+#! /usr/bin/python3
+
+import time
+
+from .driver import MLAB_DRV10987
+from . import registers
+
+EEPROM_ACCESS_CODE = 0xC0DE
+
+_eeWrite = 1 << 0
+_eeMassAccess = 1 << 1
+_eeMassWrite = 1 << 2
+_eeRefresh = 1 << 3
+
+CONFIG_ADDRESSES = tuple(register.address for register in registers.CONFIG_REGISTERS)
+
+
+class EepromError(RuntimeError):
+    """
+    Raised when the EEPROM does not become ready or the verification readback differs.
+    """
+
+
+class EepromProgrammer():
+    """
+    EEPROM programming of the DRV10987 configuration (CONFIG1-CONFIG7).
+
+    The programmer unlocks the EEPROM with the access code, reads the stored configuration with
+    individual access, and burns only the words that differ from the target. A few changed words
+    are written one by one, many are written with a single mass write. The mass write goes
+    through the CONFIG registers, so `burn` restores their live content afterwards. Completion
+    of every operation is detected by polling eeReady instead of fixed delays, and the written
+    words are verified by reading them back.
+
+    Example usage:
+    drv = MLAB_DRV10987(bus)
+    drv.configure_CONFIG2(KtValue=0x30)
+    changed = EepromProgrammer(drv).burn()  # store the current CONFIG registers
+    """
+
+    def __init__(self, driver: MLAB_DRV10987, timeout: float = 0.5, interval: float = 0.001, mass_threshold: int = 3) -> None:
+        """
+        Args:
+            driver (MLAB_DRV10987): The driver of the device to program.
+            timeout (float, optional): Maximum time to wait for eeReady in seconds. Default is 0.5 s.
+            interval (float, optional): Delay between eeReady polls in seconds. Default is 1 ms.
+            mass_threshold (int, optional): Number of changed words from which a mass write is used. Default is 3.
+        """
+        self.driver = driver
+        self.timeout = timeout
+        self.interval = interval
+        self.mass_threshold = mass_threshold
+        self.unlocked = False
+
+    def wait_ready(self) -> None:
+        """
+        Poll eeReady until the EEPROM is ready for the next access.
+        """
+        deadline = time.monotonic() + self.timeout
+        while not self.driver.read(MLAB_DRV10987.EepromProgramming2) & 1:
+            if time.monotonic() >= deadline:
+                raise EepromError("EEPROM is not ready")
+            time.sleep(self.interval)
+
+    def unlock(self) -> None:
+        """
+        Enable EEPROM access by writing the access code.
+        """
+        self.driver.write(MLAB_DRV10987.EepromProgramming1, 0x0000)
+        self.driver.write(MLAB_DRV10987.EepromProgramming1, EEPROM_ACCESS_CODE)
+        self.wait_ready()
+        self.unlocked = True
+
+    def _trigger(self, bits: int) -> None:
+        """
+        Start an EEPROM operation while keeping the shadow mode setting.
+        """
+        control = self.driver.read_cached(MLAB_DRV10987.EepromProgramming5) & MLAB_DRV10987.EepromProgramming5_ShadowMode
+        self.driver.write(MLAB_DRV10987.EepromProgramming5, control | bits, force=True)
+        # The device clears the trigger bits when the operation completes
+        self.driver.invalidate_shadow(MLAB_DRV10987.EepromProgramming5)
+        self.wait_ready()
+
+    def read_word(self, address: int) -> int:
+        """
+        Read one EEPROM word with individual access.
+
+        Args:
+            address (int): Address of the word, the address of the corresponding CONFIG register.
+        """
+        if not self.unlocked:
+            self.unlock()
+        self.driver.write(MLAB_DRV10987.EepromProgramming3, address)
+        self.wait_ready()
+        return self.driver.read(MLAB_DRV10987.EepromProgramming4)
+
+    def write_word(self, address: int, value: int) -> None:
+        """
+        Write one EEPROM word with individual access.
+
+        Args:
+            address (int): Address of the word, the address of the corresponding CONFIG register.
+            value (int): The 16-bit value.
+        """
+        if not self.unlocked:
+            self.unlock()
+        self.driver.write(MLAB_DRV10987.EepromProgramming3, address)
+        self.driver.write(MLAB_DRV10987.EepromProgramming4, value)
+        self._trigger(_eeWrite)
+
+    def mass_write(self, words: dict) -> None:
+        """
+        Load all CONFIG registers and write them to the EEPROM in one operation.
+
+        The CONFIG registers keep the written words, which changes the live configuration of
+        the device, see `burn`.
+
+        Args:
+            words (dict): CONFIG register address -> value, for all seven registers.
+        """
+        if not self.unlocked:
+            self.unlock()
+        for address in CONFIG_ADDRESSES:
+            self.driver.write(address, words[address])
+        self._trigger(_eeMassAccess | _eeMassWrite)
+
+    def refresh(self) -> None:
+        """
+        Reload the CONFIG registers from the EEPROM.
+        """
+        if not self.unlocked:
+            self.unlock()
+        self._trigger(_eeRefresh)
+        for address in CONFIG_ADDRESSES:
+            self.driver.invalidate_shadow(address)
+
+    def read_config(self) -> dict:
+        """
+        Read the configuration stored in the EEPROM.
+
+        Returns:
+            dict: CONFIG register address -> stored value.
+        """
+        return {address: self.read_word(address) for address in CONFIG_ADDRESSES}
+
+    def burn(self, target: dict = None, verify: bool = True) -> dict:
+        """
+        Store a configuration in the EEPROM, writing only the words that differ.
+
+        The live configuration in the CONFIG registers is not changed. A mass write, which loads
+        the words through the CONFIG registers, is followed by writing the previous live words
+        back, also when the verification fails.
+
+        Args:
+            target (dict, optional): CONFIG register address -> value. Missing registers keep
+                their stored value. Default is the current content of the CONFIG registers.
+            verify (bool, optional): Read the written words back and compare. Default is True.
+
+        Returns:
+            dict: The words that were written, CONFIG register address -> value.
+        """
+        if target is None:
+            target = dict(zip(CONFIG_ADDRESSES, self.driver.read_registers(CONFIG_ADDRESSES)))
+        for address in target:
+            if address not in CONFIG_ADDRESSES:
+                raise ValueError(f"Register 0x{address:02x} is not stored in the EEPROM")
+
+        stored = self.read_config()
+        changed = {address: value for address, value in target.items() if stored[address] != value}
+        if not changed:
+            return changed
+
+        live = None
+        try:
+            if len(changed) >= self.mass_threshold:
+                live = dict(zip(CONFIG_ADDRESSES, self.driver.read_registers(CONFIG_ADDRESSES)))
+                words = dict(stored)
+                words.update(changed)
+                self.mass_write(words)
+            else:
+                for address, value in changed.items():
+                    self.write_word(address, value)
+
+            if verify:
+                for address, value in changed.items():
+                    readback = self.read_word(address)
+                    if readback != value:
+                        raise EepromError(f"EEPROM word 0x{address:02x} reads 0x{readback:04x}, expected 0x{value:04x}")
+        finally:
+            if live is not None:
+                self.driver.write_registers(live)
+        return changed
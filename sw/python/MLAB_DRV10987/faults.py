@@ -0,0 +1,173 @@
+#! /usr/bin/python3
+
+import collections
+import time
+
+from . import decode
+from .driver import MLAB_DRV10987
+
+# Flag name of every FaultReg bit, unused bits get a generic name
+_BIT_NAMES = tuple(next((name for name, bit in decode.FAULT_BITS.items() if bit == n), f"bit{n}") for n in range(16))
+
+FaultEvent = collections.namedtuple("FaultEvent", ["name", "raised", "raw", "timestamp"])
+FaultEvent.__doc__ = """
+A change of one fault flag.
+
+Attributes:
+    name (str): Flag name, see decode.FAULT_BITS.
+    raised (bool): True when the flag was raised, False when it was cleared.
+    raw (int): The FaultReg word that caused the event.
+    timestamp (float): Time of the poll on the monitor's clock.
+"""
+
+
+class FaultMonitor():
+    """
+    Change-driven watcher of the DRV10987 fault flags.
+
+    Every poll reads only the FaultReg register (one 2-byte read) and compares the word with the
+    previous one. Only the bits that changed are decoded, and for each of them a FaultEvent is
+    dispatched to the subscribed callbacks. A steady fault state therefore costs no decoding.
+
+    Policies per flag:
+    - auto_clear: a set flag is cleared in the device by writing its bit to FaultReg on every
+      poll that reads it, at most once per `clear_interval` (e.g. to restart after a lock
+      detection). The cleared event follows with the next poll that reads the bit as 0. A flag
+      that is set again on the poll after its clear was raised anew and gets another raised event.
+    - latch: a raised flag stays active until `acknowledge` is called, even when the device
+      clears it in the meantime. The cleared event is dispatched on acknowledge.
+
+    Example usage:
+    monitor = FaultMonitor(drv, auto_clear=["Lock0", "Lock1"], latch=["OverCurr", "OverTemp"])
+    monitor.subscribe(lambda event: print(event.name, "raised" if event.raised else "cleared"))
+    scheduler.add(monitor.poll, rate=50)
+    """
+
+    def __init__(self, driver: MLAB_DRV10987, auto_clear=(), latch=(), clear_interval: float = 0.0,
+                 clock=time.monotonic) -> None:
+        """
+        Args:
+            driver (MLAB_DRV10987): The driver of the watched device.
+            auto_clear (iterable, optional): Flags cleared in the device as soon as they are raised.
+            latch (iterable, optional): Flags held active until acknowledged.
+            clear_interval (float, optional): Minimum time between two auto-clear writes in seconds. Default is 0, every poll.
+            clock (callable, optional): Timestamp source of the events. Default is time.monotonic.
+        """
+        self.driver = driver
+        self.auto_clear_mask = decode.fault_mask(auto_clear)
+        self.latch_mask = decode.fault_mask(latch)
+        self.clear_interval = clear_interval
+        self.clock = clock
+        self.raw = 0
+        self.latched = 0
+        self.polls = 0
+        self.events = 0
+        self.clears = 0
+        self._callbacks = []
+        # Flags cleared by the last auto-clear write and the time of the write
+        self._cleared = 0
+        self._cleared_at = None
+
+    def subscribe(self, callback, flags=None, raised: bool = True, cleared: bool = True) -> None:
+        """
+        Register a callback for fault events.
+
+        Args:
+            callback (callable): Called with a FaultEvent.
+            flags (iterable, optional): Flags of interest. Default is all flags.
+            raised (bool, optional): Deliver raised events. Default is True.
+            cleared (bool, optional): Deliver cleared events. Default is True.
+        """
+        mask = 0xffff if flags is None else decode.fault_mask(flags)
+        self._callbacks.append((callback, mask, raised, cleared))
+
+    def unsubscribe(self, callback) -> None:
+        """
+        Remove all registrations of a callback.
+        """
+        self._callbacks = [entry for entry in self._callbacks if entry[0] is not callback]
+
+    @property
+    def active_mask(self) -> int:
+        """
+        FaultReg bitmask of the active flags, including latched ones.
+        """
+        return self.raw | self.latched
+
+    @property
+    def active(self) -> list:
+        """
+        Names of the active flags, including latched ones.
+        """
+        return self._names(self.active_mask)
+
+    @staticmethod
+    def _names(mask: int) -> list:
+        names = []
+        while mask:
+            bit = mask & -mask
+            names.append(_BIT_NAMES[bit.bit_length() - 1])
+            mask ^= bit
+        return names
+
+    def _dispatch(self, mask: int, raised: bool, raw: int, timestamp: float) -> list:
+        events = []
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            event = FaultEvent(_BIT_NAMES[bit.bit_length() - 1], raised, raw, timestamp)
+            events.append(event)
+            for callback, flags, on_raised, on_cleared in self._callbacks:
+                if flags & bit and (on_raised if raised else on_cleared):
+                    callback(event)
+        self.events += len(events)
+        return events
+
+    def poll(self) -> list:
+        """
+        Read FaultReg once, dispatch the events of the flags that changed and clear the set
+        auto-clear flags.
+
+        Returns:
+            list: The dispatched FaultEvents, empty when nothing changed.
+        """
+        raw = self.driver.read(MLAB_DRV10987.FaultReg)
+        self.polls += 1
+        # Flags set again after the previous poll cleared them
+        again = raw & self._cleared
+        self._cleared = 0
+        changed = raw ^ self.raw
+        events = []
+        if changed or again:
+            timestamp = self.clock()
+            before = self.active_mask
+            self.raw = raw
+            self.latched |= raw & self.latch_mask
+            active = self.active_mask
+            events = self._dispatch(active & ~before | again, True, raw, timestamp)
+            events += self._dispatch(before & ~active, False, raw, timestamp)
+
+        clear = raw & self.auto_clear_mask
+        if clear:
+            now = self.clock()
+            if self._cleared_at is None or now - self._cleared_at >= self.clear_interval:
+                self.driver.write(MLAB_DRV10987.FaultReg, clear)
+                self._cleared = clear
+                self._cleared_at = now
+                self.clears += 1
+        return events
+
+    def acknowledge(self, flags=None) -> list:
+        """
+        Release latched flags. Flags that are no longer set in the device are reported as cleared.
+
+        Args:
+            flags (iterable, optional): Flags to release. Default is all latched flags.
+
+        Returns:
+            list: The dispatched FaultEvents.
+        """
+        mask = self.latched if flags is None else decode.fault_mask(flags)
+        before = self.active_mask
+        self.latched &= ~mask
+        return self._dispatch(before & ~self.active_mask, False, self.raw, self.clock())
@@ -0,0 +1,220 @@
+#! /usr/bin/python3
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import smbus2 as smbus
+
+from .driver import MLAB_DRV10987
+
+class DriverFleet():
+    """
+    Manager for many DRV10987V01 modules spread over several I2C buses.
+
+    The fleet owns one MLAB_DRV10987 instance per (bus, address) pair and one SMBus object per
+    bus number. Status polling runs on a thread pool with one worker per bus: drivers on the
+    same bus are polled serially, while different buses are polled in parallel. The aggregate
+    telemetry rate therefore grows with the number of buses.
+
+    Transactions issued outside `poll` (e.g. speed commands from another thread) should be
+    guarded by the bus lock returned by `lock`.
+
+    Example usage:
+    fleet = DriverFleet()
+    fleet.add(1, initialize=False, enable_motor=False)
+    fleet.add(2, initialize=False, enable_motor=False)
+    snapshot = fleet.poll(fields=["MotorSpeed", "FaultFlags"])
+    fleet.close()
+    """
+
+    def __init__(self, bus_factory=smbus.SMBus) -> None:
+        """
+        Initialize an empty fleet.
+
+        Args:
+            bus_factory (callable, optional): Called with a bus number to open the bus. Default is smbus.SMBus.
+        """
+        self._bus_factory = bus_factory
+        self.buses = {}
+        # Bus numbers whose bus objects were opened by the fleet and are closed by `close`
+        self._owned = set()
+        self.drivers = {}
+        self._locks = {}
+        self._executor = None
+        self.cycle = 0
+
+    def add(self, bus: int, addr: int = MLAB_DRV10987.DRVADDR, driver: MLAB_DRV10987 = None, **kwargs) -> MLAB_DRV10987:
+        """
+        Add a driver to the fleet.
+
+        Args:
+            bus (int): The I2C bus number (N in /dev/i2c-N).
+            addr (int, optional): The address of the device. Default is 0b1010010.
+            driver (MLAB_DRV10987, optional): Already created driver using this bus. When not given,
+                a new driver is created on the bus owned by the fleet.
+            **kwargs: Passed to the MLAB_DRV10987 constructor.
+
+        Returns:
+            MLAB_DRV10987: The driver instance.
+        """
+        key = (bus, addr)
+        if key in self.drivers:
+            raise ValueError(f"Driver at bus {bus}, address 0x{addr:02x} is already in the fleet")
+
+        lock = self.lock(bus)
+        with lock:
+            if driver is None:
+                if bus not in self.buses:
+                    self.buses[bus] = self._bus_factory(bus)
+                    self._owned.add(bus)
+                driver = MLAB_DRV10987(bus=self.buses[bus], addr=addr, **kwargs)
+            else:
+                self.buses.setdefault(bus, driver.bus)
+
+        self.drivers[key] = driver
+        self._reset_executor()
+        return driver
+
+    def remove(self, bus: int, addr: int = MLAB_DRV10987.DRVADDR) -> MLAB_DRV10987:
+        """
+        Remove a driver from the fleet. The bus stays open.
+
+        Returns:
+            MLAB_DRV10987: The removed driver instance.
+        """
+        driver = self.drivers.pop((bus, addr))
+        self._reset_executor()
+        return driver
+
+    def lock(self, bus: int) -> threading.Lock:
+        """
+        Return the lock serializing transactions on the given bus.
+        """
+        return self._locks.setdefault(bus, threading.Lock())
+
+    def _reset_executor(self) -> None:
+        """
+        Drop the worker pool so that the next poll creates one worker per bus.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _submit_per_bus(self, func, *args) -> list:
+        """
+        Run func(bus, *args) for every bus on the worker pool and return the futures.
+        """
+        buses = sorted({bus for bus, _ in self.drivers})
+        if self._executor is None and buses:
+            self._executor = ThreadPoolExecutor(max_workers=len(buses), thread_name_prefix="drv10987-bus")
+        return [self._executor.submit(func, bus, *args) for bus in buses]
+
+    def _poll_bus(self, bus: int, fields) -> tuple:
+        """
+        Poll all drivers on one bus serially.
+        """
+        status = {}
+        errors = {}
+        with self.lock(bus):
+            for key, driver in self.drivers.items():
+                if key[0] != bus:
+                    continue
+                try:
+                    status[key] = driver.read_status_registers(fields)
+                except OSError as e:
+                    errors[key] = e
+        return status, errors
+
+    def poll(self, fields=None) -> dict:
+        """
+        Poll the status of all drivers, one worker per bus, and merge the results.
+
+        Args:
+            fields (iterable, optional): Status fields to read, see MLAB_DRV10987.read_status_registers.
+
+        Returns:
+            dict: Snapshot with the following structure:
+
+            {
+                "cycle": int,         # Sequence number of the poll cycle
+                "timestamp": float,   # Time when the cycle started (time.time())
+                "duration": float,    # Duration of the cycle in seconds
+                "status": dict,       # (bus, addr) -> status dictionary of the driver
+                "errors": dict,       # (bus, addr) -> OSError raised while polling the driver
+            }
+        """
+        timestamp = time.time()
+        start = time.monotonic()
+        futures = self._submit_per_bus(self._poll_bus, fields)
+
+        snapshot = {
+            "cycle": self.cycle,
+            "timestamp": timestamp,
+            "duration": 0.0,
+            "status": {},
+            "errors": {},
+        }
+        for future in futures:
+            status, errors = future.result()
+            snapshot["status"].update(status)
+            snapshot["errors"].update(errors)
+        snapshot["duration"] = time.monotonic() - start
+        self.cycle += 1
+        return snapshot
+
+    def _apply_bus(self, bus: int, profile, force: bool) -> tuple:
+        """
+        Apply a profile to all drivers on one bus serially.
+        """
+        written = {}
+        errors = {}
+        with self.lock(bus):
+            for key, driver in self.drivers.items():
+                if key[0] != bus:
+                    continue
+                try:
+                    written[key] = profile.apply(driver, force=force)
+                except OSError as e:
+                    errors[key] = e
+        return written, errors
+
+    def apply_profile(self, profile, force: bool = False) -> tuple:
+        """
+        Apply a motor profile to all drivers, buses in parallel.
+
+        Args:
+            profile (profiles.MotorProfile): The profile to apply.
+            force (bool, optional): Write all registers, not only those that differ from the shadow caches.
+
+        Returns:
+            tuple: (written, errors), dictionaries keyed by (bus, addr) with the addresses of the
+                registers written and the OSError raised, respectively.
+        """
+        written = {}
+        errors = {}
+        for future in self._submit_per_bus(self._apply_bus, profile, force):
+            bus_written, bus_errors = future.result()
+            written.update(bus_written)
+            errors.update(bus_errors)
+        return written, errors
+
+    def close(self) -> None:
+        """
+        Stop the worker pool and close the buses opened by the fleet. Buses of drivers passed to
+        `add` belong to the caller and stay open.
+        """
+        self._reset_executor()
+        for number in self._owned:
+            close = getattr(self.buses[number], "close", None)
+            if close is not None:
+                close()
+        self._owned.clear()
+        self.buses.clear()
+        self.drivers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
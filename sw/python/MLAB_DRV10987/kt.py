@@ -0,0 +1,238 @@
+#! /usr/bin/python3
+
+"""
+BEMF constant (Kt) extraction from oscilloscope captures of a coasting motor.
+
+This is the analysis of tools/Kt_value.ipynb as an importable module and a command line tool.
+Each channel is smoothed with a moving average, the electrical frequency is taken from the
+zero crossings of the smoothed signal and the amplitude from the raw signal, Kt = amplitude /
+frequency. All steps are vectorized with NumPy and many captures are processed in parallel.
+
+Example usage:
+python -m MLAB_DRV10987.kt tools/measurements/*.csv
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Scale of the Kt register values: MotorXt and KtValue count in units of 1/2180 V/Hz
+KT_SCALE = 2180
+
+
+def read_scope_header(f) -> dict:
+    """
+    Parse the two header lines of a Rigol CSV capture and leave `f` at the first sample.
+
+    The first line names the columns (X, CH1, CH2, ..., Start, Increment), the second line holds
+    the units and the values of Start and Increment.
+
+    Args:
+        f (file): CSV file opened in text mode.
+
+    Returns:
+        dict: "start", "increment" (s), "units" (channel name -> unit) and "columns" (channel
+            name -> column index in the sample lines).
+    """
+    reader = csv.reader([f.readline(), f.readline()])
+    names = [name for name in next(reader) if name]
+    values = next(reader)
+    fields = dict(zip(names, values))
+    columns = {name: n for n, name in enumerate(names) if name.startswith("CH")}
+    return {
+        "start": float(fields.get("Start", 0.0)),
+        "increment": float(fields["Increment"]),
+        "units": {name: values[n] for name, n in columns.items()},
+        "columns": columns,
+    }
+
+
+def read_scope_csv(path: str):
+    """
+    Read a CSV capture saved by a Rigol oscilloscope.
+
+    Only the two header lines are parsed in Python, the samples are parsed into one array in a
+    single pass.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        tuple: (header, channels), where header is the dict of `read_scope_header` and channels
+            is a dict of channel name -> float64 array.
+    """
+    with open(path) as f:
+        header = read_scope_header(f)
+        columns = header["columns"]
+        data = np.loadtxt(f, delimiter=",", usecols=list(columns.values()), ndmin=2)
+    return header, {name: data[:, i] for i, name in enumerate(columns)}
+
+
+def moving_average(padded, window: int):
+    """
+    Means of all `window` long runs of `padded` along the first axis, computed from a cumulative sum.
+
+    Returns:
+        numpy.ndarray: len(padded) - window + 1 values (rows).
+    """
+    sums = np.cumsum(padded, axis=0, dtype=np.float64)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums[window - 1:] / window
+
+
+def smooth(signal, window: int = 10):
+    """
+    Moving average of `window` samples with mirrored edges (scipy.ndimage.uniform_filter1d).
+    """
+    padded = np.pad(np.asarray(signal), (window // 2, window - 1 - window // 2), mode="symmetric")
+    return moving_average(padded, window)
+
+
+def analyze_channel(signal, increment: float, window: int = 10) -> dict:
+    """
+    Extract amplitude, frequency and Kt from one BEMF channel.
+
+    Args:
+        signal (numpy.ndarray): Phase voltage samples in V.
+        increment (float): Sampling interval in s.
+        window (int, optional): Length of the smoothing window in samples. Default is 10.
+
+    Returns:
+        dict: "amplitude" (V), "frequency" (Hz), "kt" (V/Hz) and "kt_mV_Hz". Frequency and Kt
+            are NaN when the signal has less than two zero crossings.
+    """
+    signal = np.asarray(signal)
+    # Samples that are exactly zero count to the positive half-wave, so a crossing through zero is not counted twice
+    crossings = np.flatnonzero(np.diff(smooth(signal, window) >= 0))
+    if len(crossings) < 2:
+        frequency = float("nan")
+    else:
+        # Two zero crossings per period
+        frequency = 1 / (np.mean(np.diff(crossings)) * increment) / 2
+    amplitude = (np.max(signal) - np.min(signal)) / 2
+    kt = amplitude / frequency
+    return {
+        "amplitude": float(amplitude),
+        "frequency": float(frequency),
+        "kt": float(kt),
+        "kt_mV_Hz": float(kt * 1000),
+    }
+
+
+def kt_to_register(kt: float) -> int:
+    """
+    Encode a BEMF constant as the KtValue field of CONFIG2.
+
+    KtValue holds a 3-bit shift and a 4-bit mantissa, Kt = ((8 + mantissa) << shift) / 2180 V/Hz,
+    the same scale as the MotorXt register. The nearest representable value is returned.
+
+    Args:
+        kt (float): BEMF constant in V/Hz.
+
+    Returns:
+        int: KtValue for MLAB_DRV10987.configure_CONFIG2.
+
+    Raises:
+        ValueError: Kt is not finite, e.g. NaN of a capture without two zero crossings.
+    """
+    if not math.isfinite(kt):
+        raise ValueError(f"Kt {kt} V/Hz cannot be encoded as KtValue")
+    target = kt * KT_SCALE
+    return min(range(0x80), key=lambda value: abs(register_to_kt(value) * KT_SCALE - target))
+
+
+def register_to_kt(value: int) -> float:
+    """
+    Decode the KtValue field of CONFIG2 to a BEMF constant in V/Hz, see `kt_to_register`.
+    """
+    return ((8 + (value & 0x0f)) << (value >> 4)) / KT_SCALE
+
+
+def kt_value(kt: float):
+    """
+    Return `kt_to_register(kt)`, or None when Kt is not finite.
+    """
+    return kt_to_register(kt) if math.isfinite(kt) else None
+
+
+def analyze_file(path: str, window: int = 10) -> dict:
+    """
+    Analyze all channels of one capture.
+
+    Args:
+        path (str): Path of the CSV file or of a binary capture, see MLAB_DRV10987.capture.
+        window (int, optional): Length of the smoothing window in samples. Default is 10.
+
+    Returns:
+        dict: "file", "channels" (channel name -> result of `analyze_channel`), the mean "kt" of
+            all channels in V/Hz and the corresponding "KtValue", None when Kt is NaN.
+    """
+    from . import capture
+    if capture.is_capture(path):
+        return capture.analyze_capture(path, window)
+    header, channels = read_scope_csv(path)
+    results = {name: analyze_channel(signal, header["increment"], window) for name, signal in channels.items()}
+    kt = float(np.mean([result["kt"] for result in results.values()]))
+    return {
+        "file": path,
+        "channels": results,
+        "kt": kt,
+        "KtValue": kt_value(kt),
+    }
+
+
+def analyze_files(paths, window: int = 10, workers: int = None) -> list:
+    """
+    Analyze many captures in parallel worker processes.
+
+    Args:
+        paths (iterable): Paths of the CSV files.
+        window (int, optional): Length of the smoothing window in samples. Default is 10.
+        workers (int, optional): Number of processes. Default is the number of CPUs, 1 runs in this process.
+
+    Returns:
+        list: Results of `analyze_file` in the order of `paths`.
+    """
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2:
+        return [analyze_file(path, window) for path in paths]
+    # Hand out several small files per task to amortize the inter-process overhead
+    chunksize = max(1, len(paths) // (4 * (workers or os.cpu_count() or 1)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(analyze_file, paths, [window] * len(paths), chunksize=chunksize))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compute the BEMF constant Kt from oscilloscope captures.")
+    parser.add_argument("files", nargs="+", help="CSV or binary captures of the coasting motor")
+    parser.add_argument("-w", "--window", type=int, default=10, help="smoothing window in samples (default 10)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON lines")
+    args = parser.parse_args(argv)
+
+    results = analyze_files(args.files, window=args.window, workers=args.jobs)
+    valid = [result for result in results if result["KtValue"] is not None]
+    for result in results:
+        if args.json:
+            print(json.dumps(result))
+            continue
+        channels = ", ".join(f"{name} {r['amplitude']:.3f} V {r['frequency']:.2f} Hz {r['kt_mV_Hz']:.2f} mV/Hz"
+                             for name, r in result["channels"].items())
+        if result["KtValue"] is None:
+            print(f"{result['file']}: {channels} -> no Kt, a channel has less than two zero crossings", file=sys.stderr)
+        else:
+            print(f"{result['file']}: {channels} -> Kt {result['kt'] * 1000:.2f} mV/Hz, KtValue 0x{result['KtValue']:02x}")
+    if len(valid) > 1 and not args.json:
+        kt = float(np.mean([result["kt"] for result in valid]))
+        print(f"Average of {len(valid)} files: Kt {kt * 1000:.2f} mV/Hz, KtValue 0x{kt_to_register(kt):02x}")
+    return 0 if len(valid) == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#! /usr/bin/python3
+
+"""
+Support of TCA9548A-style I2C multiplexers for many DRV10987 modules on one bus.
+
+The DRV10987 has a fixed I2C address, so modules sharing a bus sit on separate channels of a
+multiplexer. TCA9548A tracks the selected channel and skips the select write when the channel
+is already selected. MuxChannelBus binds a driver to one channel. MuxScheduler orders pending
+driver operations by channel so that each poll cycle switches every channel at most once.
+
+Example usage:
+bus = smbus.SMBus(1)
+rack = []
+muxes = [TCA9548A(bus, addr, peers=rack) for addr in (0x70, 0x71, 0x72, 0x73)]
+drivers = [MLAB_DRV10987(mux.channel(n), initialize=False) for mux in muxes for n in range(8)]
+scheduler = MuxScheduler(drivers)
+status, errors = scheduler.poll(fields=["MotorSpeed"])
+"""
+
+import threading
+
+
+class TCA9548A():
+    """
+    TCA9548A 8-channel I2C multiplexer with a cached channel selection.
+
+    Several multiplexers on one bus are declared as peers by passing the same list as `peers`.
+    Selecting a channel of one of them first disconnects the others, which would otherwise put
+    two modules with the same address on the bus. Peers share one lock.
+
+    Attributes:
+        selected (int): The selected channel, or None when unknown or disabled.
+        selects (int): Select writes done on the bus.
+        disables (int): Disable writes done on the bus.
+        skipped (int): Select requests served from the cache.
+    """
+
+    CHANNELS = 8
+
+    def __init__(self, bus, addr: int = 0x70, peers: list = None, cache: bool = True) -> None:
+        """
+        Args:
+            bus (smbus.SMBus): The upstream I2C bus object.
+            addr (int, optional): The address of the multiplexer. Default is 0x70.
+            peers (list, optional): Multiplexers on the same bus, the new one is appended.
+            cache (bool, optional): Skip the select write when the channel is selected already.
+                Disable when another bus master uses the multiplexer too. Default is True.
+        """
+        self.bus = bus
+        self.addr = addr
+        self.cache = cache
+        self.peers = [] if peers is None else peers
+        # Held for the select and the transaction that follows it
+        self.lock = self.peers[0].lock if self.peers else threading.RLock()
+        self.peers.append(self)
+        self.selected = None
+        # Any channel may be enabled until the first write
+        self.connected = True
+        self.selects = 0
+        self.disables = 0
+        self.skipped = 0
+        self._channels = {}
+
+    def select(self, channel: int) -> None:
+        """
+        Enable a single downstream channel, unless it is already selected.
+        """
+        if self.cache and channel == self.selected:
+            self.skipped += 1
+            return
+        if not 0 <= channel < self.CHANNELS:
+            raise ValueError(f"Channel {channel} is out of range 0-{self.CHANNELS - 1}")
+        with self.lock:
+            for peer in self.peers:
+                if peer is not self and peer.connected:
+                    peer.disable()
+            self.selected = None
+            self.connected = True
+            self.bus.write_byte(self.addr, 1 << channel)
+            self.selected = channel
+            self.selects += 1
+
+    def disable(self) -> None:
+        """
+        Disconnect all downstream channels.
+        """
+        with self.lock:
+            self.selected = None
+            self.bus.write_byte(self.addr, 0)
+            self.connected = False
+            self.disables += 1
+
+    def invalidate(self) -> None:
+        """
+        Forget the cached selection, e.g. after the multiplexer was reset or another master used it.
+        """
+        self.selected = None
+        self.connected = True
+
+    def channel(self, channel: int) -> "MuxChannelBus":
+        """
+        Return the bus object of a downstream channel, one instance per channel.
+        """
+        bus = self._channels.get(channel)
+        if bus is None:
+            if not 0 <= channel < self.CHANNELS:
+                raise ValueError(f"Channel {channel} is out of range 0-{self.CHANNELS - 1}")
+            bus = self._channels[channel] = MuxChannelBus(self, channel)
+        return bus
+
+
+class MuxChannelBus():
+    """
+    SMBus-compatible view of one multiplexer channel.
+
+    Every transaction selects the channel first (a no-op when it is selected already). Other
+    attributes are passed through to the upstream bus.
+    """
+
+    def __init__(self, mux: TCA9548A, channel: int) -> None:
+        """
+        Args:
+            mux (TCA9548A): The multiplexer.
+            channel (int): The downstream channel, 0-7.
+        """
+        self.mux = mux
+        self.channel = channel
+
+    def __getattr__(self, name):
+        return getattr(self.mux.bus, name)
+
+    def read_i2c_block_data(self, i2c_addr: int, register: int, length: int, force=None) -> list:
+        with self.mux.lock:
+            self.mux.select(self.channel)
+            return self.mux.bus.read_i2c_block_data(i2c_addr, register, length, force=force)
+
+    def write_i2c_block_data(self, i2c_addr: int, register: int, data: list, force=None) -> None:
+        with self.mux.lock:
+            self.mux.select(self.channel)
+            self.mux.bus.write_i2c_block_data(i2c_addr, register, data, force=force)
+
+    def i2c_rdwr(self, *i2c_msgs) -> None:
+        with self.mux.lock:
+            self.mux.select(self.channel)
+            self.mux.bus.i2c_rdwr(*i2c_msgs)
+
+    def close(self) -> None:
+        # The upstream bus is shared by all channels
+        pass
+
+
+class MuxJob():
+    """
+    A driver operation queued in a MuxScheduler.
+
+    Attributes:
+        result: Return value of the operation once it ran.
+        error (Exception): Exception raised by the operation, or None.
+        done (bool): The operation ran.
+    """
+
+    __slots__ = ("driver", "func", "args", "kwargs", "result", "error", "done")
+
+    def __init__(self, driver, func, args, kwargs) -> None:
+        self.driver = driver
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+class MuxScheduler():
+    """
+    Executes driver operations grouped by multiplexer channel.
+
+    Queued operations run channel by channel, so every channel with pending work is selected
+    once per `flush`. The selected channel goes first, then the remaining channels of its
+    multiplexer, then those of the peer multiplexers. Within a channel the operations keep
+    their submission order.
+    """
+
+    def __init__(self, drivers=()) -> None:
+        """
+        Args:
+            drivers (iterable, optional): Drivers created on multiplexer channels, see `add`.
+        """
+        self.drivers = []
+        self._pending = {}
+        for driver in drivers:
+            self.add(driver)
+
+    @staticmethod
+    def _channel(driver) -> MuxChannelBus:
+        bus = driver.bus
+        if not isinstance(bus, MuxChannelBus):
+            raise ValueError("The driver is not connected through a multiplexer channel")
+        return bus
+
+    def add(self, driver) -> None:
+        """
+        Register a driver for `poll`. Its bus must be a multiplexer channel, see TCA9548A.channel.
+        """
+        self._channel(driver)
+        self.drivers.append(driver)
+
+    def submit(self, driver, func, *args, **kwargs) -> MuxJob:
+        """
+        Queue an operation, e.g. submit(drv, drv.set_SpeedCtrl, 50).
+
+        Args:
+            driver (MLAB_DRV10987): The driver the operation talks to.
+            func (callable): Called with `args` and `kwargs` on `flush`.
+
+        Returns:
+            MuxJob: Holds the result after `flush`.
+        """
+        job = MuxJob(driver, func, args, kwargs)
+        self._pending.setdefault(self._channel(driver), []).append(job)
+        return job
+
+    @staticmethod
+    def _order(channels) -> list:
+        def key(bus):
+            mux = bus.mux
+            return (mux.selected is None, mux.addr, (bus.channel - (mux.selected or 0)) % mux.CHANNELS)
+        return sorted(channels, key=key)
+
+    def flush(self) -> int:
+        """
+        Run all queued operations grouped by channel.
+
+        Exceptions raised by operations are stored in their jobs and do not stop the others.
+
+        Returns:
+            int: The number of operations run.
+        """
+        pending, self._pending = self._pending, {}
+        count = 0
+        for bus in self._order(pending):
+            with bus.mux.lock:
+                for job in pending[bus]:
+                    try:
+                        job.result = job.func(*job.args, **job.kwargs)
+                    except Exception as e:
+                        job.error = e
+                    job.done = True
+                    count += 1
+        return count
+
+    def poll(self, fields=None) -> tuple:
+        """
+        Read the status of all registered drivers with one channel switch per used channel.
+
+        Args:
+            fields (iterable, optional): Status fields to read, see MLAB_DRV10987.read_status_registers.
+
+        Returns:
+            tuple: (status, errors), lists in the order of `drivers` holding the status
+                dictionary or None, and the OSError or None.
+        """
+        jobs = [self.submit(driver, driver.read_status_registers, fields) for driver in self.drivers]
+        self.flush()
+        return [job.result for job in jobs], [job.error for job in jobs]
@@ -0,0 +1,174 @@
+#! /usr/bin/python3
+
+"""
+Named motor configuration profiles.
+
+A profile holds the fields of the CONFIG1-CONFIG7 registers for one motor type. It is stored
+as TOML or JSON with one table per register:
+
+    name = "df45m024053"
+    description = "..."
+
+    [CONFIG2]
+    KtValue = 41
+
+Fields that are not given take the defaults of MLAB_DRV10987.configure_CONFIG1..7. The fields
+are validated against the register map and packed into the seven register words once, when
+the profile is created, so applying it is a single batched write.
+
+Example usage:
+profile = MotorProfile.load("profiles/df45m024053.toml")
+profile.apply(drv)
+MotorProfile.capture(drv, "tuned").save("tuned.json")
+"""
+
+import inspect
+import json
+import os
+
+from . import registers
+from .driver import MLAB_DRV10987
+
+
+def _defaults(register) -> dict:
+    """
+    Field defaults of a CONFIG register, taken from the matching configure_CONFIGn method.
+    """
+    method = getattr(MLAB_DRV10987, f"configure_{register.name}")
+    return {name: int(parameter.default) for name, parameter in inspect.signature(method).parameters.items()
+            if parameter.default is not inspect.Parameter.empty}
+
+
+DEFAULT_FIELDS = {register.name: _defaults(register) for register in registers.CONFIG_REGISTERS}
+
+
+class MotorProfile():
+    """
+    Configuration of the CONFIG registers for one motor type.
+
+    Attributes:
+        name (str): Name of the profile.
+        description (str): Free text.
+        fields (dict): Register name -> {field name: value}, complete for all seven registers.
+        words (dict): Register address -> packed 16-bit value, in register order.
+    """
+
+    def __init__(self, name: str, fields: dict = None, description: str = "") -> None:
+        """
+        Args:
+            name (str): Name of the profile.
+            fields (dict, optional): Register name -> {field name: value}. Missing registers and fields take the defaults.
+            description (str, optional): Free text.
+
+        Raises:
+            ValueError: Unknown register or field, or a value that does not fit its field.
+        """
+        fields = dict(fields or {})
+        unknown = set(fields) - set(DEFAULT_FIELDS)
+        if unknown:
+            raise ValueError(f"Profile {name}: unknown registers {', '.join(sorted(unknown))}")
+        self.name = name
+        self.description = description
+        self.fields = {}
+        self.words = {}
+        for register in registers.CONFIG_REGISTERS:
+            given = fields.get(register.name, {})
+            unknown = set(given) - set(register.field_names)
+            if unknown:
+                raise ValueError(f"Profile {name}: unknown fields of {register.name}: {', '.join(sorted(unknown))}")
+            values = dict(DEFAULT_FIELDS[register.name])
+            values.update({field: int(value) for field, value in given.items()})
+            self.words[register.address] = register.pack(**values)
+            self.fields[register.name] = {field: values.get(field, 0) for field in register.field_names}
+
+    @classmethod
+    def from_words(cls, name: str, words: dict, description: str = "") -> "MotorProfile":
+        """
+        Create a profile from register words.
+
+        Args:
+            name (str): Name of the profile.
+            words (dict): CONFIG register address -> 16-bit value.
+            description (str, optional): Free text.
+        """
+        return cls(name, {register.name: register.unpack(words[register.address])
+                          for register in registers.CONFIG_REGISTERS if register.address in words}, description)
+
+    @classmethod
+    def capture(cls, driver: MLAB_DRV10987, name: str, description: str = "") -> "MotorProfile":
+        """
+        Create a profile from the CONFIG registers of a live driver, read in one bulk read.
+        """
+        addresses = [register.address for register in registers.CONFIG_REGISTERS]
+        return cls.from_words(name, dict(zip(addresses, driver.read_registers(addresses))), description)
+
+    def apply(self, driver: MLAB_DRV10987, force: bool = False) -> list:
+        """
+        Write the profile to a driver as one batched write, see MLAB_DRV10987.write_registers.
+
+        To read the written words back, give the driver a transport.ResilientBus with `verify_writes`.
+
+        Args:
+            driver (MLAB_DRV10987): The target driver.
+            force (bool, optional): Write all registers, not only those that differ from the shadow cache.
+
+        Returns:
+            list: Addresses of the registers written.
+        """
+        return driver.write_registers(self.words, force=force)
+
+    def to_dict(self) -> dict:
+        """
+        Return the profile as a dictionary in the file layout.
+        """
+        data = {"name": self.name, "description": self.description}
+        data.update({register: dict(fields) for register, fields in self.fields.items()})
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MotorProfile":
+        """
+        Create a profile from a dictionary in the file layout.
+        """
+        data = dict(data)
+        name = data.pop("name")
+        description = data.pop("description", "")
+        return cls(name, data, description)
+
+    @classmethod
+    def load(cls, path: str) -> "MotorProfile":
+        """
+        Load a profile from a .toml or .json file.
+        """
+        if os.path.splitext(path)[1].lower() == ".toml":
+            try:
+                import tomllib
+            except ImportError:  # Python < 3.11
+                import tomli as tomllib
+            with open(path, "rb") as f:
+                return cls.from_dict(tomllib.load(f))
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: str) -> None:
+        """
+        Save the profile to a .toml or .json file.
+        """
+        if os.path.splitext(path)[1].lower() == ".toml":
+            lines = [f"name = {json.dumps(self.name)}", f"description = {json.dumps(self.description)}"]
+            for register, fields in self.fields.items():
+                lines.append("")
+                lines.append(f"[{register}]")
+                lines.extend(f"{field} = {value}" for field, value in fields.items())
+            text = "\n".join(lines) + "\n"
+        else:
+            text = json.dumps(self.to_dict(), indent=4) + "\n"
+        with open(path, "w") as f:
+            f.write(text)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MotorProfile) and self.words == other.words
+
+    def __repr__(self) -> str:
+        words = " ".join(f"{value:04x}" for value in self.words.values())
+        return f"MotorProfile({self.name!r}, {words})"
@@ -0,0 +1,249 @@
+#! /usr/bin/python3
+
+"""
+Declarative register map of the DRV10987.
+
+Every register is described once by its address, access type and bit fields. Pack and unpack
+functions of each register are generated from the table at import time, so packing a register
+is a single precompiled expression with field-width validation, and unpacking works on plain
+integers as well as on NumPy integer arrays.
+"""
+
+from collections import namedtuple
+
+# offset: position of the least significant bit, width: number of bits,
+# access: "r" read-only, "w" write-only, "rw" read/write, "rc" read/clear by writing 1
+Field = namedtuple("Field", ["name", "offset", "width", "access", "units", "description"])
+
+
+class Register():
+    """
+    One 16-bit DRV10987 register with its bit fields and generated pack/unpack functions.
+
+    Attributes:
+        pack (callable): pack(**fields) -> int. Missing fields are 0, values not fitting the field width raise ValueError.
+        unpack (callable): unpack(value) -> dict of field values. Accepts NumPy arrays.
+    """
+
+    def __init__(self, name: str, address: int, access: str, fields, description: str = "") -> None:
+        self.name = name
+        self.address = address
+        self.access = access
+        self.fields = tuple(fields)
+        self.description = description
+        self.field_names = tuple(field.name for field in self.fields)
+        self.mask = 0
+        for field in self.fields:
+            field_mask = ((1 << field.width) - 1) << field.offset
+            if self.mask & field_mask or field.offset + field.width > 16:
+                raise ValueError(f"Field {field.name} of register {name} overlaps or exceeds 16 bits")
+            self.mask |= field_mask
+        self.pack, self.unpack = self._compile()
+
+    def _compile(self) -> tuple:
+        """
+        Generate the pack and unpack functions of the register.
+        """
+        args = ", ".join(f"{f.name}=0" for f in self.fields)
+        checks = "".join(
+            f"    if not 0 <= {f.name} <= {(1 << f.width) - 1}:\n"
+            f"        _range_error({self.name!r}, {f.name!r}, {f.name}, {f.width})\n"
+            for f in self.fields)
+        expression = " | ".join(f"{f.name} << {f.offset}" if f.offset else f"{f.name}" for f in self.fields) or "0"
+        items = ", ".join(
+            f"{f.name!r}: value >> {f.offset} & {(1 << f.width) - 1}" if f.offset else f"{f.name!r}: value & {(1 << f.width) - 1}"
+            for f in self.fields)
+        source = (
+            f"def pack({args}):\n{checks}    return {expression}\n"
+            f"def unpack(value):\n    return {{{items}}}\n")
+        namespace = {"_range_error": _range_error}
+        exec(source, namespace)
+        namespace["pack"].__doc__ = f"Pack the fields of the {self.name} register into a 16-bit value."
+        namespace["unpack"].__doc__ = f"Unpack a value of the {self.name} register into its fields."
+        return namespace["pack"], namespace["unpack"]
+
+    def replace(self, value: int, **fields) -> int:
+        """
+        Return `value` with the given fields replaced, keeping all other bits.
+        """
+        keep = value
+        for field in self.fields:
+            if field.name in fields:
+                keep &= ~(((1 << field.width) - 1) << field.offset)
+        return keep | self.pack(**fields)
+
+    def pack_many(self, rows) -> list:
+        """
+        Pack many field dictionaries at once.
+
+        Args:
+            rows (iterable): Dictionaries of field values.
+
+        Returns:
+            list: The packed 16-bit values.
+        """
+        pack = self.pack
+        return [pack(**row) for row in rows]
+
+    def __repr__(self) -> str:
+        return f"Register({self.name!r}, 0x{self.address:02x})"
+
+
+def _range_error(register: str, field: str, value, width: int):
+    raise ValueError(f"{register}.{field} = {value!r} does not fit in {width} bit(s)")
+
+
+def _f(name, offset, width, access="rw", units="", description=""):
+    return Field(name, offset, width, access, units, description)
+
+
+REGISTERS = (
+    Register("FaultReg", 0x00, "rc", [
+        _f("Lock0", 0, 1, "rc", description="Lock detection current limit"),
+        _f("Lock1", 1, 1, "rc", description="Speed abnormal"),
+        _f("Lock2", 2, 1, "rc", description="Kt abnormal"),
+        _f("Lock3", 3, 1, "rc", description="No motor"),
+        _f("Lock4", 4, 1, "rc", description="Stuck in open loop"),
+        _f("Lock5", 5, 1, "rc", description="Stuck in closed loop"),
+        _f("V3P3_UVLO", 7, 1, "rc", description="3.3 V regulator undervoltage"),
+        _f("VCC_UVLO", 8, 1, "rc", description="VCC undervoltage"),
+        _f("VREG_UVLO", 9, 1, "rc", description="VREG undervoltage"),
+        _f("CP_UVLO", 10, 1, "rc", description="Charge pump undervoltage"),
+        _f("OverCurr", 11, 1, "rc", description="Overcurrent"),
+        _f("VREG_OC", 12, 1, "rc", description="VREG overcurrent"),
+        _f("VCC_OC", 13, 1, "rc", description="VCC overcurrent"),
+        _f("TempWarning", 14, 1, "rc", description="Over-temperature warning"),
+        _f("OverTemp", 15, 1, "rc", description="Over-temperature shutdown"),
+    ], "Fault flags, cleared by writing 1"),
+    Register("MotorSpeed", 0x01, "r", [_f("MotorSpeed", 0, 16, "r", "0.1 Hz (electrical)")]),
+    Register("MotorPeriod", 0x02, "r", [_f("MotorPeriod", 0, 16, "r", "10 us")]),
+    Register("MotorXt", 0x03, "r", [_f("MotorXt", 0, 16, "r", "1/2180 V/Hz", "Measured BEMF constant")]),
+    Register("MotorCurrent", 0x04, "r", [_f("MotorCurrent", 0, 16, "r", "1/512 A")]),
+    Register("SupplyVoltage", 0x05, "r", [
+        _f("SupplyVoltage", 0, 8, "r", "30/255 V"),
+        _f("IPDPosition", 8, 8, "r", "", "Inductive position detect result"),
+    ]),
+    Register("SpeedCmd", 0x06, "r", [
+        _f("SpdCmdBuffer", 0, 8, "r", "100/255 %"),
+        _f("SpeedCmd", 8, 8, "r", "100/255 %"),
+    ]),
+    Register("AnalogInLvl", 0x07, "r", [_f("AnalogInLvl", 0, 16, "r")]),
+    Register("DeviceId", 0x08, "r", [_f("DeviceId", 0, 16, "r")]),
+    Register("SpeedCtrl", 0x30, "rw", [
+        _f("SpdCtrl", 0, 9, units="1/511 of full duty", description="Speed command"),
+        _f("OverRide", 15, 1, description="1: use SpdCtrl instead of the analog/PWM input"),
+    ]),
+    Register("EepromProgramming1", 0x31, "w", [_f("eeAccessCode", 0, 16, "w", description="EEPROM access code")]),
+    Register("EepromProgramming2", 0x32, "r", [_f("eeReady", 0, 1, "r", description="EEPROM ready for access")]),
+    Register("EepromProgramming3", 0x33, "rw", [_f("eeIndividualAccessAddr", 0, 8, description="EEPROM address for individual access")]),
+    Register("EepromProgramming4", 0x34, "rw", [_f("eeIndividualAccessData", 0, 16, description="EEPROM data for individual access")]),
+    Register("EepromProgramming5", 0x35, "rw", [
+        _f("eeWrite", 0, 1, description="Start the EEPROM write"),
+        _f("eeMassAccess", 1, 1, description="1: write all CONFIG registers at once, 0: individual access"),
+        _f("eeMassWrite", 2, 1, description="Mass write enable"),
+        _f("eeRefresh", 3, 1, description="Reload the registers from the EEPROM"),
+        _f("ShadowRegEn", 12, 1, description="Use the shadow registers instead of the EEPROM"),
+    ]),
+    Register("EepromProgramming6", 0x36, "rw", [_f("EepromProgramming6", 0, 16)]),
+    Register("EECTRL", 0x60, "rw", [_f("MotorDis", 15, 1, description="1: motor output disabled")]),
+    Register("CONFIG1", 0x90, "rw", [
+        _f("RMValue", 0, 7, description="Motor phase resistance, RMShift + RMValue"),
+        _f("ClkCycleAdjust", 7, 1, description="0: full-cycle adjust, 1: half-cycle"),
+        _f("FGCycle", 8, 4, description="FG motor pole count"),
+        _f("FGOLSel", 12, 2, description="FG open-loop output select"),
+        _f("SSMConfig", 14, 2, description="Spread spectrum modulation control"),
+    ]),
+    Register("CONFIG2", 0x91, "rw", [
+        _f("TCtrlAdvValue", 0, 7, description="Commutation advance value"),
+        _f("CommAdvMode", 7, 1, description="Commutation advance mode"),
+        _f("KtValue", 8, 7, description="BEMF Kt value, KtShift + KtValue"),
+    ]),
+    Register("CONFIG3", 0x92, "rw", [
+        _f("BrkDoneThr", 0, 3, description="Braking mode setting"),
+        _f("OpLCurrRt", 3, 3, description="Open-loop current ramp-up setting"),
+        _f("OpLCurr", 6, 2, description="Open-loop current setting"),
+        _f("RvsDrThr", 8, 2, description="Reverse drive or brake threshold"),
+        _f("RvsDrEn", 10, 1, description="Reverse drive"),
+        _f("ISDEn", 11, 1, description="Initial speed detect"),
+        _f("BEMF_HYS", 12, 1, description="0: low 20 mV BEMF comparator hysteresis, 1: high 40 mV"),
+        _f("BrkCurThrSel", 13, 1, description="Brake current-level-threshold selection"),
+        _f("ISDThr", 14, 2, description="ISD stationary judgment threshold"),
+    ]),
+    Register("CONFIG4", 0x93, "rw", [
+        _f("AlginTime", 0, 3, description="Align time"),
+        _f("Op2ClsThr", 3, 5, description="Open-to-closed loop threshold, range bit + 4-bit value"),
+        _f("StAccel", 8, 6, description="Open-loop start-up acceleration"),
+        _f("AccelRangeSel", 14, 1, description="Acceleration range selection"),
+    ]),
+    Register("CONFIG5", 0x94, "rw", [
+        _f("IPDasHwILimit", 0, 1, description="Range of current limit for lock detection"),
+        _f("HWiLimitThr", 1, 3, description="Current limit for lock detection"),
+        _f("SWiLimitThr", 4, 4, description="Software current limit threshold"),
+        _f("LockEn0", 8, 1, description="Lock detection current limit"),
+        _f("LockEn1", 9, 1, description="Abnormal speed lock detect"),
+        _f("LockEn2", 10, 1, description="Abnormal Kt lock detect"),
+        _f("LockEn3", 11, 1, description="No motor fault lock detect"),
+        _f("LockEn4", 12, 1, description="Open-loop stuck lock detect"),
+        _f("LockEn5", 13, 1, description="Closed-loop stuck lock detect"),
+        _f("OTWarningLimit", 14, 1, description="Over-temperature warning current limit"),
+    ]),
+    Register("CONFIG6", 0x95, "rw", [
+        _f("SlewRate", 0, 2, description="Slew-rate control for phase node"),
+        _f("DutyCycleLimit", 2, 2, description="Minimum duty-cycle limit"),
+        _f("ClsLpAccel", 4, 3, description="Closed-loop accelerate"),
+        _f("CLoopDis", 7, 1, description="1: transfer to closed loop disabled"),
+        _f("IPDRIsMd", 8, 1, description="IPD release mode, 0: brake, 1: Hi-z"),
+        _f("AVSMMd", 9, 1, description="Mechanical AVS mode, 0: to VCC, 1: to 24 V"),
+        _f("AVSMEn", 10, 1, description="Enable mechanical AVS"),
+        _f("AVSIndEn", 11, 1, description="Enable inductive AVS"),
+        _f("KtLckThr", 12, 2, description="Abnormal Kt lock detect threshold"),
+        _f("PWMfreq", 14, 1, description="PWM frequency, 0: 25 kHz, 1: 50 kHz"),
+        _f("SpedCtrlMd", 15, 1, description="0: analog input at SPEED pin, 1: PWM input"),
+    ]),
+    Register("CONFIG7", 0x96, "rw", [
+        _f("DeadTime", 0, 5, description="Driver dead time"),
+        _f("CtrlCoef", 5, 3, description="SCORE control constant"),
+        _f("IPDClk", 8, 2, description="Inductive sense clock"),
+        _f("IPDCurrThr", 10, 4, description="IPD current threshold"),
+        _f("IPDAdvcAg", 14, 2, description="Advance angle after inductive sense, 0: 30, 1: 60, 2: 90, 3: 120 deg"),
+    ]),
+)
+
+BY_NAME = {register.name: register for register in REGISTERS}
+BY_ADDRESS = {register.address: register for register in REGISTERS}
+
+CONFIG1 = BY_NAME["CONFIG1"]
+CONFIG2 = BY_NAME["CONFIG2"]
+CONFIG3 = BY_NAME["CONFIG3"]
+CONFIG4 = BY_NAME["CONFIG4"]
+CONFIG5 = BY_NAME["CONFIG5"]
+CONFIG6 = BY_NAME["CONFIG6"]
+CONFIG7 = BY_NAME["CONFIG7"]
+
+# The configuration registers in address order
+CONFIG_REGISTERS = (CONFIG1, CONFIG2, CONFIG3, CONFIG4, CONFIG5, CONFIG6, CONFIG7)
+
+
+def op2cls_threshold(value: int) -> float:
+    """
+    Open-to-closed loop threshold of CONFIG4.Op2ClsThr in Hz (electrical).
+
+    With the range bit (bit 4) clear the threshold is value * 0.8 Hz, otherwise (value + 1) * 12.8 Hz,
+    where value are the lower 4 bits.
+    """
+    if value & 0x10:
+        return ((value & 0x0f) + 1) * 12.8
+    return (value & 0x0f) * 0.8
+
+
+def decode_registers(values: dict) -> dict:
+    """
+    Unpack raw register values into their fields.
+
+    Args:
+        values (dict): Register address -> raw value (int or NumPy array).
+
+    Returns:
+        dict: Register name -> dictionary of field values.
+    """
+    return {BY_ADDRESS[address].name: BY_ADDRESS[address].unpack(value) for address, value in values.items()}
@@ -0,0 +1,144 @@
+#! /usr/bin/python3
+
+import time
+
+from . import decode
+from .driver import MLAB_DRV10987
+from .scheduler import Scheduler
+
+
+class SpeedRegulator():
+    """
+    Closed-loop speed control of a DRV10987 motor.
+
+    Every tick reads only the MotorSpeed register (one 2-byte read) and writes the raw duty
+    command with MLAB_DRV10987.set_SpeedCtrl_raw, which skips the write when the command did
+    not change. The command is a feedforward term proportional to the target speed plus a PI
+    correction. The integral is updated with the measured time since the previous tick, so
+    jitter of the loop does not change the integral gain, and it is frozen while the output is
+    saturated in the direction of the error (anti-windup).
+
+    `run` executes the ticks with a Scheduler on absolute deadlines of a monotonic clock and
+    collects rate and jitter statistics, see `stats`. To control several motors in one loop,
+    add `step` of every regulator to a shared Scheduler instead.
+
+    Example usage:
+    regulator = SpeedRegulator(drv, max_rpm=3000, pole_pairs=4)
+    regulator.target_rpm = 1500
+    regulator.run(rate=200, duration=10)
+    print(regulator.stats())
+    """
+
+    def __init__(self, driver: MLAB_DRV10987, kp: float = 0.02, ki: float = 0.2, max_rpm: float = None,
+                 pole_pairs: int = 1, clock=time.monotonic, sleep=time.sleep) -> None:
+        """
+        Args:
+            driver (MLAB_DRV10987): The driver of the controlled motor.
+            kp (float, optional): Proportional gain in duty counts per RPM of error.
+            ki (float, optional): Integral gain in duty counts per RPM of error and second.
+            max_rpm (float, optional): Speed at 100% duty, used for the feedforward term. Default is no feedforward.
+            pole_pairs (int, optional): Pole pairs of the motor, converts the electrical speed to RPM. Default is 1.
+            clock (callable, optional): Monotonic clock in seconds. Default is time.monotonic.
+            sleep (callable, optional): Sleep function matching `clock`. Default is time.sleep.
+        """
+        self.driver = driver
+        self.kp = kp
+        self.ki = ki
+        self.max_rpm = max_rpm
+        self.pole_pairs = pole_pairs
+        self.clock = clock
+        self.sleep = sleep
+        self.target_rpm = 0.0
+        self.rpm = 0.0
+        self.command = 0
+        self.task = None
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clear the integral term and the tick counter.
+        """
+        self.integral = 0.0
+        self._last_tick = None
+        self.ticks = 0
+
+    def feedforward(self, rpm: float) -> float:
+        """
+        Open-loop duty command in counts for the given speed.
+        """
+        if not self.max_rpm:
+            return 0.0
+        return 511.0 * rpm / self.max_rpm
+
+    def step(self, now: float = None) -> int:
+        """
+        Run one control update.
+
+        Args:
+            now (float, optional): Time of the update on `clock`. Default is the current time.
+
+        Returns:
+            int: The duty command written (0-511).
+        """
+        if now is None:
+            now = self.clock()
+        dt = 0.0 if self._last_tick is None else now - self._last_tick
+        self._last_tick = now
+
+        self.rpm = decode.motor_speed(self.driver.read(MLAB_DRV10987.MotorSpeed)) * 60 / self.pole_pairs
+        error = self.target_rpm - self.rpm
+        base = self.feedforward(self.target_rpm) + self.kp * error
+        integral = self.integral + self.ki * error * dt
+        output = base + integral
+        if output > 511.0:
+            output = 511.0
+            if error < 0:
+                self.integral = integral
+        elif output < 0.0:
+            output = 0.0
+            if error > 0:
+                self.integral = integral
+        else:
+            self.integral = integral
+
+        self.command = int(output + 0.5)
+        self.driver.set_SpeedCtrl_raw(self.command)
+        self.ticks += 1
+        return self.command
+
+    def run(self, rate: float = 100.0, duration: float = None, ticks: int = None) -> None:
+        """
+        Run the control loop at a fixed rate, see Scheduler.
+
+        The first update of every run starts a new integration interval, so an idle gap since
+        the previous run does not wind up the integral. The integral itself is kept, which
+        resumes the regulation without a bump; call `reset` to start from zero.
+
+        Args:
+            rate (float, optional): Update rate in Hz. Default is 100 Hz.
+            duration (float, optional): Stop after this many seconds. Default is no limit.
+            ticks (int, optional): Stop after this many updates. Default is no limit.
+        """
+        self._last_tick = None
+        scheduler = Scheduler(self.clock, self.sleep)
+
+        def tick():
+            self.step()
+            if ticks is not None and self.task.runs + 1 >= ticks:
+                scheduler.stop()
+
+        self.task = scheduler.add(tick, rate, name="SpeedRegulator")
+        scheduler.run(duration)
+
+    def stats(self) -> dict:
+        """
+        Timing statistics of the last `run`.
+
+        Returns:
+            dict: Task.stats() of the control loop, "runs" is also reported as "ticks".
+        """
+        if self.task is None:
+            return {}
+        stats = self.task.stats()
+        stats["ticks"] = stats["runs"]
+        return stats
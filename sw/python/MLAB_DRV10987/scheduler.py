@@ -0,0 +1,191 @@
+#! /usr/bin/python3
+
+import math
+import time
+
+
+class Task():
+    """
+    A function called periodically by the Scheduler, with its timing counters.
+
+    Attributes:
+        runs (int): Number of calls.
+        late (int): Calls that started more than `tolerance` after their deadline.
+        overruns (int): Calls that finished after the deadline of the next call.
+        skipped (int): Deadlines dropped because the task fell a whole period or more behind.
+    """
+
+    def __init__(self, func, rate: float, name: str = None, phase: float = 0.0, tolerance: float = None) -> None:
+        """
+        Args:
+            func (callable): Called without arguments.
+            rate (float): Call rate in Hz.
+            name (str, optional): Name used in the statistics. Default is the name of `func`.
+            phase (float, optional): Offset of the first deadline from the start of the scheduler in seconds.
+            tolerance (float, optional): Lateness counted as on time, in seconds. Default is 10% of the period.
+        """
+        self.func = func
+        self.period = 1.0 / rate
+        self.name = name or getattr(func, "__name__", repr(func))
+        self.phase = phase
+        self.tolerance = self.period / 10 if tolerance is None else tolerance
+        self.deadline = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Zero the counters and statistics.
+        """
+        self.runs = 0
+        self.late = 0
+        self.overruns = 0
+        self.skipped = 0
+        self._last_start = None
+        self._period_count = 0
+        self._period_mean = 0.0
+        self._period_m2 = 0.0
+        self._period_min = math.inf
+        self._period_max = 0.0
+        self._work_max = 0.0
+
+    def _run(self, now: float, clock) -> None:
+        if now - self.deadline > self.tolerance:
+            self.late += 1
+        if self._last_start is not None:
+            # Welford's running mean and variance of the period, no per-call storage
+            period = now - self._last_start
+            self._period_count += 1
+            delta = period - self._period_mean
+            self._period_mean += delta / self._period_count
+            self._period_m2 += delta * (period - self._period_mean)
+            self._period_min = min(self._period_min, period)
+            self._period_max = max(self._period_max, period)
+        self._last_start = now
+
+        self.func()
+        self.runs += 1
+        end = clock()
+        self._work_max = max(self._work_max, end - now)
+
+        # The deadlines stay on the grid start + phase + n * period, so the rate does not drift
+        self.deadline += self.period
+        behind = end - self.deadline
+        if behind > 0:
+            self.overruns += 1
+            if behind >= self.period:
+                missed = int(behind // self.period)
+                self.skipped += missed
+                self.deadline += missed * self.period
+
+    def stats(self) -> dict:
+        """
+        Timing statistics of the task.
+
+        Returns:
+            dict: "runs", "late", "overruns", "skipped", "rate" (mean rate in Hz), "period_mean",
+                "period_min", "period_max", "jitter" (standard deviation of the period) and
+                "work_max" (longest call) in seconds.
+        """
+        count = self._period_count
+        return {
+            "runs": self.runs,
+            "late": self.late,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "rate": 1.0 / self._period_mean if count else 0.0,
+            "period_mean": self._period_mean,
+            "period_min": self._period_min if count else 0.0,
+            "period_max": self._period_max,
+            "jitter": math.sqrt(self._period_m2 / count) if count else 0.0,
+            "work_max": self._work_max,
+        }
+
+
+class Scheduler():
+    """
+    Runs periodic tasks at absolute deadlines of a monotonic clock.
+
+    Every task has its own rate and its deadlines are start + phase + n * period, so time spent
+    on the bus never accumulates into drift. Tasks run one at a time in deadline order in the
+    calling thread. When a task cannot keep up, the missed deadlines are counted and dropped
+    instead of being run as a burst, so the effective rate of every task stays visible in its
+    counters rather than degrading silently.
+
+    Example usage:
+    scheduler = Scheduler()
+    scheduler.add(poll_status, rate=10)
+    scheduler.add(update_speed, rate=100)
+    scheduler.run(duration=60)
+    print(scheduler.stats())
+    """
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep) -> None:
+        """
+        Args:
+            clock (callable, optional): Monotonic clock in seconds. Default is time.monotonic.
+            sleep (callable, optional): Sleep function matching `clock`. Default is time.sleep.
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.tasks = []
+        self._running = False
+
+    def add(self, func, rate: float, name: str = None, phase: float = 0.0, tolerance: float = None) -> Task:
+        """
+        Register a periodic task, see Task for the arguments.
+
+        Returns:
+            Task: The task, holding its counters.
+        """
+        task = Task(func, rate, name, phase, tolerance)
+        if self._running:
+            task.deadline = self.clock() + phase
+        self.tasks.append(task)
+        return task
+
+    def remove(self, task: Task) -> None:
+        """
+        Unregister a task.
+        """
+        self.tasks.remove(task)
+
+    def stop(self) -> None:
+        """
+        Make `run` return, e.g. from within a task.
+        """
+        self._running = False
+
+    def run(self, duration: float = None) -> None:
+        """
+        Run the tasks until `stop` is called, the duration elapses or no task is left.
+
+        The counters and statistics of the tasks accumulate over repeated runs, the time between
+        the runs is not counted as a period.
+
+        Args:
+            duration (float, optional): Run time in seconds. Default is no limit.
+        """
+        start = self.clock()
+        for task in self.tasks:
+            task.deadline = start + task.phase
+            # The gap since a previous run is not a period of the task
+            task._last_start = None
+        self._running = True
+        try:
+            while self._running and self.tasks:
+                task = min(self.tasks, key=lambda task: task.deadline)
+                if duration is not None and task.deadline - start >= duration:
+                    break
+                now = self.clock()
+                if task.deadline > now:
+                    self.sleep(task.deadline - now)
+                    now = self.clock()
+                task._run(now, self.clock)
+        finally:
+            self._running = False
+
+    def stats(self) -> dict:
+        """
+        Return the statistics of all tasks, task name -> Task.stats().
+        """
+        return {task.name: task.stats() for task in self.tasks}
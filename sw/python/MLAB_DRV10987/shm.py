@@ -0,0 +1,362 @@
+#! /usr/bin/python3
+
+"""
+Status telemetry shared between local processes through shared memory.
+
+Only one process can own the bus of a driver. TelemetryPublisher runs in that process, polls
+the status registers of its drivers and writes the raw words into a fixed-layout
+multiprocessing.shared_memory segment. Any number of processes attach a TelemetryClient and
+read the latest snapshot without bus transactions, locks or copies of the segment.
+
+Segment layout (little-endian):
+    header: magic "DRVSHM01", number of slots (uint16), number of registers (uint16),
+            generation (uint64, completed poll cycles), register addresses (uint8 each),
+            padded to 8 bytes
+    slot:   sequence (uint64), timestamp (float64), errno of the last poll (int32, 0 on
+            success), padding, raw register words (uint16 each), padded to 8 bytes
+
+Every slot is guarded by a seqlock: the publisher makes the sequence odd before it writes the
+slot and even again afterwards. A reader copies the slot and accepts it when the sequence was
+even and unchanged around the copy, and retries otherwise.
+
+Example usage:
+publisher = TelemetryPublisher([drv], name="drv10987", rate=50)
+publisher.start()
+# In another process
+client = TelemetryClient("drv10987")
+client.read_status_registers(fields=["MotorSpeed", "FaultFlags"])
+
+Daemon mode:
+python -m MLAB_DRV10987.shm --bus 1 --name drv10987 --rate 50
+"""
+
+import argparse
+import errno
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+from . import decode
+from .driver import MLAB_DRV10987
+from .scheduler import Scheduler
+
+SHM_MAGIC = b"DRVSHM01"
+_HEADER = struct.Struct("<8sHHQ")  # magic, slots, registers, generation
+_GENERATION_OFFSET = 12
+_SLOT_HEADER = struct.Struct("<QdiI")  # sequence, timestamp, errno, padding
+
+# Names of the segments created by publishers of this process, their resource tracker entries
+# belong to the publisher
+_published = set()
+
+
+def _align(size: int) -> int:
+    return size + (-size % 8)
+
+
+def _unregister(shm: shared_memory.SharedMemory) -> None:
+    """
+    Stop the resource tracker of this process from unlinking a segment it did not create when
+    the process exits. Python < 3.13 registers attached segments too. Segments of a publisher
+    in this process keep their entry, which the publisher's unlink removes.
+    """
+    if shm.name in _published:
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class _Layout():
+    """
+    Offsets of the parts of a telemetry segment.
+    """
+
+    def __init__(self, slots: int, registers) -> None:
+        self.slots = slots
+        self.registers = tuple(registers)
+        self.words = struct.Struct("<" + "H" * len(self.registers))
+        self.header_size = _align(_HEADER.size + len(self.registers))
+        self.slot_size = _align(_SLOT_HEADER.size + self.words.size)
+        self.size = self.header_size + self.slot_size * slots
+
+    def slot(self, index: int) -> int:
+        if not 0 <= index < self.slots:
+            raise IndexError(f"Slot {index} is out of range 0-{self.slots - 1}")
+        return self.header_size + self.slot_size * index
+
+
+class TelemetryPublisher():
+    """
+    Polls drivers and publishes their status register words in a shared memory segment.
+
+    Slot n holds the status of drivers[n]. Each poll reads the registers of one driver in a
+    single `read_registers` call. A failed poll keeps the last words in the slot and stores the
+    errno, so clients can tell stale data from live data.
+    """
+
+    def __init__(self, drivers, name: str = None, rate: float = 10.0, registers=MLAB_DRV10987.STATUS_REGISTERS,
+                 clock=time.time) -> None:
+        """
+        Args:
+            drivers (iterable): The drivers to poll, in slot order.
+            name (str, optional): Name of the shared memory segment. Default is a random name, see `name`.
+            rate (float, optional): Poll cycles per second in `run` and `start`. Default is 10 Hz.
+            registers (iterable, optional): Registers to publish. Default is all status registers.
+            clock (callable, optional): Timestamp source of the snapshots. Default is time.time.
+        """
+        self.drivers = list(drivers)
+        self.rate = rate
+        self.clock = clock
+        self.layout = _Layout(len(self.drivers), registers)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=self.layout.size)
+        _published.add(self.shm.name)
+        self.generation = 0
+        self.errors = 0
+        self._sequences = [0] * len(self.drivers)
+        self._stopping = threading.Event()
+        self._thread = None
+
+        buf = self.shm.buf
+        _HEADER.pack_into(buf, 0, SHM_MAGIC, self.layout.slots, len(self.layout.registers), 0)
+        buf[_HEADER.size:_HEADER.size + len(self.layout.registers)] = bytes(self.layout.registers)
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the shared memory segment, to be passed to TelemetryClient.
+        """
+        return self.shm.name
+
+    def _publish(self, index: int, timestamp: float, error: int, words) -> None:
+        buf = self.shm.buf
+        offset = self.layout.slot(index)
+        sequence = self._sequences[index] + 1
+        struct.pack_into("<Q", buf, offset, sequence)
+        if words is None:
+            struct.pack_into("<i", buf, offset + 16, error)
+        else:
+            _SLOT_HEADER.pack_into(buf, offset, sequence, timestamp, error, 0)
+            self.layout.words.pack_into(buf, offset + _SLOT_HEADER.size, *words)
+        sequence += 1
+        struct.pack_into("<Q", buf, offset, sequence)
+        self._sequences[index] = sequence
+
+    def poll(self) -> int:
+        """
+        Read the status registers of all drivers once and publish them.
+
+        Returns:
+            int: The number of drivers that failed to respond.
+        """
+        failed = 0
+        for index, driver in enumerate(self.drivers):
+            try:
+                words = driver.read_registers(self.layout.registers)
+            except OSError as e:
+                self._publish(index, 0.0, e.errno or errno.EIO, None)
+                failed += 1
+            else:
+                self._publish(index, self.clock(), 0, words)
+        self.errors += failed
+        self.generation += 1
+        struct.pack_into("<Q", self.shm.buf, _GENERATION_OFFSET, self.generation)
+        return failed
+
+    def _run(self, duration: float = None) -> dict:
+        scheduler = Scheduler()
+
+        def poll():
+            if self._stopping.is_set():
+                scheduler.stop()
+            else:
+                self.poll()
+
+        task = scheduler.add(poll, self.rate, name="TelemetryPublisher")
+        scheduler.run(duration)
+        return task.stats()
+
+    def run(self, duration: float = None) -> dict:
+        """
+        Poll at `rate` until the duration elapses or `stop` is called.
+
+        Returns:
+            dict: Timing statistics of the polling, see Task.stats.
+        """
+        self._stopping.clear()
+        return self._run(duration)
+
+    def start(self) -> None:
+        """
+        Run the polling in a daemon thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="TelemetryPublisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the polling started by `run` or `start`.
+        """
+        self._stopping.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """
+        Stop polling and remove the shared memory segment. Attached clients keep their mapping.
+        """
+        self.stop()
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        _published.discard(self.shm.name)
+
+    def __enter__(self) -> "TelemetryPublisher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TelemetryClient():
+    """
+    Read-only view of the telemetry published by a TelemetryPublisher, in any local process.
+    """
+
+    def __init__(self, name: str, retries: int = 1000) -> None:
+        """
+        Args:
+            name (str): Name of the shared memory segment, see TelemetryPublisher.name.
+            retries (int, optional): Attempts to read a consistent slot while it is being written. Default is 1000.
+
+        Raises:
+            FileNotFoundError: No segment of that name exists.
+            ValueError: The segment is not a telemetry segment.
+        """
+        if sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            _unregister(self.shm)
+        self.retries = retries
+        magic, slots, count, _ = _HEADER.unpack_from(self.shm.buf, 0)
+        if magic != SHM_MAGIC:
+            self.shm.close()
+            raise ValueError(f"{name} is not a DRV10987 telemetry segment")
+        self.layout = _Layout(slots, bytes(self.shm.buf[_HEADER.size:_HEADER.size + count]))
+        self._fields = {field: regs for field, regs in MLAB_DRV10987.STATUS_FIELDS.items()
+                        if all(reg in self.layout.registers for reg in regs)}
+
+    def __len__(self) -> int:
+        return self.layout.slots
+
+    @property
+    def generation(self) -> int:
+        """
+        Number of completed poll cycles of the publisher.
+        """
+        return struct.unpack_from("<Q", self.shm.buf, _GENERATION_OFFSET)[0]
+
+    def snapshot(self, index: int = 0) -> tuple:
+        """
+        Read the raw register words of one slot.
+
+        Args:
+            index (int, optional): Slot number, the index of the driver in the publisher. Default is 0.
+
+        Returns:
+            tuple: (timestamp, words, error), where `words` maps register addresses to raw values
+                and `error` is the errno of the last poll (0 when it succeeded). The timestamp
+                belongs to the last successful poll.
+
+        Raises:
+            OSError: ENODATA when the driver was never read successfully.
+            TimeoutError: The slot did not become consistent within `retries` attempts.
+        """
+        buf = self.shm.buf
+        offset = self.layout.slot(index)
+        words_offset = offset + _SLOT_HEADER.size
+        for _ in range(self.retries):
+            sequence, timestamp, error, _ = _SLOT_HEADER.unpack_from(buf, offset)
+            if sequence & 1:
+                continue
+            words = self.layout.words.unpack_from(buf, words_offset)
+            if struct.unpack_from("<Q", buf, offset)[0] == sequence:
+                break
+        else:
+            raise TimeoutError(f"Telemetry slot {index} is not consistent")
+        if not timestamp:
+            raise OSError(errno.ENODATA, f"No telemetry of driver {index} published yet")
+        return timestamp, dict(zip(self.layout.registers, words)), error
+
+    def read_status_registers(self, index: int = 0, fields=None) -> dict:
+        """
+        Return the published status of a driver, see MLAB_DRV10987.read_status_registers.
+
+        Args:
+            index (int, optional): Slot number, the index of the driver in the publisher. Default is 0.
+            fields (iterable, optional): Names of the status fields. Default is all fields the published registers allow.
+
+        Returns:
+            dict: Dictionary with the structure of MLAB_DRV10987.read_status_registers.
+        """
+        if fields is None:
+            fields = self._fields
+        else:
+            for field in fields:
+                if field not in self._fields:
+                    raise ValueError(f"Unknown or unpublished status field: {field}")
+        return decode.decode_status(self.snapshot(index)[1], fields)
+
+    def age(self, index: int = 0, clock=time.time) -> float:
+        """
+        Seconds since the last successful poll of a driver, on the publisher's clock.
+        """
+        return clock() - self.snapshot(index)[0]
+
+    def close(self) -> None:
+        """
+        Detach from the segment.
+        """
+        self.shm.close()
+
+    def __enter__(self) -> "TelemetryClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Publish DRV10987 status telemetry in shared memory.")
+    parser.add_argument("--bus", type=int, default=1, help="I2C bus number (default: 1)")
+    parser.add_argument("--addr", type=lambda value: int(value, 0), action="append",
+                        help=f"device address, repeatable (default: 0x{MLAB_DRV10987.DRVADDR:02x})")
+    parser.add_argument("--name", default="drv10987", help="shared memory name (default: drv10987)")
+    parser.add_argument("--rate", type=float, default=10.0, help="poll cycles per second (default: 10)")
+    args = parser.parse_args(argv)
+
+    # The daemon only reads, the configuration and the motor state are left untouched
+    drivers = [MLAB_DRV10987(args.bus, addr, initialize=False, enable_motor=False, shadow=False)
+               for addr in args.addr or [MLAB_DRV10987.DRVADDR]]
+    with TelemetryPublisher(drivers, name=args.name, rate=args.rate) as publisher:
+        print(f"Publishing {len(drivers)} drivers at {args.rate} Hz in shared memory {publisher.name}")
+        try:
+            publisher.run()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+#! /usr/bin/python3
+
+"""
+In-process simulation of DRV10987 devices on an SMBus.
+
+SimulatedSMBus implements the subset of the smbus2.SMBus interface used by MLAB_DRV10987, so
+it plugs into `MLAB_DRV10987(bus=SimulatedSMBus())` unchanged. It counts transactions and
+bytes and charges a configurable latency per transaction, either by really sleeping or by
+advancing a virtual clock, which makes throughput and latency measurements deterministic.
+"""
+
+import errno
+import math
+import random
+import time
+
+from . import decode
+from . import registers
+
+# Latency of one transaction: (fixed cost in s, cost per transferred byte in s).
+# A byte takes 9 bit times, i.e. 90 us at 100 kHz. The USB bridge adds a USB round trip.
+LATENCY_PROFILES = {
+    "none": (0.0, 0.0),
+    "i2c-dev": (50e-6, 90e-6),
+    "usbi2c01": (1e-3, 90e-6),
+}
+
+# Power-up content of the CONFIG registers, the values written by fw/demo/demo.ino
+FACTORY_EEPROM = {
+    0x90: 0xc7bb,
+    0x91: 0x183b,
+    0x92: 0x00ff,
+    0x93: 0x58ff,
+    0x94: 0x6010,
+    0x95: 0x3f93,
+    0x96: 0x480a,
+}
+
+DEVICE_ID = 0x0100
+
+# Start-up sequence of the model with startup=True: align time per CONFIG4.AlginTime in s,
+# open-loop current per CONFIG3.OpLCurr in A and its ramp rate per CONFIG3.OpLCurrRt in A/s
+ALIGN_TIMES = (5.3, 2.7, 1.3, 0.67, 0.33, 0.16, 0.08, 0.04)
+OPEN_LOOP_CURRENTS = (0.2, 0.4, 0.8, 1.6)
+OPEN_LOOP_CURRENT_RATES = (6.0, 3.0, 1.5, 0.7, 0.34, 0.2, 0.1, 0.05)
+# Open-loop acceleration per StAccel step in Hz/s, for AccelRangeSel 0 and 1
+ACCEL_STEPS = (0.5, 5.0)
+# Duration of the initial speed detection in s
+ISD_TIME = 0.05
+
+
+class SimulatedDRV10987():
+    """
+    Model of the DRV10987 register file and a simple motor.
+
+    The CONFIG registers take effect only in shadow mode (ShadowRegEn in EepromProgramming5),
+    otherwise the device runs from its EEPROM content. The EEPROM is programmable after writing
+    the access code, with individual or mass access; every write keeps eeReady low for
+    `eeprom_write_time` and is counted in `eeprom_writes`. MTR_DIS in EECTRL disables the output.
+    With SpeedCtrl override set, the speed approaches duty * max_speed with a first-order lag,
+    and current, supply voltage and BEMF registers follow from the model parameters.
+
+    Link faults are modeled by `nak_rate`, the probability that a transaction fails with
+    EREMOTEIO, and `online`, which makes the device unreachable when False.
+
+    With `startup`, a start from standstill runs through the start-up sequence configured in
+    CONFIG3 and CONFIG4 before the first-order lag applies: initial speed detection (ISDEn),
+    alignment (AlginTime) while the open-loop current ramps up (OpLCurr, OpLCurrRt), and the
+    open-loop acceleration (StAccel, AccelRangeSel) up to the closed-loop threshold (Op2ClsThr).
+    The rotor loses synchronization (Lock1) when the alignment is shorter than
+    `align_settle` / current or the acceleration exceeds `accel_per_amp` * current. A hand-over
+    to closed loop with a BEMF below `min_bemf` fails with Lock5, an open-loop phase longer than
+    `open_loop_timeout` with Lock4. A locked motor coasts until the speed command is zeroed.
+    """
+
+    def __init__(self, supply_voltage: float = 12.0, max_speed: float = 250.0, time_constant: float = 0.3,
+                 kt: float = 0.03, idle_current: float = 0.05, load_current: float = 0.8,
+                 eeprom_write_time: float = 0.01, startup: bool = False, accel_per_amp: float = 200.0,
+                 align_settle: float = 0.05, min_bemf: float = 0.3, open_loop_timeout: float = 5.0) -> None:
+        """
+        Args:
+            supply_voltage (float, optional): Supply voltage in V. Default is 12 V.
+            max_speed (float, optional): Electrical speed at 100% duty in Hz. Default is 250 Hz.
+            time_constant (float, optional): Mechanical time constant in s. Default is 0.3 s.
+            kt (float, optional): BEMF constant in V/Hz. Default is 0.03 V/Hz.
+            idle_current (float, optional): Current of the running motor without load in A.
+            load_current (float, optional): Additional current at full speed in A.
+            eeprom_write_time (float, optional): Duration of one EEPROM write operation in s. Default is 10 ms.
+            startup (bool, optional): Model the start-up sequence. Default is False, the motor follows the lag right away.
+            accel_per_amp (float, optional): Open-loop acceleration the rotor follows per A of current in Hz/s.
+            align_settle (float, optional): Alignment time times current needed to align the rotor in s*A.
+            min_bemf (float, optional): BEMF needed for the hand-over to closed loop in V.
+            open_loop_timeout (float, optional): Maximum duration of the open-loop acceleration in s.
+        """
+        self.supply_voltage = supply_voltage
+        self.max_speed = max_speed
+        self.time_constant = time_constant
+        self.kt = kt
+        self.idle_current = idle_current
+        self.load_current = load_current
+        self.eeprom_write_time = eeprom_write_time
+        self.startup = startup
+        self.accel_per_amp = accel_per_amp
+        self.align_settle = align_settle
+        self.min_bemf = min_bemf
+        self.open_loop_timeout = open_loop_timeout
+
+        self.eeprom = dict(FACTORY_EEPROM)
+        self.eeprom_writes = 0
+        self.busy_until = 0.0
+        self._access_code = []
+        self.registers = {}
+        self.faults = 0
+        self.speed = 0.0
+        self._time = None
+        # Link faults: probability that a transaction is not acknowledged, device unreachable
+        self.nak_rate = 0.0
+        self.online = True
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Power-on reset: reload the CONFIG registers from the EEPROM and clear the runtime state.
+        """
+        self.registers = {
+            0x30: 0x0000,  # SpeedCtrl
+            0x35: 0x0000,  # EepromProgramming5
+            0x60: 0x0000,  # EECTRL
+        }
+        self.registers.update(self.eeprom)
+        self.faults = 0
+        self._access_code = []
+        # Start-up state: "stopped", "isd", "align", "open", "closed" or "locked"
+        self.phase = "stopped"
+        self.phase_time = 0.0
+        self._drive_time = 0.0
+        self._sequence = None
+
+    @property
+    def shadow_mode(self) -> bool:
+        return bool(self.registers[0x35] & (1 << 12))
+
+    @property
+    def enabled(self) -> bool:
+        return not self.registers[0x60] & 0x8000
+
+    @property
+    def duty(self) -> float:
+        """
+        Duty cycle commanded over I2C, 0.0-1.0.
+        """
+        speed_ctrl = self.registers[0x30]
+        if not speed_ctrl & 0x8000:
+            return 0.0
+        return (speed_ctrl & 0x1ff) / 511.0
+
+    def config(self, reg: int) -> int:
+        """
+        Return the configuration word in effect: the register in shadow mode, the EEPROM otherwise.
+        """
+        if self.shadow_mode:
+            return self.registers[reg]
+        return self.eeprom[reg]
+
+    def inject_fault(self, name: str) -> None:
+        """
+        Set a fault flag, e.g. "OverCurr" or "Lock0".
+        """
+        self.faults |= 1 << decode.FAULT_BITS[name]
+
+    @property
+    def eeprom_unlocked(self) -> bool:
+        return self._access_code[-2:] == [0x0000, 0xC0DE]
+
+    def _eeprom_write(self, words: dict) -> None:
+        self.eeprom.update(words)
+        self.eeprom_writes += len(words)
+        self.busy_until = (self._time or 0.0) + self.eeprom_write_time
+
+    def update(self, now: float) -> None:
+        """
+        Advance the motor model to time `now`.
+        """
+        if self._time is None:
+            self._time = now
+        dt = now - self._time
+        self._time = now
+        target = self.duty * self.max_speed * self.supply_voltage / 12.0 if self.enabled else 0.0
+        if self.startup:
+            # Also without elapsed time, a zero command ends the start-up sequence or a lock
+            self._run_startup(max(dt, 0.0), target)
+            return
+        if dt <= 0:
+            return
+        self._lag(dt, target)
+
+    def _lag(self, dt: float, target: float) -> None:
+        self.speed += (target - self.speed) * (1.0 - math.exp(-dt / self.time_constant))
+        if self.speed < 0.5 and target == 0.0:
+            self.speed = 0.0
+
+    def _lock(self, name: str) -> None:
+        self.inject_fault(name)
+        self.phase = "locked"
+
+    def _open_loop_current(self) -> float:
+        level, rate = self._sequence[1:3]
+        return min(level, rate * self._drive_time)
+
+    def _run_startup(self, dt: float, target: float) -> None:
+        if target == 0.0:
+            self.phase = "stopped"
+            self._lag(dt, 0.0)
+            return
+        while dt > 0:
+            if self.phase == "closed":
+                self._lag(dt, target)
+                return
+            if self.phase == "locked":
+                self._lag(dt, 0.0)
+                return
+            if self.phase == "stopped":
+                config3 = registers.CONFIG3.unpack(self.config(0x92))
+                config4 = registers.CONFIG4.unpack(self.config(0x93))
+                self._sequence = (ALIGN_TIMES[config4["AlginTime"]],
+                                  OPEN_LOOP_CURRENTS[config3["OpLCurr"]],
+                                  OPEN_LOOP_CURRENT_RATES[config3["OpLCurrRt"]],
+                                  (config4["StAccel"] + 1) * ACCEL_STEPS[config4["AccelRangeSel"]],
+                                  registers.op2cls_threshold(config4["Op2ClsThr"]))
+                self.phase = "isd" if config3["ISDEn"] else "align"
+                self.phase_time = 0.0
+                self._drive_time = 0.0
+
+            # The sequence is integrated in steps of at most 1 ms
+            h = min(dt, 1e-3)
+            dt -= h
+            self.phase_time += h
+            align_time, _, _, accel, threshold = self._sequence
+            if self.phase == "isd":
+                self._lag(h, 0.0)
+                if self.phase_time >= ISD_TIME:
+                    # A rotor that still spins fast enough is caught in closed loop
+                    self.phase = "closed" if self.kt * self.speed >= self.min_bemf else "align"
+                    self.phase_time = 0.0
+            elif self.phase == "align":
+                self.speed = 0.0
+                self._drive_time += h
+                if self.phase_time >= align_time:
+                    if align_time * self._open_loop_current() < self.align_settle:
+                        self._lock("Lock1")
+                    else:
+                        self.phase = "open"
+                        self.phase_time = 0.0
+            elif self.phase == "open":
+                self._drive_time += h
+                if accel > self.accel_per_amp * self._open_loop_current():
+                    self._lock("Lock1")
+                    continue
+                self.speed += accel * h
+                if self.speed >= threshold:
+                    if self.kt * self.speed < self.min_bemf:
+                        self._lock("Lock5")
+                    else:
+                        self.phase = "closed"
+                elif self.phase_time > self.open_loop_timeout:
+                    self._lock("Lock4")
+
+    def current(self) -> float:
+        if self.speed == 0.0:
+            return 0.0
+        return self.idle_current + self.load_current * (self.speed / self.max_speed) ** 2
+
+    def read_register(self, reg: int) -> int:
+        if reg == 0x00:
+            value = self.faults
+        elif reg == 0x01:
+            value = round(self.speed * 80)
+        elif reg == 0x02:
+            value = round(1e6 / self.speed / 10) if self.speed else 0xffff
+        elif reg == 0x03:
+            value = round(self.kt * 2180) if self.speed else 0
+        elif reg == 0x04:
+            value = round(self.current() * 512)
+        elif reg == 0x05:
+            value = 1 << 8 | round(self.supply_voltage * 255 / 30)
+        elif reg == 0x06:
+            duty = round(self.duty * 255) if self.enabled else 0
+            value = duty << 8 | duty
+        elif reg == 0x08:
+            value = DEVICE_ID
+        elif reg == 0x32:
+            value = int(self.eeprom_unlocked and (self._time or 0.0) >= self.busy_until)  # eeReady
+        else:
+            value = self.registers.get(reg, 0)
+        return min(max(value, 0), 0xffff)
+
+    def write_register(self, reg: int, value: int) -> None:
+        value &= 0xffff
+        if reg == 0x00:
+            self.faults &= ~value
+        elif reg == 0x31:
+            self._access_code = self._access_code[-1:] + [value]
+        elif reg == 0x33:
+            self.registers[0x33] = value
+            self.registers[0x34] = self.eeprom.get(value, 0)
+        elif reg == 0x35:
+            self.registers[0x35] = value & (1 << 12)
+            if not self.eeprom_unlocked:
+                return
+            if value & 0b0110 == 0b0110:  # eeMassAccess + eeMassWrite
+                self._eeprom_write({address: self.registers[address] for address in FACTORY_EEPROM})
+            elif value & 0b0001:  # eeWrite
+                self._eeprom_write({self.registers.get(0x33, 0): self.registers.get(0x34, 0)})
+            if value & 0b1000:  # eeRefresh
+                self.registers.update(self.eeprom)
+        else:
+            self.registers[reg] = value
+
+
+class SimulatedTCA9548A():
+    """
+    Model of a TCA9548A 8-channel I2C multiplexer.
+
+    The control register selects the enabled downstream channels, one bit per channel. Devices
+    behind enabled channels respond on the bus like directly connected ones.
+    """
+
+    def __init__(self, channels: dict = None) -> None:
+        """
+        Args:
+            channels (dict, optional): Channel number -> {address: SimulatedDRV10987}.
+        """
+        self.channels = channels or {}
+        self.control = 0
+        self.writes = 0
+
+    def devices(self, addr: int) -> list:
+        return [devices[addr] for channel, devices in self.channels.items()
+                if self.control >> channel & 1 and addr in devices]
+
+
+class SimulatedSMBus():
+    """
+    Fake smbus2.SMBus routing transactions to simulated devices by address.
+
+    Example usage:
+    bus = SimulatedSMBus(latency="usbi2c01")
+    drv = MLAB_DRV10987(bus)
+    drv.read_status_registers()
+    print(bus.transactions, bus.bytes_read, bus.busy_time)
+    """
+
+    def __init__(self, devices: dict = None, latency="none", realtime: bool = False, seed: int = 0, muxes: dict = None) -> None:
+        """
+        Args:
+            devices (dict, optional): Address -> SimulatedDRV10987. Default is one device at 0b1010010
+                unless `muxes` are given.
+            latency (str or tuple, optional): Key of LATENCY_PROFILES or a (fixed, per byte) tuple in seconds. Default is "none".
+            realtime (bool, optional): Sleep for the latency instead of advancing the virtual clock. Default is False.
+            seed (int, optional): Seed of the random NAKs, see SimulatedDRV10987.nak_rate. Default is 0.
+            muxes (dict, optional): Address -> SimulatedTCA9548A.
+        """
+        if devices is None:
+            devices = {} if muxes else {0b1010010: SimulatedDRV10987()}
+        self.devices = devices
+        self.muxes = muxes or {}
+        if isinstance(latency, str):
+            latency = LATENCY_PROFILES[latency]
+        self.base_latency, self.byte_latency = latency
+        self.realtime = realtime
+        self.now = 0.0
+        self.random = random.Random(seed)
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        """
+        Zero the transaction, byte and busy-time counters.
+        """
+        self.transactions = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.busy_time = 0.0
+
+    def time(self) -> float:
+        """
+        Current time of the simulation in seconds.
+        """
+        if self.realtime:
+            return time.monotonic()
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """
+        Let time pass: move the virtual clock forward, or sleep in realtime mode.
+        """
+        if self.realtime:
+            time.sleep(seconds)
+        else:
+            self.now += seconds
+
+    def _transaction(self, written: int, read: int) -> None:
+        self.transactions += 1
+        self.bytes_written += written
+        self.bytes_read += read
+        latency = self.base_latency + self.byte_latency * (written + read)
+        self.busy_time += latency
+        if latency:
+            self.advance(latency)
+
+    def _device(self, addr: int) -> SimulatedDRV10987:
+        device = self.devices.get(addr)
+        if device is None and self.muxes:
+            found = [device for mux in self.muxes.values() for device in mux.devices(addr)]
+            if len(found) > 1:
+                raise OSError(errno.EIO, "Address collision behind the multiplexer")
+            device = found[0] if found else None
+        if device is None or not device.online or (device.nak_rate and self.random.random() < device.nak_rate):
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        if not self.realtime and device.busy_until > self.now:
+            # On the virtual clock the host would poll eeReady until the EEPROM finishes
+            self.now = device.busy_until
+        device.update(self.time())
+        return device
+
+    def write_byte(self, i2c_addr: int, value: int, force=None) -> None:
+        self._transaction(2, 0)
+        mux = self.muxes.get(i2c_addr)
+        if mux is None:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        mux.control = value & 0xff
+        mux.writes += 1
+
+    def read_byte(self, i2c_addr: int, force=None) -> int:
+        self._transaction(1, 1)
+        mux = self.muxes.get(i2c_addr)
+        if mux is None:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        return mux.control
+
+    def read_i2c_block_data(self, i2c_addr: int, register: int, length: int, force=None) -> list:
+        self._transaction(3, length)
+        device = self._device(i2c_addr)
+        data = []
+        for n in range(0, length, 2):
+            value = device.read_register(register + n // 2)
+            data += [value >> 8, value & 0xff]
+        return data[:length]
+
+    def write_i2c_block_data(self, i2c_addr: int, register: int, data: list, force=None) -> None:
+        self._transaction(2 + len(data), 0)
+        device = self._device(i2c_addr)
+        for n in range(0, len(data) - 1, 2):
+            device.write_register(register + n // 2, data[n] << 8 | data[n + 1])
+
+    def i2c_rdwr(self, *i2c_msgs) -> None:
+        written = sum(1 + msg.len for msg in i2c_msgs if not msg.flags & 1)
+        read = sum(1 + msg.len for msg in i2c_msgs if msg.flags & 1)
+        self._transaction(written, read)
+        # One acknowledge check per device and transaction
+        devices = {addr: self._device(addr) for addr in {msg.addr for msg in i2c_msgs}}
+        pointer = 0
+        for msg in i2c_msgs:
+            device = devices[msg.addr]
+            if msg.flags & 1:
+                for n in range(0, msg.len, 2):
+                    value = device.read_register(pointer + n // 2)
+                    msg.buf[n] = bytes((value >> 8,))
+                    if n + 1 < msg.len:
+                        msg.buf[n + 1] = bytes((value & 0xff,))
+            else:
+                data = bytes(msg)
+                pointer = data[0]
+                for n in range(1, len(data) - 1, 2):
+                    device.write_register(pointer + n // 2, data[n] << 8 | data[n + 1])
+
+    def close(self) -> None:
+        pass
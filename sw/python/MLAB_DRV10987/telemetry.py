@@ -0,0 +1,258 @@
+#! /usr/bin/python3
+
+import struct
+import time
+
+from . import decode
+from .driver import MLAB_DRV10987
+from .scheduler import Scheduler
+
+# Names of the status registers used as column names of recordings
+REGISTER_NAMES = {
+    MLAB_DRV10987.FaultReg: "FaultReg",
+    MLAB_DRV10987.MotorSpeed: "MotorSpeed",
+    MLAB_DRV10987.MotorPeriod: "MotorPeriod",
+    MLAB_DRV10987.MotorXt: "MotorXt",
+    MLAB_DRV10987.MotorCurrent: "MotorCurrent",
+    MLAB_DRV10987.SupplyVoltage: "SupplyVoltage",
+    MLAB_DRV10987.SpeedCmd: "SpeedCmd",
+}
+
+FILE_MAGIC = b"DRVTLM01"
+_FILE_HEADER = struct.Struct("<8sHH")  # magic, header size, number of registers
+
+
+def _register_name(reg: int) -> str:
+    return REGISTER_NAMES.get(reg, f"reg_0x{reg:02x}")
+
+
+def record_dtype(registers):
+    """
+    Return the NumPy structured dtype of one recorded sample.
+
+    Args:
+        registers (iterable): Addresses of the recorded registers.
+
+    Returns:
+        numpy.dtype: Packed little-endian record with a float64 "timestamp" followed by one uint16 per register.
+    """
+    import numpy as np
+    return np.dtype([("timestamp", "<f8")] + [(_register_name(reg), "<u2") for reg in registers])
+
+
+def convert_records(records) -> dict:
+    """
+    Convert recorded raw register words to physical units, vectorized over all samples.
+
+    Args:
+        records (numpy.ndarray): Structured array of samples, see `record_dtype`.
+
+    Returns:
+        dict: Column name -> NumPy array. Contains "timestamp" and the fields of
+            MLAB_DRV10987.read_status_registers that can be computed from the recorded registers.
+            "FaultReg" is passed through as the raw register word.
+    """
+    import numpy as np
+    names = records.dtype.names
+    columns = {"timestamp": np.asarray(records["timestamp"])}
+    words = {reg: np.asarray(records[name]) for reg, name in REGISTER_NAMES.items() if name in names}
+    if "FaultReg" in names:
+        columns["FaultReg"] = words[MLAB_DRV10987.FaultReg]
+    fields = [field for field, regs in MLAB_DRV10987.STATUS_FIELDS.items()
+              if field != "FaultFlags" and all(reg in words for reg in regs)]
+    columns.update(decode.decode_status(words, fields))
+    return columns
+
+
+def load_recording(path: str):
+    """
+    Open a binary recording written by TelemetryRecorder as a read-only memory map.
+
+    Args:
+        path (str): Path to the recording.
+
+    Returns:
+        numpy.memmap: Structured array of samples, see `record_dtype`.
+    """
+    import numpy as np
+    with open(path, "rb") as f:
+        magic, header_size, count = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{path} is not a DRV10987 telemetry recording")
+        registers = list(f.read(count))
+    return np.memmap(path, dtype=record_dtype(registers), mode="r", offset=header_size)
+
+
+class TelemetryRecorder():
+    """
+    High-rate recorder of raw DRV10987 status register words.
+
+    Samples are packed into a preallocated ring buffer as fixed-size binary records (float64
+    timestamp followed by the 16-bit register words), so no per-sample dictionaries or objects
+    are kept. When a sink file is opened, the buffer is flushed to it in chunks and the file can
+    later be opened with `load_recording` without copying. Without a sink the oldest samples
+    are overwritten.
+
+    Conversion to physical units is done on demand for all buffered samples at once with NumPy.
+
+    Example usage:
+    rec = TelemetryRecorder(drv, capacity=100000)
+    rec.open_sink("telemetry.bin")
+    rec.record(rate=1000, duration=60)
+    rec.close()
+    columns = convert_records(load_recording("telemetry.bin"))
+    """
+
+    def __init__(self, driver: MLAB_DRV10987, capacity: int = 65536, registers=MLAB_DRV10987.STATUS_REGISTERS, flush_every: int = None, clock=time.time) -> None:
+        """
+        Initialize the recorder.
+
+        Args:
+            driver (MLAB_DRV10987): The driver to sample.
+            capacity (int, optional): Number of samples held in memory. Default is 65536.
+            registers (iterable, optional): Registers to sample. Default is all status registers.
+            flush_every (int, optional): Number of samples written to the sink per chunk. Default is half of the capacity.
+            clock (callable, optional): Timestamp source. Default is time.time.
+
+        Raises:
+            ValueError: If a register is listed twice or flush_every exceeds the capacity.
+        """
+        self.driver = driver
+        self.registers = tuple(registers)
+        if len(set(self.registers)) != len(self.registers):
+            raise ValueError("Every register can be recorded only once")
+        self.capacity = capacity
+        self.flush_every = flush_every or max(1, capacity // 2)
+        if self.flush_every > capacity:
+            raise ValueError("flush_every must not exceed the capacity")
+        self.clock = clock
+
+        self._record = struct.Struct("<d" + "H" * len(self.registers))
+        self._buffer = bytearray(self._record.size * capacity)
+        self.count = 0
+        self.flushed = 0
+        self.sink = None
+
+    def open_sink(self, path: str) -> None:
+        """
+        Start writing samples to a binary file. Samples already in the buffer are written first.
+
+        Args:
+            path (str): Path to the recording file, it is overwritten.
+        """
+        self.close_sink()
+        header_size = _FILE_HEADER.size + len(self.registers)
+        header_size += -header_size % 8
+        header = _FILE_HEADER.pack(FILE_MAGIC, header_size, len(self.registers)) + bytes(self.registers)
+        self.sink = open(path, "wb")
+        self.sink.write(header.ljust(header_size, b"\0"))
+        self.flushed = max(0, self.count - self.capacity)
+        self.flush()
+
+    def close_sink(self) -> None:
+        """
+        Flush the buffered samples and close the sink file.
+        """
+        if self.sink is not None:
+            self.flush()
+            self.sink.close()
+            self.sink = None
+
+    def close(self) -> None:
+        """
+        Flush and close the sink file.
+        """
+        self.close_sink()
+
+    def sample(self) -> None:
+        """
+        Read the registers once and store them in the ring buffer.
+        """
+        values = self.driver.read_registers(self.registers)
+        offset = (self.count % self.capacity) * self._record.size
+        self._record.pack_into(self._buffer, offset, self.clock(), *values)
+        self.count += 1
+        if self.sink is not None and self.count - self.flushed >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all samples not yet written to the sink file.
+        """
+        if self.sink is None:
+            return
+        size = self._record.size
+        view = memoryview(self._buffer)
+        while self.flushed < self.count:
+            start = self.flushed % self.capacity
+            end = min(self.capacity, start + self.count - self.flushed)
+            self.sink.write(view[start * size:end * size])
+            self.flushed += end - start
+        self.sink.flush()
+
+    def record(self, rate: float, duration: float = None, count: int = None) -> dict:
+        """
+        Sample at a fixed rate until the duration elapses or the number of samples is reached.
+
+        Args:
+            rate (float): Sampling rate in Hz.
+            duration (float, optional): Recording time in seconds.
+            count (int, optional): Number of samples to take.
+
+        Returns:
+            dict: Timing statistics of the sampling, see Task.stats.
+
+        Raises:
+            ValueError: If count is less than 1.
+        """
+        if count is not None and count < 1:
+            raise ValueError("count must be at least 1")
+        scheduler = Scheduler()
+
+        def sample():
+            self.sample()
+            if count is not None and task.runs + 1 >= count:
+                scheduler.stop()
+
+        task = scheduler.add(sample, rate, name="TelemetryRecorder")
+        scheduler.run(duration)
+        return task.stats()
+
+    def records(self):
+        """
+        Return the samples held in the ring buffer, oldest first.
+
+        Returns:
+            numpy.ndarray: Structured array of samples, see `record_dtype`.
+        """
+        import numpy as np
+        ring = np.frombuffer(self._buffer, dtype=record_dtype(self.registers))
+        if self.count <= self.capacity:
+            return ring[:self.count].copy()
+        head = self.count % self.capacity
+        return np.concatenate((ring[head:], ring[:head]))
+
+    def convert(self) -> dict:
+        """
+        Convert the buffered samples to physical units, see `convert_records`.
+        """
+        return convert_records(self.records())
+
+    def export_csv(self, path: str) -> None:
+        """
+        Write the buffered samples converted to physical units to a CSV file.
+        """
+        import csv
+        columns = self.convert()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns.keys())
+            writer.writerows(zip(*(column.tolist() for column in columns.values())))
+
+    def export_parquet(self, path: str) -> None:
+        """
+        Write the buffered samples converted to physical units to a Parquet file. Requires pyarrow.
+        """
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.table(self.convert()), path)
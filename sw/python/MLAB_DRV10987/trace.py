@@ -0,0 +1,262 @@
+#! /usr/bin/python3
+
+"""
+Opt-in instrumentation of the I2C transactions of MLAB_DRV10987.
+
+`attach` puts a TracedBus proxy between a driver and its bus. The proxy times every
+transaction and adds it to a BusStats collector: call, byte, error and retry counters and a
+latency histogram with fixed buckets, per operation, device address and register. Without an
+attached proxy the driver talks to the bus directly, so tracing costs nothing when disabled.
+
+Example usage:
+stats = attach(drv)
+drv.read_status_registers()
+print(stats.to_prometheus())
+detach(drv)
+"""
+
+import bisect
+import time
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is unbounded
+LATENCY_BUCKETS = (50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3)
+
+
+class _Series():
+    """
+    Counters of one (operation, address, register) combination.
+    """
+
+    __slots__ = ("calls", "errors", "retries", "bytes", "time", "buckets")
+
+    def __init__(self, buckets: int) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.time = 0.0
+        self.buckets = [0] * (buckets + 1)
+
+
+class BusStats():
+    """
+    Collector of bus transaction statistics.
+
+    Transactions are keyed by operation ("read", "write" or "rdwr"), device address and
+    register. A combined I2C_RDWR transfer is recorded once per register it addresses, see
+    TracedBus.i2c_rdwr.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS) -> None:
+        """
+        Args:
+            buckets (tuple, optional): Ascending upper bounds of the latency buckets in seconds. Default is LATENCY_BUCKETS.
+        """
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def reset(self) -> None:
+        """
+        Drop all collected statistics.
+        """
+        self.series = {}
+
+    def _series(self, op: str, addr: int, reg: int) -> _Series:
+        key = (op, addr, reg)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _Series(len(self.buckets))
+        return series
+
+    def record(self, op: str, addr: int, reg: int, nbytes: int, latency: float, error: bool = False) -> None:
+        """
+        Add one transaction.
+
+        Args:
+            op (str): Operation name.
+            addr (int): Device address.
+            reg (int): Register address.
+            nbytes (int): Number of data bytes transferred.
+            latency (float): Duration of the transaction in seconds.
+            error (bool, optional): The transaction failed. Default is False.
+        """
+        series = self._series(op, addr, reg)
+        series.calls += 1
+        series.bytes += nbytes
+        series.time += latency
+        series.buckets[bisect.bisect_left(self.buckets, latency)] += 1
+        if error:
+            series.errors += 1
+
+    def record_retry(self, op: str, addr: int, reg: int) -> None:
+        """
+        Count a repeated attempt of a transaction, for use by retrying transports.
+        """
+        self._series(op, addr, reg).retries += 1
+
+    def to_dict(self) -> dict:
+        """
+        Export the statistics.
+
+        Returns:
+            dict: "op:0xADDR:0xREG" -> {"calls", "errors", "retries", "bytes", "time" (s), "buckets"},
+                where "buckets" maps the upper bound of every bucket ("+Inf" for the last one)
+                to the number of transactions in it.
+        """
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            f"{op}:0x{addr:02x}:0x{reg:02x}": {
+                "calls": series.calls,
+                "errors": series.errors,
+                "retries": series.retries,
+                "bytes": series.bytes,
+                "time": series.time,
+                "buckets": dict(zip(bounds, series.buckets)),
+            }
+            for (op, addr, reg), series in sorted(self.series.items())
+        }
+
+    def to_prometheus(self, prefix: str = "drv10987_bus") -> str:
+        """
+        Export the statistics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str, optional): Prefix of the metric names. Default is "drv10987_bus".
+
+        Returns:
+            str: Counters `<prefix>_transactions_total`, `_errors_total`, `_retries_total`,
+                `_bytes_total` and the histogram `<prefix>_latency_seconds`.
+        """
+        items = sorted(self.series.items())
+        lines = []
+        for name, attribute, description in (("transactions_total", "calls", "Bus transactions."),
+                                             ("errors_total", "errors", "Failed bus transactions."),
+                                             ("retries_total", "retries", "Retried bus transactions."),
+                                             ("bytes_total", "bytes", "Transferred data bytes.")):
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for (op, addr, reg), series in items:
+                lines.append(f'{prefix}_{name}{{op="{op}",addr="0x{addr:02x}",reg="0x{reg:02x}"}} {getattr(series, attribute)}')
+
+        lines.append(f"# HELP {prefix}_latency_seconds Bus transaction latency.")
+        lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for (op, addr, reg), series in items:
+            labels = f'op="{op}",addr="0x{addr:02x}",reg="0x{reg:02x}"'
+            cumulative = 0
+            for bound, count in zip(bounds, series.buckets):
+                cumulative += count
+                lines.append(f'{prefix}_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{prefix}_latency_seconds_sum{{{labels}}} {series.time!r}")
+            lines.append(f"{prefix}_latency_seconds_count{{{labels}}} {series.calls}")
+        return "\n".join(lines) + "\n"
+
+
+class TracedBus():
+    """
+    Proxy of an smbus2.SMBus object that records every transaction in a BusStats collector.
+
+    Methods other than the traced transfers are passed through to the wrapped bus.
+    """
+
+    def __init__(self, bus, stats: BusStats = None, clock=time.perf_counter) -> None:
+        """
+        Args:
+            bus (smbus.SMBus): The bus to wrap.
+            stats (BusStats, optional): The collector. Default is a new one.
+            clock (callable, optional): Clock timing the transactions. Default is time.perf_counter.
+        """
+        self.bus = bus
+        self.stats = BusStats() if stats is None else stats
+        self.clock = clock
+
+    def __getattr__(self, name):
+        return getattr(self.bus, name)
+
+    def read_i2c_block_data(self, i2c_addr: int, register: int, length: int, force=None) -> list:
+        start = self.clock()
+        try:
+            data = self.bus.read_i2c_block_data(i2c_addr, register, length, force=force)
+        except Exception:
+            self.stats.record("read", i2c_addr, register, 0, self.clock() - start, error=True)
+            raise
+        self.stats.record("read", i2c_addr, register, length, self.clock() - start)
+        return data
+
+    def write_i2c_block_data(self, i2c_addr: int, register: int, data: list, force=None) -> None:
+        start = self.clock()
+        try:
+            self.bus.write_i2c_block_data(i2c_addr, register, data, force=force)
+        except Exception:
+            self.stats.record("write", i2c_addr, register, 0, self.clock() - start, error=True)
+            raise
+        self.stats.record("write", i2c_addr, register, len(data), self.clock() - start)
+
+    @staticmethod
+    def _segments(i2c_msgs) -> list:
+        """
+        Split a combined transfer into (address, register, bytes) per register access. Every
+        write message starts an access at the register it addresses, the following read
+        messages belong to it.
+        """
+        segments = []
+        for msg in i2c_msgs:
+            if not msg.flags & 1 and msg.len:
+                segments.append([msg.addr, bytes(msg)[0], msg.len])
+            elif segments:
+                segments[-1][2] += msg.len
+            else:
+                segments.append([msg.addr, 0, msg.len])
+        return segments
+
+    def i2c_rdwr(self, *i2c_msgs) -> None:
+        """
+        Run a combined transfer and record one "rdwr" transaction per addressed register. The
+        latency is split across the registers in proportion to their bytes.
+        """
+        start = self.clock()
+        try:
+            self.bus.i2c_rdwr(*i2c_msgs)
+        except Exception:
+            latency = self.clock() - start
+            segments = self._segments(i2c_msgs)
+            for addr, register, _ in segments:
+                self.stats.record("rdwr", addr, register, 0, latency / len(segments), error=True)
+            raise
+        latency = self.clock() - start
+        segments = self._segments(i2c_msgs)
+        total = sum(nbytes for _, _, nbytes in segments)
+        for addr, register, nbytes in segments:
+            share = nbytes / total if total else 1 / len(segments)
+            self.stats.record("rdwr", addr, register, nbytes, latency * share)
+
+
+def attach(driver, stats: BusStats = None) -> BusStats:
+    """
+    Start tracing the bus transactions of a driver.
+
+    Drivers sharing one collector are reported together, distinguished by their address.
+
+    Args:
+        driver (MLAB_DRV10987): The driver to trace.
+        stats (BusStats, optional): The collector. Default is a new one, or the current one when already attached.
+
+    Returns:
+        BusStats: The collector.
+    """
+    bus = driver.bus
+    if isinstance(bus, TracedBus):
+        if stats is not None:
+            bus.stats = stats
+        return bus.stats
+    traced = TracedBus(bus, stats)
+    driver.bus = traced
+    return traced.stats
+
+
+def detach(driver) -> None:
+    """
+    Stop tracing a driver and restore its bus object.
+    """
+    if isinstance(driver.bus, TracedBus):
+        driver.bus = driver.bus.bus
@@ -0,0 +1,262 @@
+#! /usr/bin/python3
+
+"""
+Fault-tolerant I2C transport for long cables and USB-I2C bridges.
+
+ResilientBus wraps an smbus2.SMBus object and retries failed transactions with bounded
+exponential backoff within a per-transaction deadline. After several consecutive failures the
+bus is reopened. Devices that keep failing are isolated by a per-device circuit breaker, so a
+dead motor fails fast instead of spending bus time on retries that the other motors on the
+same bus need. Writes that trigger an action in the device are never repeated.
+
+Example usage:
+drv = MLAB_DRV10987(ResilientBus(smbus.SMBus(1), opener=lambda: smbus.SMBus(1)))
+"""
+
+import errno
+import time
+
+from .driver import MLAB_DRV10987
+
+# Registers that read back the written value, candidates for write verification
+VERIFIED_REGISTERS = MLAB_DRV10987.SHADOWED_REGISTERS - {MLAB_DRV10987.EepromProgramming5}
+
+# Registers whose writes act on the device, a repetition of a write that reached the device but
+# lost its acknowledge would act twice: fault clears, the EEPROM access code sequence and the
+# EEPROM write/refresh triggers
+NON_IDEMPOTENT_REGISTERS = frozenset((MLAB_DRV10987.FaultReg, MLAB_DRV10987.EepromProgramming1,
+                                      MLAB_DRV10987.EepromProgramming5))
+
+
+class _Breaker():
+    """
+    Circuit breaker and counters of one device.
+    """
+
+    __slots__ = ("failures", "open_until", "calls", "errors", "retries", "trips", "rejected", "time")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.open_until = None
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.trips = 0
+        self.rejected = 0
+        self.time = 0.0
+
+
+class ResilientBus():
+    """
+    Proxy of an smbus2.SMBus object that retries and recovers failed transactions.
+
+    A transaction that raises OSError is repeated after a backoff doubling from `backoff` up to
+    `backoff_max`, until it succeeds, `retries` repetitions were made or the next attempt would
+    end after `deadline`. The last error is raised then.
+
+    After `reopen_after` consecutive failed attempts on the bus, the bus object is closed and
+    replaced by `opener()`, which recovers e.g. a USB bridge that was reset.
+
+    Writes to the registers in `non_idempotent` are attempted once, a failure is raised right
+    away. This includes combined transfers containing such a write.
+
+    After `breaker_threshold` consecutive failed transactions of one device its breaker opens:
+    transactions to that device fail immediately with EHOSTDOWN for `breaker_timeout` seconds.
+    Then one transaction is let through, and its success closes the breaker. A device is its
+    address together with the route to it: the control bytes last written with `write_byte`
+    to multiplexers on this bus (see mux.TCA9548A), so modules with the same address behind
+    different multiplexer channels have separate breakers.
+
+    With `verify_writes`, block writes and the write messages of combined transfers to the
+    registers in `verify_registers` are read back and a mismatch is handled like a failed
+    transaction.
+    """
+
+    def __init__(self, bus, retries: int = 3, backoff: float = 0.001, backoff_max: float = 0.05,
+                 deadline: float = 0.1, reopen_after: int = 5, opener=None, verify_writes: bool = False,
+                 verify_registers=VERIFIED_REGISTERS, non_idempotent=NON_IDEMPOTENT_REGISTERS,
+                 breaker_threshold: int = 3, breaker_timeout: float = 1.0, stats=None,
+                 clock=time.monotonic, sleep=time.sleep) -> None:
+        """
+        Args:
+            bus (smbus.SMBus): The bus to wrap.
+            retries (int, optional): Maximum number of repetitions of a transaction. Default is 3.
+            backoff (float, optional): Delay before the first repetition in seconds. Default is 1 ms.
+            backoff_max (float, optional): Maximum delay between repetitions in seconds. Default is 50 ms.
+            deadline (float, optional): Maximum duration of a transaction including repetitions in seconds. Default is 100 ms.
+            reopen_after (int, optional): Consecutive failed attempts after which the bus is reopened. Default is 5.
+            opener (callable, optional): Returns a new bus object. Default is no reopening.
+            verify_writes (bool, optional): Read written registers back. Default is False.
+            verify_registers (set, optional): Registers verified with `verify_writes`. Default is VERIFIED_REGISTERS.
+            non_idempotent (set, optional): Registers whose writes are never repeated. Default is NON_IDEMPOTENT_REGISTERS.
+            breaker_threshold (int, optional): Consecutive failed transactions that open the breaker of an address. Default is 3.
+            breaker_timeout (float, optional): Time the breaker stays open in seconds. Default is 1 s.
+            stats (trace.BusStats, optional): Collector that is told about every retry.
+            clock (callable, optional): Monotonic clock in seconds. Default is time.monotonic.
+            sleep (callable, optional): Sleep function matching `clock`. Default is time.sleep.
+        """
+        self.bus = bus
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.reopen_after = reopen_after
+        self.opener = opener
+        self.verify_writes = verify_writes
+        self.verify_registers = frozenset(verify_registers)
+        self.non_idempotent = frozenset(non_idempotent)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_timeout = breaker_timeout
+        self.stats = stats
+        self.clock = clock
+        self.sleep = sleep
+        self.failures = 0
+        self.reopens = 0
+        self._breakers = {}
+        # Multiplexer address -> control byte last written, missing when unknown
+        self._routes = {}
+
+    def __getattr__(self, name):
+        return getattr(self.bus, name)
+
+    @property
+    def route(self) -> tuple:
+        """
+        The current route to downstream devices: (multiplexer address, control byte) pairs of
+        the multiplexers with enabled channels, empty without multiplexers.
+        """
+        return tuple(sorted((addr, value) for addr, value in self._routes.items() if value != 0))
+
+    def _breaker(self, addr: int, route: tuple = None) -> _Breaker:
+        key = (self.route if route is None else route, addr)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = _Breaker()
+        return breaker
+
+    def _reopen(self) -> None:
+        try:
+            self.bus.close()
+        except OSError:
+            pass
+        self.bus = self.opener()
+        self.reopens += 1
+        self.failures = 0
+
+    def _transaction(self, op: str, addr: int, reg: int, func, retry: bool = True, route: tuple = None):
+        breaker = self._breaker(addr, route)
+        start = self.clock()
+        if breaker.open_until is not None:
+            if start < breaker.open_until:
+                breaker.rejected += 1
+                raise OSError(errno.EHOSTDOWN, f"Device 0x{addr:02x} is isolated after repeated failures")
+            # Half-open: a single attempt decides
+            breaker.open_until = None
+            breaker.failures = self.breaker_threshold - 1
+
+        breaker.calls += 1
+        delay = self.backoff
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = func()
+                    self.failures = 0
+                    breaker.failures = 0
+                    return result
+                except OSError:
+                    breaker.errors += 1
+                    self.failures += 1
+                    if self.opener is not None and self.failures >= self.reopen_after:
+                        self._reopen()
+                    if not retry or attempt >= self.retries or self.clock() + delay - start > self.deadline:
+                        breaker.failures += 1
+                        if breaker.failures >= self.breaker_threshold:
+                            breaker.open_until = self.clock() + self.breaker_timeout
+                            breaker.trips += 1
+                        raise
+                attempt += 1
+                breaker.retries += 1
+                if self.stats is not None:
+                    self.stats.record_retry(op, addr, reg)
+                self.sleep(delay)
+                delay = min(delay * 2, self.backoff_max)
+        finally:
+            breaker.time += self.clock() - start
+
+    def _verify(self, i2c_addr: int, register: int, data: list, force=None) -> None:
+        readback = self.bus.read_i2c_block_data(i2c_addr, register, len(data), force=force)
+        if list(readback) != list(data):
+            raise OSError(errno.EIO, f"Register 0x{register:02x} reads back {list(readback)}, expected {list(data)}")
+
+    def read_i2c_block_data(self, i2c_addr: int, register: int, length: int, force=None) -> list:
+        return self._transaction("read", i2c_addr, register,
+                                 lambda: self.bus.read_i2c_block_data(i2c_addr, register, length, force=force))
+
+    def write_i2c_block_data(self, i2c_addr: int, register: int, data: list, force=None) -> None:
+        def write():
+            self.bus.write_i2c_block_data(i2c_addr, register, data, force=force)
+            if self.verify_writes and register in self.verify_registers:
+                self._verify(i2c_addr, register, data, force=force)
+        self._transaction("write", i2c_addr, register, write, retry=register not in self.non_idempotent)
+
+    def i2c_rdwr(self, *i2c_msgs) -> None:
+        first = i2c_msgs[0]
+        register = bytes(first)[0] if not first.flags & 1 and first.len else 0
+        # A write message longer than the register pointer writes data
+        writes = [(msg.addr, bytes(msg)) for msg in i2c_msgs if not msg.flags & 1 and msg.len > 1]
+        retry = not any(data[0] in self.non_idempotent for _, data in writes)
+        verify = [(addr, data) for addr, data in writes if data[0] in self.verify_registers] if self.verify_writes else []
+
+        def transfer():
+            self.bus.i2c_rdwr(*i2c_msgs)
+            for addr, data in verify:
+                self._verify(addr, data[0], list(data[1:]))
+        self._transaction("rdwr", first.addr, register, transfer, retry=retry)
+
+    def write_byte(self, i2c_addr: int, value: int, force=None) -> None:
+        """
+        Write a byte, e.g. the control register of a multiplexer. The byte is remembered as the
+        route of the multiplexer at `i2c_addr`, see `route`.
+        """
+        def write():
+            self._routes.pop(i2c_addr, None)
+            self.bus.write_byte(i2c_addr, value, force=force)
+            self._routes[i2c_addr] = value
+        # The multiplexers sit upstream of all channels
+        self._transaction("write", i2c_addr, 0, write, route=())
+
+    def reset_breaker(self, addr: int = None) -> None:
+        """
+        Close the breakers of an address on all routes, or all breakers.
+        """
+        for (_, key), breaker in self._breakers.items():
+            if addr is None or key == addr:
+                breaker.failures = 0
+                breaker.open_until = None
+
+    def status(self) -> dict:
+        """
+        Return the counters of the transport.
+
+        Returns:
+            dict: "reopens" and "devices", (route, address) -> {"calls", "errors" (failed attempts),
+                "retries", "trips" (breaker openings), "rejected" (calls failed fast while the
+                breaker was open), "open" (bool), "time" (s spent in transactions)}.
+        """
+        now = self.clock()
+        return {
+            "reopens": self.reopens,
+            "devices": {
+                key: {
+                    "calls": breaker.calls,
+                    "errors": breaker.errors,
+                    "retries": breaker.retries,
+                    "trips": breaker.trips,
+                    "rejected": breaker.rejected,
+                    "open": breaker.open_until is not None and now < breaker.open_until,
+                    "time": breaker.time,
+                }
+                for key, breaker in sorted(self._breakers.items())
+            },
+        }
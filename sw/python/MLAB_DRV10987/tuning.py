@@ -0,0 +1,367 @@
+#! /usr/bin/python3
+
+"""
+Automated tuning of the start-up parameters in CONFIG3 and CONFIG4.
+
+SpinUpTuner applies candidate settings to the shadow registers, starts the motor from
+standstill and polls FaultReg and MotorSpeed (one combined read per poll). A trial measures the
+time to closed loop (MotorSpeed reaches the Op2ClsThr threshold) and the time to the target
+speed. It fails when a Lock fault is raised or the target is not reached in time.
+
+The search is a coordinate descent over the tuned fields, starting from the current
+configuration. Every field is first tried at the values of a coarse grid, then refined around
+the best value with a pattern search of halving steps over the full range of the field.
+AccelRangeSel and StAccel are searched together. On equal times the gentler settings win.
+Trials are pruned in three ways:
+- a trial is aborted as soon as it is slower than the best result so far,
+- settings at least as aggressive as a setting that failed with a Lock fault are skipped
+  (shorter alignment, faster acceleration, lower threshold, less or slower current), assuming
+  that a start that loses the rotor does not succeed with a harder start,
+- settings are measured once.
+
+Example usage:
+tuner = SpinUpTuner(drv, speed=50, target_speed=120)
+best = tuner.run()
+tuner.profile("fan-fast-start").save("fan-fast-start.toml")
+
+Simulation:
+python -m MLAB_DRV10987.tuning --simulate --speed 50 --target 120
+"""
+
+import argparse
+import collections
+import os
+import sys
+import time
+
+from . import decode
+from . import registers
+from .driver import MLAB_DRV10987
+from .profiles import MotorProfile
+
+# Tuned fields of the CONFIG3 and CONFIG4 registers
+TUNED_FIELDS = {
+    "CONFIG3": ("OpLCurr", "OpLCurrRt", "ISDEn"),
+    "CONFIG4": ("AlginTime", "Op2ClsThr", "StAccel", "AccelRangeSel"),
+}
+
+# Values of the ordered fields from the gentlest to the most aggressive start
+ORDERS = {
+    "AlginTime": tuple(range(8)),  # 5.3 s down to 40 ms
+    "Op2ClsThr": tuple(sorted(range(32), key=registers.op2cls_threshold, reverse=True)),
+    "StAccel": tuple(range(64)),
+    "AccelRangeSel": (0, 1),
+    "OpLCurr": (3, 2, 1, 0),  # 1.6 A down to 0.2 A
+    "OpLCurrRt": tuple(range(8)),  # fastest to slowest current ramp
+}
+
+# Coarse grid tried for every field before the refinement
+DEFAULT_GRID = {
+    "AlginTime": (2, 3, 4, 5, 6, 7),
+    "Op2ClsThr": (0b10011, 0b10001, 0b10000, 0b01111, 0b01101, 0b01010),  # 51.2 Hz down to 8 Hz
+    "StAccel": (7, 15, 31, 47, 63),
+    "AccelRangeSel": (0, 1),
+    "OpLCurr": (3, 2, 1),
+    "OpLCurrRt": (0, 1, 2, 3, 4),
+    "ISDEn": (0, 1),
+}
+
+# Fields tried together: the acceleration is set by the range and the step, every range is
+# tried with the coarse steps
+COUPLED = {"AccelRangeSel": "StAccel"}
+
+LOCK_MASK = decode.fault_mask(["Lock0", "Lock1", "Lock2", "Lock3", "Lock4", "Lock5"])
+# Lock4 (stuck in open loop) means a start that is too gentle, it does not prune harder starts
+_AGGRESSIVE_LOCKS = LOCK_MASK & ~decode.fault_mask(["Lock4"])
+
+SpinUpResult = collections.namedtuple("SpinUpResult", ["settings", "status", "closed_loop_time", "target_time", "faults"])
+SpinUpResult.__doc__ = """
+Result of one start-up trial.
+
+Attributes:
+    settings (dict): Values of the tuned fields.
+    status (str): "ok", "fault" (Lock fault raised), "timeout" (target not reached in time)
+        or "slower" (aborted, slower than the best result).
+    closed_loop_time (float): Seconds from the start command to closed loop, or None.
+    target_time (float): Seconds from the start command to the target speed, or None.
+    faults (list): Names of the raised fault flags.
+"""
+
+
+class SpinUpTuner():
+    """
+    Search for the fastest start-up settings that do not raise Lock faults.
+    """
+
+    def __init__(self, driver: MLAB_DRV10987, speed: float, target_speed: float, tolerance: float = 0.05,
+                 timeout: float = 10.0, stop_timeout: float = 30.0, interval: float = 0.005, grid: dict = None,
+                 max_passes: int = 5, clock=time.monotonic, sleep=time.sleep) -> None:
+        """
+        Args:
+            driver (MLAB_DRV10987): The driver of the motor. The motor must be free to start.
+            speed (float): Speed command of the trials in %, see MLAB_DRV10987.set_SpeedCtrl.
+            target_speed (float): Speed the command reaches in steady state, MotorSpeed in Hz.
+            tolerance (float, optional): Relative speed band around the target counted as reached. Default is 5 %.
+            timeout (float, optional): Maximum duration of a trial in seconds. Default is 10 s.
+            stop_timeout (float, optional): Maximum time to wait for the motor to stop before a trial. Default is 30 s.
+            interval (float, optional): Poll interval in seconds, the resolution of the measured times. Default is 5 ms.
+            grid (dict, optional): Field -> coarse candidate values. Fields left out are not tuned. Default is DEFAULT_GRID.
+            max_passes (int, optional): Maximum passes over all fields. Default is 5.
+            clock (callable, optional): Monotonic clock in seconds. Default is time.monotonic.
+            sleep (callable, optional): Sleep function matching `clock`. Default is time.sleep.
+        """
+        self.driver = driver
+        self.command = int(511.0 * min(max(speed, 0.0), 100.0) / 100.0)
+        self.target_speed = target_speed
+        self.tolerance = tolerance
+        self.timeout = timeout
+        self.stop_timeout = stop_timeout
+        self.interval = interval
+        self.grid = dict(DEFAULT_GRID if grid is None else grid)
+        unknown = set(self.grid) - set(DEFAULT_GRID)
+        if unknown:
+            raise ValueError(f"Unknown start-up fields: {', '.join(sorted(unknown))}")
+        self.max_passes = max_passes
+        self.clock = clock
+        self.sleep = sleep
+        self.results = {}
+        self.best = None
+        self.pruned = 0
+        self._failures = []
+
+    @staticmethod
+    def _key(settings: dict) -> tuple:
+        return tuple(sorted(settings.items()))
+
+    def current_settings(self) -> dict:
+        """
+        Return the tuned fields of the current configuration.
+        """
+        settings = {}
+        for name, fields in TUNED_FIELDS.items():
+            register = registers.BY_NAME[name]
+            values = register.unpack(self.driver.read_cached(register.address))
+            settings.update({field: values[field] for field in fields})
+        return settings
+
+    def apply(self, settings: dict) -> None:
+        """
+        Write start-up settings to the shadow registers in one batched write.
+        """
+        words = {}
+        for name, fields in TUNED_FIELDS.items():
+            register = registers.BY_NAME[name]
+            words[register.address] = register.replace(self.driver.read_cached(register.address),
+                                                        **{field: settings[field] for field in fields if field in settings})
+        self.driver.write_registers(words)
+
+    def _stop(self) -> None:
+        self.driver.set_SpeedCtrl_raw(0)
+        deadline = self.clock() + self.stop_timeout
+        while self.driver.read(MLAB_DRV10987.MotorSpeed) != 0:
+            if self.clock() > deadline:
+                raise RuntimeError("The motor did not stop")
+            self.sleep(self.interval * 10)
+
+    def measure(self, settings: dict, limit: float = None) -> SpinUpResult:
+        """
+        Run one start-up trial from standstill.
+
+        Args:
+            settings (dict): Values of the tuned fields, missing fields keep their current values.
+            limit (float, optional): Abort the trial when the target is not reached within this time.
+
+        Returns:
+            SpinUpResult: The result of the trial.
+        """
+        settings = dict(self.current_settings(), **settings)
+        threshold = registers.op2cls_threshold(settings["Op2ClsThr"])
+        low, high = self.target_speed * (1 - self.tolerance), self.target_speed * (1 + self.tolerance)
+
+        self._stop()
+        self.driver.clear_faults()
+        self.apply(settings)
+        start = self.clock()
+        self.driver.set_SpeedCtrl_raw(self.command)
+        closed_loop_time = None
+        status = None
+        faults = 0
+        try:
+            while status is None:
+                self.sleep(self.interval)
+                elapsed = self.clock() - start
+                faults, raw_speed = self.driver.read_registers([MLAB_DRV10987.FaultReg, MLAB_DRV10987.MotorSpeed])
+                speed = decode.motor_speed(raw_speed)
+                if faults & LOCK_MASK:
+                    status = "fault"
+                elif closed_loop_time is None and speed >= threshold and speed > 0:
+                    closed_loop_time = elapsed
+                if status is None and closed_loop_time is not None and low <= speed <= high:
+                    status = "ok"
+                elif status is None and limit is not None and elapsed > limit:
+                    status = "slower"
+                elif status is None and elapsed > self.timeout:
+                    status = "timeout"
+        finally:
+            self.driver.set_SpeedCtrl_raw(0)
+        names = [name for name, raised in decode.fault_flags(faults).items() if raised]
+        return SpinUpResult(settings, status, closed_loop_time, elapsed if status == "ok" else None, names)
+
+    def _dominated(self, settings: dict) -> bool:
+        """
+        Return True when the settings are at least as aggressive as a failed setting.
+        """
+        for failed in self._failures:
+            if all(settings[field] == value for field, value in failed.items() if field not in ORDERS) and \
+               all(ORDERS[field].index(settings[field]) >= ORDERS[field].index(value)
+                   for field, value in failed.items() if field in ORDERS):
+                return True
+        return False
+
+    def evaluate(self, settings: dict) -> SpinUpResult:
+        """
+        Measure settings unless they were measured already or are pruned, and track the best result.
+
+        Returns:
+            SpinUpResult: The result, or None when the settings were pruned.
+        """
+        key = self._key(settings)
+        if key in self.results:
+            return self.results[key]
+        if self._dominated(settings):
+            self.pruned += 1
+            return None
+        limit = self.best.target_time + self.interval if self.best is not None else None
+        result = self.measure(settings, limit)
+        self.results[key] = result
+        if result.status == "fault" and decode.fault_mask(result.faults) & _AGGRESSIVE_LOCKS:
+            self._failures.append(dict(result.settings))
+        if result.status == "ok" and self._better(result):
+            self.best = result
+        return result
+
+    @staticmethod
+    def _aggressiveness(settings: dict) -> float:
+        return sum(order.index(settings[field]) / (len(order) - 1) for field, order in ORDERS.items())
+
+    def _better(self, result: SpinUpResult) -> bool:
+        """
+        Compare a successful result with the best one. Within the poll interval the times are
+        equal and the gentler settings win, they leave more margin and let other fields move on.
+        """
+        if self.best is None:
+            return True
+        difference = result.target_time - self.best.target_time
+        if abs(difference) > self.interval:
+            return difference < 0
+        return self._aggressiveness(result.settings) < self._aggressiveness(self.best.settings)
+
+    def _refine(self, field: str) -> None:
+        """
+        Pattern search over the full range of an ordered field around the best value.
+        """
+        order = ORDERS[field]
+        grid = sorted(order.index(value) for value in self.grid[field])
+        step = max(1, (grid[-1] - grid[0]) // max(1, len(grid) - 1) // 2)
+        while step >= 1:
+            index = order.index(self.best.settings[field])
+            improved = False
+            for candidate in (index + step, index - step):
+                if 0 <= candidate < len(order):
+                    before = self.best
+                    self.evaluate(dict(self.best.settings, **{field: order[candidate]}))
+                    if self.best is not before:
+                        improved = True
+                        break
+            if not improved:
+                step //= 2
+
+    def run(self) -> SpinUpResult:
+        """
+        Search for the fastest start-up and apply it. The motor is left stopped.
+
+        Returns:
+            SpinUpResult: The fastest trial without faults.
+
+        Raises:
+            RuntimeError: No trial reached the target speed without faults.
+        """
+        self.driver.set_shadow_mode()
+        self.evaluate(self.current_settings())
+        for _ in range(self.max_passes):
+            if self.best is None:
+                # Without a working start the coarse grid of every field is tried from the current settings
+                base = self.current_settings()
+            before = self.best
+            for field, values in self.grid.items():
+                partner = COUPLED.get(field) if COUPLED.get(field) in self.grid else None
+                for value in values:
+                    for other in self.grid[partner] if partner else (None,):
+                        changes = {field: value} if partner is None else {field: value, partner: other}
+                        self.evaluate(dict(self.best.settings if self.best else base, **changes))
+                if self.best is not None:
+                    for name in (field, partner):
+                        if name in ORDERS:
+                            self._refine(name)
+            if self.best is before:
+                break
+
+        self._stop()
+        if self.best is None:
+            raise RuntimeError("No start-up settings reached the target speed without faults")
+        self.apply(self.best.settings)
+        return self.best
+
+    def profile(self, name: str, description: str = "") -> MotorProfile:
+        """
+        Return the complete configuration with the best start-up settings as a MotorProfile.
+        """
+        if self.best is None:
+            raise RuntimeError("Run the tuner first")
+        self.apply(self.best.settings)
+        return MotorProfile.capture(self.driver, name, description)
+
+    def stats(self) -> dict:
+        """
+        Return the number of trials by status and of pruned settings.
+        """
+        counts = collections.Counter(result.status for result in self.results.values())
+        return dict(counts, trials=len(self.results), pruned=self.pruned)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tune the DRV10987 start-up parameters for the fastest spin-up.")
+    parser.add_argument("--bus", type=int, default=1, help="I2C bus number (default: 1)")
+    parser.add_argument("--addr", type=lambda value: int(value, 0), default=MLAB_DRV10987.DRVADDR,
+                        help=f"device address (default: 0x{MLAB_DRV10987.DRVADDR:02x})")
+    parser.add_argument("--speed", type=float, required=True, help="speed command of the trials in %%")
+    parser.add_argument("--target", type=float, required=True, help="steady-state MotorSpeed of the command in Hz")
+    parser.add_argument("--timeout", type=float, default=10.0, help="maximum duration of a trial in s (default: 10)")
+    parser.add_argument("-o", "--output", help="save the tuned configuration as a .toml or .json profile")
+    parser.add_argument("--simulate", action="store_true", help="tune a simulated motor instead of the device")
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        from .simulator import SimulatedDRV10987, SimulatedSMBus
+        bus = SimulatedSMBus({args.addr: SimulatedDRV10987(startup=True)})
+        driver = MLAB_DRV10987(bus, args.addr)
+        tuner = SpinUpTuner(driver, args.speed, args.target, timeout=args.timeout, clock=bus.time, sleep=bus.advance)
+    else:
+        driver = MLAB_DRV10987(args.bus, args.addr)
+        tuner = SpinUpTuner(driver, args.speed, args.target, timeout=args.timeout)
+
+    current = tuner.current_settings()
+    best = tuner.run()
+    start = tuner.results[tuner._key(current)]
+    print(f"Current:  {start.status}, closed loop {start.closed_loop_time} s, target {start.target_time} s")
+    print(f"Best:     closed loop {best.closed_loop_time:.3f} s, target {best.target_time:.3f} s")
+    print(f"Settings: {best.settings}")
+    print(f"Trials:   {tuner.stats()}")
+    if args.output:
+        name = os.path.splitext(os.path.basename(args.output))[0]
+        tuner.profile(name, f"Start-up tuned for {args.speed} % / {args.target} Hz").save(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+#! /usr/bin/python3
+
+"""
+Benchmarks of MLAB_DRV10987 operations, runnable without hardware.
+
+Every benchmark runs against a SimulatedSMBus and reports per call:
+- wall_us: wall-clock time in microseconds from time.perf_counter (median of the repeats),
+- transactions, bytes: bus transactions and transferred bytes, deterministic,
+- bus_us: bus time the transactions take with the selected latency profile, deterministic,
+- alloc_bytes: peak memory allocated during one call, from tracemalloc,
+- alloc_blocks: memory blocks still allocated after the calls, divided by the number of calls.
+
+Results can be saved as JSON and compared against a stored baseline. The comparison fails on
+any increase of transactions, bytes or bus time, and on an increase of wall time or allocated
+bytes beyond the threshold.
+
+Example usage, from sw/python:
+python -m benchmarks.bench_driver
+python -m benchmarks.bench_driver --json results.json
+python -m benchmarks.bench_driver --baseline benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.driver import print_status_registers
+from MLAB_DRV10987.simulator import SimulatedDRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+
+# Metrics that must not grow at all, and metrics compared with the relative threshold
+EXACT_METRICS = ("transactions", "bytes", "bus_us")
+NOISY_METRICS = ("wall_us", "alloc_bytes")
+
+
+def _driver(bus):
+    return MLAB_DRV10987(bus)
+
+
+def bench_init(bus):
+    # Warm restart: the device holds the configuration of the previous call
+    return lambda: MLAB_DRV10987(bus)
+
+
+def bench_init_cold(bus):
+    # Cold start: a device fresh from power-up with its EEPROM configuration on every call, on
+    # the benchmark's bus so the transactions are counted
+    addr = MLAB_DRV10987.DRVADDR
+
+    def init():
+        bus.devices[addr] = SimulatedDRV10987()
+        MLAB_DRV10987(bus)
+    return init
+
+
+def bench_set_SpeedCtrl(bus):
+    drv = _driver(bus)
+    speeds = iter(range(1 << 30))
+    # Alternate between two speeds, so that every call writes
+    return lambda: drv.set_SpeedCtrl(40 + next(speeds) % 2)
+
+
+def bench_set_SpeedCtrl_unchanged(bus):
+    drv = _driver(bus)
+    drv.set_SpeedCtrl(40)
+    return lambda: drv.set_SpeedCtrl(40)
+
+
+def bench_read_status_registers(bus):
+    drv = _driver(bus)
+    return drv.read_status_registers
+
+
+def bench_read_status_MotorSpeed(bus):
+    drv = _driver(bus)
+    return lambda: drv.read_status_registers(fields=["MotorSpeed"])
+
+
+def bench_decode_FaultReg(bus):
+    drv = _driver(bus)
+    return lambda: drv.decode_FaultReg(0x0803)
+
+
+def bench_configure_CONFIG(bus):
+    drv = _driver(bus)
+
+    def configure():
+        drv.configure_CONFIG1()
+        drv.configure_CONFIG2()
+        drv.configure_CONFIG3()
+        drv.configure_CONFIG4()
+        drv.configure_CONFIG5()
+        drv.configure_CONFIG6()
+        drv.configure_CONFIG7()
+    return configure
+
+
+def bench_configure_CONFIG2_changed(bus):
+    drv = _driver(bus)
+    values = iter(range(1 << 30))
+    return lambda: drv.configure_CONFIG2(KtValue=0x28 + next(values) % 2)
+
+
+def bench_print_status_registers(bus):
+    drv = _driver(bus)
+    out = io.StringIO()
+
+    def print_status():
+        out.seek(0)
+        with contextlib.redirect_stdout(out):
+            print_status_registers(drv.read_status_registers())
+    return print_status
+
+
+BENCHMARKS = {
+    "init": (bench_init, 20),
+    "init_cold": (bench_init_cold, 20),
+    "set_SpeedCtrl": (bench_set_SpeedCtrl, 500),
+    "set_SpeedCtrl_unchanged": (bench_set_SpeedCtrl_unchanged, 2000),
+    "read_status_registers": (bench_read_status_registers, 500),
+    "read_status_MotorSpeed": (bench_read_status_MotorSpeed, 1000),
+    "decode_FaultReg": (bench_decode_FaultReg, 5000),
+    "configure_CONFIG1-7": (bench_configure_CONFIG, 500),
+    "configure_CONFIG2_changed": (bench_configure_CONFIG2_changed, 500),
+    "print_status_registers": (bench_print_status_registers, 500),
+}
+
+
+def run_benchmark(setup, number: int, latency: str = "usbi2c01", repeat: int = 5) -> dict:
+    """
+    Measure one benchmark.
+
+    Args:
+        setup (callable): Takes a SimulatedSMBus and returns the function to measure.
+        number (int): Calls per repeat.
+        latency (str, optional): Latency profile of the simulated bus. Default is "usbi2c01".
+        repeat (int, optional): Number of timed repeats. Default is 5.
+
+    Returns:
+        dict: The metrics per call, see the module documentation.
+    """
+    bus = SimulatedSMBus(latency=latency)
+    func = setup(bus)
+    func()
+
+    bus.reset_counters()
+    for _ in range(number):
+        func()
+    result = {
+        "transactions": bus.transactions / number,
+        "bytes": (bus.bytes_read + bus.bytes_written) / number,
+        "bus_us": bus.busy_time / number * 1e6,
+    }
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    result["wall_us"] = statistics.median(times) * 1e6
+
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(min(number, 50)):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        # Count only memory that is really retained, not cyclic garbage awaiting collection
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        for _ in range(number):
+            func()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    result["alloc_bytes"] = peak
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    result["alloc_blocks"] = max(0, blocks) / number
+    return result
+
+
+def run(names=None, latency: str = "usbi2c01", repeat: int = 5, scale: float = 1.0) -> dict:
+    """
+    Run the benchmarks.
+
+    Args:
+        names (iterable, optional): Benchmarks to run, keys of BENCHMARKS. Default is all.
+        latency (str, optional): Latency profile of the simulated bus. Default is "usbi2c01".
+        repeat (int, optional): Number of timed repeats. Default is 5.
+        scale (float, optional): Factor of the number of calls per repeat. Default is 1.
+
+    Returns:
+        dict: Benchmark name -> metrics.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        setup, number = BENCHMARKS[name]
+        results[name] = run_benchmark(setup, max(1, int(number * scale)), latency, repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.2, metrics=EXACT_METRICS + NOISY_METRICS) -> list:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (dict): Benchmark name -> metrics, see `run`.
+        baseline (dict): Stored results in the same format.
+        threshold (float, optional): Allowed relative increase of the noisy metrics. Default is 0.2 (20 %).
+        metrics (iterable, optional): Metrics to compare. Default is all except alloc_blocks.
+
+    Returns:
+        list: Descriptions of the regressions, empty when there are none.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in metrics:
+            old, new = baseline[name].get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            limit = old * (1 + threshold) if metric in NOISY_METRICS else old + 1e-9
+            if new > limit:
+                regressions.append(f"{name}: {metric} {old:.4g} -> {new:.4g}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark MLAB_DRV10987 operations on a simulated bus.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("-l", "--latency", default="usbi2c01", help="latency profile of the simulated bus (default: usbi2c01)")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timed repeats (default: 5)")
+    parser.add_argument("-s", "--scale", type=float, default=1.0, help="factor of the number of calls (default: 1)")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with stored results, exit with 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative increase of wall time and allocations (default: 0.2)")
+    parser.add_argument("--exact-only", action="store_true", help="compare only the deterministic bus metrics, e.g. on another machine")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run(args.names, args.latency, args.repeat, args.scale)
+    print(f"{'benchmark':<28}{'wall us':>10}{'trans':>8}{'bytes':>8}{'bus us':>10}{'alloc B':>10}{'blocks':>8}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['wall_us']:>10.2f}{result['transactions']:>8.2f}{result['bytes']:>8.1f}"
+              f"{result['bus_us']:>10.1f}{result['alloc_bytes']:>10}{result['alloc_blocks']:>8.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"latency": args.latency, "results": results}, f, indent=4)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("latency", args.latency) != args.latency:
+            parser.error(f"the baseline was measured with latency {baseline['latency']}")
+        metrics = EXACT_METRICS if args.exact_only else EXACT_METRICS + NOISY_METRICS
+        regressions = compare(results, baseline["results"], args.threshold, metrics)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,12 @@
 #! /usr/bin/python3
 
 import smbus2 as smbus
-import time
 
 import keyboard
 
 from MLAB_DRV10987 import MLAB_DRV10987
 from MLAB_DRV10987 import print_status_registers
+from MLAB_DRV10987.scheduler import Scheduler
 
 
 bus = smbus.SMBus(18)
@@ -36,21 +36,27 @@ spd = 10
 drv.set_SpeedCtrl(spd)
 
 
-while(1):
+def print_status():
     status = drv.read_status_registers()
     print_status_registers(status)
-    time.sleep(0.2)
 
+
+def read_keys():
+    global spd
     if keyboard.is_pressed('down'):
         print('You Pressed down!')
         spd -= 1
         if spd < 0: spd=0
         drv.set_SpeedCtrl(spd)
         print("SPD", spd)
-        time.sleep(0.1)
     if keyboard.is_pressed('up'):
         spd += 1
         if spd > 100: spd=100
         drv.set_SpeedCtrl(spd)
         print("SPD", spd)
-        time.sleep(0.1)
+
+
+scheduler = Scheduler()
+scheduler.add(print_status, rate=5)
+scheduler.add(read_keys, rate=10, phase=0.05)
+scheduler.run()
@@ -12,6 +12,11 @@ license = 'MIT'
 install_requires = [
 ]
 
+# NumPy is needed only for vectorized conversion and analysis of recorded data
+extras_require = {
+    'numpy': ['numpy'],
+}
+
 setup(
     name=name,
     version=version,
@@ -22,6 +27,7 @@ setup(
     license=license,
     packages=find_packages(),
     install_requires=install_requires,
+    extras_require=extras_require,
     # classifiers=[
     #     "Development Status :: 4 - Beta",
     #     "Intended Audience :: Developers,Science/Research",
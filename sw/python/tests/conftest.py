@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+
+
+@pytest.fixture
+def bus():
+    return SimulatedSMBus()
+
+
+@pytest.fixture
+def drv(bus):
+    return MLAB_DRV10987(bus)
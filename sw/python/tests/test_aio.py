@@ -0,0 +1,60 @@
+import asyncio
+
+import smbus2
+
+from MLAB_DRV10987.aio import AsyncDRV10987
+from MLAB_DRV10987.driver import DEFAULT_CONFIG
+from MLAB_DRV10987.simulator import SimulatedSMBus
+
+
+def test_create_initializes(bus):
+    async def main():
+        drv = await AsyncDRV10987.create(bus)
+        await drv.set_SpeedCtrl(50)
+        return drv
+    drv = asyncio.run(main())
+    device = bus.devices[drv.driver.addr]
+    assert all(device.registers[reg] == value for reg, value in DEFAULT_CONFIG.items())
+    assert device.duty > 0.49
+
+
+def test_create_with_bus_number(monkeypatch):
+    buses = {}
+    monkeypatch.setattr(smbus2, "SMBus", lambda number: buses.setdefault(number, SimulatedSMBus()))
+
+    async def main():
+        drv = await AsyncDRV10987.create(3)
+        return await drv.read_status_registers(fields=["SupplyVoltage"])
+    status = asyncio.run(main())
+    assert list(buses) == [3]
+    assert status["SupplyVoltage"] > 0
+
+
+def test_drivers_on_one_bus_share_a_lock(bus):
+    async def main():
+        first = await AsyncDRV10987.create(bus)
+        second = AsyncDRV10987(first.driver)
+        return first._bus_lock(first.driver.bus) is second._bus_lock(second.driver.bus)
+    assert asyncio.run(main())
+
+
+def test_driver_works_in_several_event_loops(bus):
+    drv = asyncio.run(AsyncDRV10987.create(bus))
+
+    async def main():
+        # Concurrent calls make the lock wait, which binds it to the loop
+        return await asyncio.gather(*(drv.read_status_registers(fields=["MotorSpeed"]) for _ in range(3)))
+    for _ in range(2):
+        assert [status["MotorSpeed"] for status in asyncio.run(main())] == [0, 0, 0]
+
+
+def test_stream_status(bus):
+    async def main():
+        drv = await AsyncDRV10987.create(bus)
+        snapshots = []
+        async for status in drv.stream_status(rate=1000, fields=["MotorSpeed"]):
+            snapshots.append(status)
+            if len(snapshots) == 3:
+                break
+        return snapshots
+    assert len(asyncio.run(main())) == 3
@@ -0,0 +1,14 @@
+from benchmarks import bench_driver
+
+
+def test_cold_init_runs_the_startup_path():
+    results = bench_driver.run(["init", "init_cold"], repeat=1, scale=0.1)
+    assert results["init"]["transactions"] == 1
+    assert results["init_cold"]["transactions"] > results["init"]["transactions"]
+
+
+def test_compare_flags_exact_and_noisy_regressions():
+    baseline = {"a": {"transactions": 1.0, "wall_us": 10.0}}
+    assert bench_driver.compare({"a": {"transactions": 1.0, "wall_us": 11.0}}, baseline) == []
+    assert len(bench_driver.compare({"a": {"transactions": 2.0, "wall_us": 10.0}}, baseline)) == 1
+    assert len(bench_driver.compare({"a": {"transactions": 1.0, "wall_us": 13.0}}, baseline)) == 1
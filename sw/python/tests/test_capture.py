@@ -0,0 +1,114 @@
+import math
+import pathlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from MLAB_DRV10987 import capture, kt
+from test_kt import write_capture
+
+MEASUREMENTS = sorted((pathlib.Path(__file__).parents[3] / "tools" / "measurements").glob("*.csv"))
+
+
+def write_two_channels(path, rows, increment=2e-5):
+    with open(path, "w") as f:
+        f.write("X,CH1,CH2,Start,Increment,\n")
+        f.write(f"Sequence,Volt,Ampere,-0.5,{increment!r},\n")
+        for n, (ch1, ch2) in enumerate(rows):
+            f.write(f"{n},{ch1!r},{ch2!r},\n")
+
+
+def test_convert_csv(tmp_path):
+    rows = [(0.5 * n, -0.25 * n) for n in range(1000)]
+    write_two_channels(tmp_path / "scope.csv", rows)
+    result = capture.convert_csv(str(tmp_path / "scope.csv"), str(tmp_path / "scope.drvcap"), chunk_size=77)
+    assert capture.is_capture(str(tmp_path / "scope.drvcap"))
+    assert not capture.is_capture(str(tmp_path / "scope.csv"))
+    assert len(result) == 1000
+    assert result.names == ("CH1", "CH2")
+    assert result.units == ("Volt", "Ampere")
+    assert (result.start, result.increment) == (-0.5, 2e-5)
+    assert result.data.dtype == np.dtype("<f4")
+    assert np.array_equal(result.data, np.array(rows, dtype="<f4"))
+    assert np.array_equal(result.channel("CH2"), np.array(rows, dtype="<f4")[:, 1])
+
+    reopened = capture.Capture(str(tmp_path / "scope.drvcap"))
+    assert isinstance(reopened.data, np.memmap)
+    assert np.array_equal(reopened.data, result.data)
+
+
+def test_convert_empty_csv(tmp_path):
+    write_two_channels(tmp_path / "scope.csv", [])
+    result = capture.convert_csv(str(tmp_path / "scope.csv"), str(tmp_path / "scope.drvcap"))
+    assert len(result) == 0
+    assert result.data.shape == (0, 2)
+
+
+def test_capture_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 128)
+    with pytest.raises(ValueError):
+        capture.Capture(str(path))
+
+
+@pytest.mark.parametrize("names, units", [
+    (["CH1" * 6], ["Volt"]),
+    (["CH1"], ["Volt" * 5]),
+])
+def test_long_channel_names_and_units_rejected(names, units):
+    with pytest.raises(ValueError):
+        capture._header_bytes(names, units, 0, 0.0, 1e-5)
+
+
+def test_sixteen_byte_names_fit():
+    header = capture._header_bytes(["C" * 16], ["V" * 16], 0, 0.0, 1e-5)
+    assert len(header) % 64 == 0
+
+
+@pytest.mark.parametrize("size, before, after", [(3, 0, 0), (3, 2, 1), (4, 5, 5), (10, 1, 1), (16, 0, 3)])
+def test_chunks_borders(tmp_path, size, before, after):
+    write_capture(tmp_path / "scope.csv", range(10))
+    data = capture.convert_csv(str(tmp_path / "scope.csv"), str(tmp_path / "scope.drvcap"))
+    chunks = list(data.chunks(size, before, after))
+    assert [start for start, _, _ in chunks] == list(range(0, 10, size))
+    assert chunks[-1][1] == 10
+    for start, stop, rows in chunks:
+        assert stop - start <= size
+        assert rows[:, 0].tolist() == list(range(max(start - before, 0), min(stop + after, 10)))
+
+
+def test_analyze_capture_matches_sine(tmp_path):
+    t = np.arange(20000) * 1e-5
+    write_capture(tmp_path / "scope.csv", 2.0 * np.sin(2 * np.pi * 50 * t))
+    path = str(tmp_path / "scope.drvcap")
+    capture.convert_csv(str(tmp_path / "scope.csv"), path)
+    expected = kt.analyze_file(str(tmp_path / "scope.csv"))
+    for chunk_size in (1 << 20, 1000, 7):
+        result = capture.analyze_capture(path, chunk_size=chunk_size)
+        assert result["channels"]["CH1"] == pytest.approx(expected["channels"]["CH1"], rel=1e-6)
+
+
+def test_analyze_capture_without_crossings(tmp_path):
+    write_capture(tmp_path / "scope.csv", [1.0] * 100)
+    path = str(tmp_path / "scope.drvcap")
+    capture.convert_csv(str(tmp_path / "scope.csv"), path)
+    result = capture.analyze_capture(path)
+    assert math.isnan(result["kt"])
+    assert result["KtValue"] is None
+
+
+@pytest.mark.skipif(not MEASUREMENTS, reason="tools/measurements not available")
+@pytest.mark.parametrize("csv_path", MEASUREMENTS, ids=lambda path: path.name)
+def test_analyze_capture_matches_analyze_file(tmp_path, csv_path):
+    path = str(tmp_path / "scope.drvcap")
+    capture.convert_csv(str(csv_path), path)
+    expected = kt.analyze_file(str(csv_path))
+    for chunk_size in (1 << 20, 333):
+        result = capture.analyze_capture(path, chunk_size=chunk_size)
+        assert result["KtValue"] == expected["KtValue"]
+        assert result["kt"] == pytest.approx(expected["kt"], rel=1e-6)
+        assert result["channels"].keys() == expected["channels"].keys()
+        for name, channel in expected["channels"].items():
+            assert result["channels"][name] == pytest.approx(channel, rel=1e-6)
+    assert kt.analyze_file(path)["kt"] == result["kt"]
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from MLAB_DRV10987 import decode
+
+REGISTERS = (decode.FaultReg, decode.MotorSpeed, decode.MotorPeriod, decode.MotorXt,
+             decode.MotorCurrent, decode.SupplyVoltage, decode.SpeedCmd)
+
+
+def random_words(rng, count):
+    return [{reg: rng.randrange(0x10000) for reg in REGISTERS} for _ in range(count)]
+
+
+def test_scalar_and_array_paths_agree():
+    np = pytest.importorskip("numpy")
+    samples = random_words(random.Random(6), 500)
+    samples.append(dict.fromkeys(REGISTERS, 0))
+    samples.append(dict.fromkeys(REGISTERS, 0xffff))
+    arrays = {reg: np.array([words[reg] for words in samples], dtype=np.uint16) for reg in REGISTERS}
+    table = decode.decode_status_array(arrays)
+    assert set(table.dtype.names) == {"FaultReg"} | set(decode.STATUS_FIELDS) - {"FaultFlags"}
+    for row, words in zip(table, samples):
+        status = decode.decode_status(words)
+        assert decode.fault_flags(int(row["FaultReg"])) == status.pop("FaultFlags")
+        for field, value in status.items():
+            assert row[field] == pytest.approx(value), field
+
+
+def test_dict_of_arrays_agrees_with_scalars():
+    np = pytest.importorskip("numpy")
+    samples = random_words(random.Random(7), 50)
+    arrays = {reg: np.array([words[reg] for words in samples], dtype=np.uint16) for reg in REGISTERS}
+    status = decode.decode_status(arrays)
+    for index, words in enumerate(samples):
+        scalar = decode.decode_status(words)
+        for name, flag in scalar.pop("FaultFlags").items():
+            assert status["FaultFlags"][name][index] == flag
+        for field, value in scalar.items():
+            assert status[field][index] == pytest.approx(value), field
+
+
+def test_motor_current_wraps_at_1023():
+    assert decode.motor_current(0) == 0
+    assert decode.motor_current(512) == pytest.approx(1.0)
+    assert decode.motor_current(1022) == pytest.approx(1022 / 512)
+    assert decode.motor_current(1023) == 0
+    assert decode.motor_current(1023 + 512) == pytest.approx(1.0)
+
+
+def test_motor_current_array_does_not_overflow():
+    np = pytest.importorskip("numpy")
+    raw = np.array([0, 1022, 1023, 2047], dtype=np.uint16)
+    assert list(decode.motor_current(raw)) == pytest.approx([0, 1022 / 512, 0, 1024 / 512])
+
+
+def test_speed_cmd_uses_high_byte_and_buffer_low_byte():
+    assert decode.speed_cmd(0xff00) == pytest.approx(100.0)
+    assert decode.speed_cmd(0x00ff) == 0
+    assert decode.speed_buffer(0x00ff) == pytest.approx(100.0)
+    assert decode.speed_buffer(0xff00) == 0
+    status = decode.decode_status({decode.SpeedCmd: 0x8040}, ["SpeedCmd", "SpeedBuff"])
+    assert status == {"SpeedCmd": pytest.approx(0x80 * 100 / 255), "SpeedBuff": pytest.approx(0x40 * 100 / 255)}
+
+
+def test_fault_flags():
+    flags = decode.fault_flags(decode.fault_mask(["Lock2", "OverTemp"]))
+    assert set(flags) == set(decode.FAULT_BITS)
+    assert {name for name, flag in flags.items() if flag} == {"Lock2", "OverTemp"}
+    assert not any(decode.fault_flags(1 << 6).values())
+    assert decode.fault_mask([]) == 0
+    assert decode.fault_mask(decode.FAULT_BITS) == 0xffbf
+
+
+def test_fault_flags_array():
+    np = pytest.importorskip("numpy")
+    flags = decode.fault_flags(np.array([0x0001, 0x8000, 0x8001], dtype=np.uint16))
+    assert list(flags["Lock0"]) == [True, False, True]
+    assert list(flags["OverTemp"]) == [False, True, True]
+
+
+def test_decode_status_fields_subset():
+    assert decode.decode_status({decode.MotorPeriod: 100}, ["MotorPeriod"]) == {"MotorPeriod": 1000}
+
+
+def test_decode_status_array_selects_available_fields():
+    np = pytest.importorskip("numpy")
+    table = decode.decode_status_array({decode.MotorCurrent: np.array([512]), decode.SupplyVoltage: np.array([255])})
+    assert set(table.dtype.names) == {"MotorCurrent", "SupplyVoltage", "Power", "IPD"}
+    assert table["Power"][0] == pytest.approx(30.0)
+
+
+def test_read_status_registers_uses_scalar_path(bus, drv):
+    drv.set_SpeedCtrl(50)
+    bus.advance(1.0)
+    regs = sorted({reg for _, regs in decode.STATUS_FIELDS.values() for reg in regs})
+    words = dict(zip(regs, drv.read_registers(regs)))
+    assert words[decode.MotorSpeed] and words[decode.MotorCurrent]
+    assert drv.read_status_registers() == decode.decode_status(words)
@@ -0,0 +1,54 @@
+import pytest
+
+from MLAB_DRV10987 import print_write
+
+
+@pytest.mark.parametrize("counts", [-1, 512, 1000])
+def test_speed_command_range(bus, drv, counts):
+    transactions = bus.transactions
+    with pytest.raises(ValueError):
+        drv.set_SpeedCtrl_raw(counts)
+    assert bus.transactions == transactions
+
+
+@pytest.mark.parametrize("counts", [0, 1, 256, 511])
+def test_speed_command_override_bit(bus, drv, counts):
+    device = bus.devices[drv.addr]
+    drv.set_SpeedCtrl_raw(counts)
+    assert device.registers[drv.SpeedCtrl] == 0x8000 | counts
+    drv.set_SpeedCtrl_raw(counts, override=False)
+    assert device.registers[drv.SpeedCtrl] == counts
+
+
+def test_unchanged_speed_command_is_skipped(bus, drv):
+    drv.set_SpeedCtrl_raw(300)
+    transactions = bus.transactions
+    drv.set_SpeedCtrl_raw(300)
+    assert bus.transactions == transactions
+    drv.set_SpeedCtrl_raw(300, override=False)
+    assert bus.transactions == transactions + 1
+
+
+@pytest.mark.parametrize("speed, counts", [(-5, 0), (0, 0), (50, 255), (100, 511), (150, 511)])
+def test_speed_percent_is_clamped(bus, drv, speed, counts):
+    assert drv.set_SpeedCtrl(speed)
+    assert bus.devices[drv.addr].registers[drv.SpeedCtrl] == 0x8000 | counts
+
+
+def test_no_trace_by_default(drv, capsys):
+    drv.set_SpeedCtrl_raw(100)
+    assert capsys.readouterr().out == ""
+
+
+def test_print_write_trace(drv, capsys):
+    drv.trace = print_write
+    drv.set_SpeedCtrl_raw(0x1ff)
+    assert capsys.readouterr().out == "WRITE: reg 0x30 -> 0b1000000111111111\n"
+
+
+def test_trace_of_batched_writes(drv):
+    writes = []
+    drv.trace = lambda reg, value: writes.append((reg, value))
+    drv.write_registers({drv.CONFIG2: 0x2a3b, drv.CONFIG4: 0x187b})
+    drv.write(drv.CONFIG2, 0x2a3b)
+    assert sorted(writes) == [(drv.CONFIG2, 0x2a3b), (drv.CONFIG4, 0x187b)]
@@ -0,0 +1,83 @@
+import pytest
+
+from MLAB_DRV10987.driver import DEFAULT_CONFIG
+from MLAB_DRV10987.eeprom import CONFIG_ADDRESSES
+from MLAB_DRV10987.eeprom import EepromError
+from MLAB_DRV10987.eeprom import EepromProgrammer
+from MLAB_DRV10987.simulator import FACTORY_EEPROM
+
+
+def live(drv):
+    device = drv.bus.devices[drv.addr]
+    return {address: device.registers[address] for address in CONFIG_ADDRESSES}
+
+
+def test_unlock_sequence(bus, drv):
+    device = bus.devices[drv.addr]
+    programmer = EepromProgrammer(drv)
+    assert not device.eeprom_unlocked
+    programmer.unlock()
+    assert device._access_code == [0x0000, 0xC0DE]
+    assert programmer.unlocked
+
+
+def test_wrong_access_code_does_not_unlock(bus, drv):
+    drv.write(drv.EepromProgramming1, 0xC0DE)
+    programmer = EepromProgrammer(drv, timeout=0.01)
+    with pytest.raises(EepromError):
+        programmer.wait_ready()
+
+
+def test_read_config(bus, drv):
+    assert EepromProgrammer(drv).read_config() == FACTORY_EEPROM
+
+
+def test_no_difference_writes_nothing(bus, drv):
+    device = bus.devices[drv.addr]
+    assert EepromProgrammer(drv).burn(dict(FACTORY_EEPROM)) == {}
+    assert device.eeprom_writes == 0
+
+
+def test_per_word_burn(bus, drv):
+    device = bus.devices[drv.addr]
+    before = live(drv)
+    target = {0x90: 0x1111, 0x91: 0x2222}
+    assert EepromProgrammer(drv).burn(target) == target
+    assert device.eeprom_writes == 2
+    assert device.eeprom[0x90] == 0x1111 and device.eeprom[0x92] == FACTORY_EEPROM[0x92]
+    assert live(drv) == before
+
+
+def test_mass_burn_keeps_live_config(bus, drv):
+    device = bus.devices[drv.addr]
+    before = live(drv)
+    assert before == DEFAULT_CONFIG
+    target = {0x90: 0x1111, 0x91: 0x2222, 0x92: 0x3333}
+    assert EepromProgrammer(drv).burn(target) == target
+    assert device.eeprom_writes == len(CONFIG_ADDRESSES)
+    assert {address: device.eeprom[address] for address in target} == target
+    assert device.eeprom[0x93] == FACTORY_EEPROM[0x93]
+    assert live(drv) == before
+    assert drv.resync_shadow()[0x93] == before[0x93]
+
+
+def test_burn_current_config(bus, drv):
+    device = bus.devices[drv.addr]
+    changed = EepromProgrammer(drv).burn()
+    assert changed == {address: value for address, value in DEFAULT_CONFIG.items() if FACTORY_EEPROM[address] != value}
+    assert device.eeprom == DEFAULT_CONFIG
+
+
+def test_burn_rejects_other_registers(bus, drv):
+    with pytest.raises(ValueError):
+        EepromProgrammer(drv).burn({0x30: 0})
+
+
+def test_verify_failure_restores_live_config(bus, drv, monkeypatch):
+    device = bus.devices[drv.addr]
+    before = live(drv)
+    # The EEPROM keeps its content, every readback differs
+    monkeypatch.setattr(device, "_eeprom_write", lambda words: None)
+    with pytest.raises(EepromError):
+        EepromProgrammer(drv).burn({0x90: 0x1111, 0x91: 0x2222, 0x92: 0x3333})
+    assert live(drv) == before
@@ -0,0 +1,86 @@
+from MLAB_DRV10987.faults import FaultMonitor
+
+
+class Clock():
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_events_only_on_change(bus, drv):
+    device = bus.devices[drv.addr]
+    monitor = FaultMonitor(drv)
+    events = []
+    monitor.subscribe(events.append)
+    assert monitor.poll() == []
+
+    device.inject_fault("OverCurr")
+    assert [(event.name, event.raised) for event in monitor.poll()] == [("OverCurr", True)]
+    assert monitor.poll() == []
+    assert monitor.active == ["OverCurr"]
+
+    device.faults = 0
+    assert [(event.name, event.raised) for event in monitor.poll()] == [("OverCurr", False)]
+    assert len(events) == 2
+
+
+def test_auto_clear_repeats_for_reraised_fault(bus, drv):
+    device = bus.devices[drv.addr]
+    monitor = FaultMonitor(drv, auto_clear=["Lock0"])
+
+    device.inject_fault("Lock0")
+    assert [event.raised for event in monitor.poll()] == [True]
+    assert device.faults == 0
+
+    device.inject_fault("Lock0")
+    assert [(event.name, event.raised) for event in monitor.poll()] == [("Lock0", True)]
+    assert device.faults == 0
+    assert monitor.clears == 2
+
+    assert [event.raised for event in monitor.poll()] == [False]
+    assert monitor.active == []
+
+
+def test_auto_clear_is_rate_limited(bus, drv):
+    device = bus.devices[drv.addr]
+    clock = Clock()
+    monitor = FaultMonitor(drv, auto_clear=["Lock1"], clear_interval=0.5, clock=clock)
+    device.inject_fault("Lock1")
+    monitor.poll()
+    device.inject_fault("Lock1")
+    monitor.poll()
+    assert device.faults == 0b10
+    assert monitor.clears == 1
+
+    clock.now = 0.5
+    monitor.poll()
+    assert device.faults == 0
+    assert monitor.clears == 2
+
+
+def test_latched_fault_stays_active_until_acknowledged(bus, drv):
+    device = bus.devices[drv.addr]
+    monitor = FaultMonitor(drv, latch=["OverTemp"])
+    device.inject_fault("OverTemp")
+    monitor.poll()
+    device.faults = 0
+    assert monitor.poll() == []
+    assert monitor.active == ["OverTemp"]
+
+    assert [(event.name, event.raised) for event in monitor.acknowledge()] == [("OverTemp", False)]
+    assert monitor.active == []
+
+
+def test_subscription_filter(bus, drv):
+    device = bus.devices[drv.addr]
+    monitor = FaultMonitor(drv)
+    events = []
+    monitor.subscribe(events.append, flags=["Lock2"], cleared=False)
+    device.inject_fault("Lock2")
+    device.inject_fault("OverCurr")
+    monitor.poll()
+    device.faults = 0
+    monitor.poll()
+    assert [(event.name, event.raised) for event in events] == [("Lock2", True)]
@@ -0,0 +1,44 @@
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.fleet import DriverFleet
+from MLAB_DRV10987.simulator import SimulatedSMBus
+
+
+class ClosingBus(SimulatedSMBus):
+    closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_poll_reads_all_buses():
+    buses = {}
+    with DriverFleet(bus_factory=lambda number: buses.setdefault(number, ClosingBus())) as fleet:
+        fleet.add(1)
+        fleet.add(2)
+        snapshot = fleet.poll(fields=["MotorSpeed"])
+    assert sorted(snapshot["status"]) == [(1, 0x52), (2, 0x52)]
+    assert snapshot["errors"] == {}
+
+
+def test_poll_reports_errors():
+    with DriverFleet(bus_factory=lambda number: SimulatedSMBus()) as fleet:
+        driver = fleet.add(1)
+        driver.bus.devices[0x52].online = False
+        snapshot = fleet.poll()
+    assert isinstance(snapshot["errors"][(1, 0x52)], OSError)
+
+
+def test_close_keeps_caller_buses_open():
+    opened = []
+
+    def factory(number):
+        opened.append(ClosingBus())
+        return opened[-1]
+
+    own = ClosingBus()
+    fleet = DriverFleet(bus_factory=factory)
+    fleet.add(1, driver=MLAB_DRV10987(own))
+    fleet.add(2)
+    fleet.close()
+    assert not own.closed
+    assert len(opened) == 1 and opened[0].closed
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from MLAB_DRV10987.driver import DEFAULT_CONFIG
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+
+
+def test_init_writes_default_config(bus):
+    drv = MLAB_DRV10987(bus)
+    device = bus.devices[drv.addr]
+    for reg, value in DEFAULT_CONFIG.items():
+        assert device.registers[reg] == value
+    assert device.enabled
+    assert not drv.needs_configuration()
+
+
+def test_restart_keeps_spinning_motor_running():
+    bus = SimulatedSMBus(realtime=True)
+    drv = MLAB_DRV10987(bus)
+    drv.set_SpeedCtrl(60)
+    time.sleep(1.0)
+    speed = drv.read_status_registers(fields=["MotorSpeed"])["MotorSpeed"]
+    assert speed > 100
+
+    start = time.monotonic()
+    MLAB_DRV10987(bus)
+    assert time.monotonic() - start < 0.1
+    assert bus.devices[drv.addr].enabled
+    assert drv.read_status_registers(fields=["MotorSpeed"])["MotorSpeed"] > 0.9 * speed
+
+
+def test_restart_writes_nothing_when_configured(bus, drv):
+    bus.reset_counters()
+    MLAB_DRV10987(bus)
+    assert bus.transactions == 1
+
+
+def test_changed_config_is_rewritten(bus, drv):
+    device = bus.devices[drv.addr]
+    device.registers[drv.CONFIG2] = 0
+    MLAB_DRV10987(bus)
+    assert device.registers[drv.CONFIG2] == DEFAULT_CONFIG[drv.CONFIG2]
+
+
+def test_init_raises_when_not_ready(bus, drv, monkeypatch):
+    bus.devices[drv.addr].registers[drv.CONFIG2] = 0
+    monkeypatch.setattr(MLAB_DRV10987, "wait_ready", lambda self: False)
+    with pytest.raises(TimeoutError):
+        MLAB_DRV10987(bus)
+
+
+def test_wait_ready_rejects_floating_bus(drv, monkeypatch):
+    monkeypatch.setattr(drv, "read", lambda reg: 0xffff)
+    assert not drv.wait_ready(timeout=0.01, interval=0.001)
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from MLAB_DRV10987 import kt
+
+
+def write_capture(path, signal, increment=1e-5):
+    with open(path, "w") as f:
+        f.write("X,CH1,Start,Increment,\n")
+        f.write(f"Sequence,Volt,0.0,{increment!r},\n")
+        for n, value in enumerate(signal):
+            f.write(f"{n},{float(value)!r},\n")
+
+
+def test_analyze_channel_sine():
+    t = np.arange(20000) * 1e-5
+    result = kt.analyze_channel(2.0 * np.sin(2 * np.pi * 50 * t), 1e-5)
+    assert result["frequency"] == pytest.approx(50, rel=0.01)
+    assert result["amplitude"] == pytest.approx(2.0, rel=0.01)
+    assert result["kt"] == pytest.approx(0.04, rel=0.02)
+
+
+def test_register_round_trip():
+    for value in (0x00, 0x28, 0x7f):
+        assert kt.kt_to_register(kt.register_to_kt(value)) == value
+
+
+def test_kt_to_register_rejects_nan():
+    with pytest.raises(ValueError):
+        kt.kt_to_register(float("nan"))
+    with pytest.raises(ValueError):
+        kt.kt_to_register(float("inf"))
+
+
+def test_cli_fails_without_zero_crossings(tmp_path, capsys):
+    good = tmp_path / "good.csv"
+    flat = tmp_path / "flat.csv"
+    t = np.arange(5000) * 1e-5
+    write_capture(good, np.sin(2 * np.pi * 100 * t))
+    write_capture(flat, np.full(5000, 0.5))
+
+    result = kt.analyze_file(str(flat))
+    assert math.isnan(result["kt"])
+    assert result["KtValue"] is None
+
+    assert kt.main([str(good), "-j", "1"]) == 0
+    assert kt.main([str(good), str(flat), "-j", "1"]) == 1
+    captured = capsys.readouterr()
+    assert "no Kt" in captured.err
+    assert "KtValue 0x00" not in captured.out
@@ -0,0 +1,91 @@
+import pytest
+
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.mux import MuxScheduler
+from MLAB_DRV10987.mux import TCA9548A
+from MLAB_DRV10987.simulator import SimulatedDRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+from MLAB_DRV10987.simulator import SimulatedTCA9548A
+
+
+def rack(muxes=1, channels=4):
+    devices = {(addr, channel): SimulatedDRV10987() for addr in range(0x70, 0x70 + muxes) for channel in range(channels)}
+    sim = {addr: SimulatedTCA9548A({channel: {0x52: devices[addr, channel]} for channel in range(channels)})
+           for addr in range(0x70, 0x70 + muxes)}
+    bus = SimulatedSMBus(muxes=sim)
+    peers = []
+    mux = {addr: TCA9548A(bus, addr, peers=peers) for addr in sim}
+    drivers = {key: MLAB_DRV10987(mux[key[0]].channel(key[1])) for key in devices}
+    return bus, sim, mux, devices, drivers
+
+
+def test_select_is_cached():
+    bus, sim, mux, devices, drivers = rack()
+    driver = drivers[0x70, 1]
+    sim[0x70].writes = 0
+    driver.read_status_registers()
+    driver.read_status_registers()
+    assert sim[0x70].writes == 1
+    assert mux[0x70].skipped > 0
+
+
+def test_drivers_reach_their_own_channel():
+    bus, sim, mux, devices, drivers = rack()
+    drivers[0x70, 2].set_SpeedCtrl_raw(200)
+    assert devices[0x70, 2].registers[0x30] & 0x1ff == 200
+    assert devices[0x70, 1].registers[0x30] & 0x1ff == 0
+
+
+def test_invalidate_forces_a_select():
+    bus, sim, mux, devices, drivers = rack()
+    drivers[0x70, 0].read(MLAB_DRV10987.DeviceId)
+    sim[0x70].control = 0b10
+    mux[0x70].invalidate()
+    assert drivers[0x70, 0].read(MLAB_DRV10987.DeviceId) == 0x0100
+    assert sim[0x70].control == 0b01
+
+
+def test_failed_select_clears_the_cache():
+    bus, sim, mux, devices, drivers = rack()
+    drivers[0x70, 0].read(MLAB_DRV10987.DeviceId)
+    broken = sim.pop(0x70)
+    with pytest.raises(OSError):
+        mux[0x70].select(3)
+    assert mux[0x70].selected is None
+    sim[0x70] = broken
+    mux[0x70].select(3)
+    assert broken.control == 0b1000
+
+
+def test_peers_are_disconnected():
+    bus, sim, mux, devices, drivers = rack(muxes=2, channels=2)
+    drivers[0x70, 0].read(MLAB_DRV10987.DeviceId)
+    drivers[0x71, 1].read(MLAB_DRV10987.DeviceId)
+    assert sim[0x70].control == 0
+    assert sim[0x71].control == 0b10
+    assert not mux[0x70].connected
+
+
+def test_channel_out_of_range():
+    bus, sim, mux, devices, drivers = rack()
+    with pytest.raises(ValueError):
+        mux[0x70].channel(8)
+
+
+def test_scheduler_switches_each_channel_once():
+    bus, sim, mux, devices, drivers = rack(muxes=2, channels=4)
+    scheduler = MuxScheduler(drivers.values())
+    for m in sim.values():
+        m.writes = 0
+    devices[0x71, 2].online = False
+    status, errors = scheduler.poll(fields=["MotorSpeed"])
+    # The selected channel goes first without a select, then 3 selects, 1 peer disable and 4 selects
+    assert sum(m.writes for m in sim.values()) == 3 + 1 + 4
+    failed = list(drivers).index((0x71, 2))
+    assert isinstance(errors[failed], OSError) and status[failed] is None
+    assert sum(error is None for error in errors) == 7
+
+
+def test_scheduler_rejects_direct_drivers(bus, drv):
+    with pytest.raises(ValueError):
+        MuxScheduler([drv])
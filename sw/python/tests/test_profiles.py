@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from MLAB_DRV10987 import registers
+from MLAB_DRV10987.driver import DEFAULT_CONFIG
+from MLAB_DRV10987.profiles import MotorProfile
+
+FIELDS = {
+    "CONFIG2": {"KtValue": 41},
+    "CONFIG4": {"StAccel": 0b011000, "Op2ClsThr": 0b10011},
+    "CONFIG6": {"SlewRate": 1, "CLoopDis": 1},
+}
+
+
+def test_defaults_match_driver():
+    assert MotorProfile("default").words == DEFAULT_CONFIG
+
+
+def test_fields_are_packed():
+    profile = MotorProfile("df45", FIELDS, "test motor")
+    assert registers.CONFIG2.unpack(profile.words[0x91])["KtValue"] == 41
+    assert profile.fields["CONFIG4"]["Op2ClsThr"] == 0b10011
+    assert profile.words[0x90] == DEFAULT_CONFIG[0x90]
+    assert list(profile.words) == [register.address for register in registers.CONFIG_REGISTERS]
+
+
+@pytest.mark.parametrize("suffix", [".json", ".toml"])
+def test_save_load_round_trip(tmp_path, suffix):
+    profile = MotorProfile("df45", FIELDS, 'quoted "description"')
+    path = str(tmp_path / ("profile" + suffix))
+    profile.save(path)
+    loaded = MotorProfile.load(path)
+    assert loaded == profile
+    assert loaded.name == profile.name
+    assert loaded.description == profile.description
+    assert loaded.fields == profile.fields
+
+
+def test_json_layout(tmp_path):
+    path = str(tmp_path / "profile.json")
+    MotorProfile("df45", FIELDS).save(path)
+    with open(path) as f:
+        data = json.load(f)
+    assert data["name"] == "df45"
+    assert data["CONFIG2"]["KtValue"] == 41
+
+
+def test_partial_file_takes_defaults(tmp_path):
+    path = tmp_path / "profile.toml"
+    path.write_text('name = "partial"\n\n[CONFIG2]\nKtValue = 41\n')
+    profile = MotorProfile.load(str(path))
+    assert profile == MotorProfile("other", {"CONFIG2": {"KtValue": 41}})
+    assert profile.description == ""
+
+
+@pytest.mark.parametrize("fields", [
+    {"CONFIG8": {}},
+    {"CONFIG2": {"KtVal": 41}},
+    {"CONFIG2": {"KtValue": 128}},
+    {"CONFIG2": {"KtValue": -1}},
+    {"CONFIG4": {"StAccel": 64}},
+])
+def test_invalid_fields_rejected(fields):
+    with pytest.raises(ValueError):
+        MotorProfile("invalid", fields)
+
+
+def test_from_words_round_trip():
+    profile = MotorProfile("df45", FIELDS)
+    assert MotorProfile.from_words("copy", profile.words) == profile
+
+
+def test_apply_capture_round_trip(bus, drv):
+    profile = MotorProfile("df45", FIELDS)
+    written = profile.apply(drv)
+    assert sorted(written) == [0x91, 0x93, 0x95]
+    device = bus.devices[drv.addr]
+    assert {reg: device.registers[reg] for reg in profile.words} == profile.words
+    drv.invalidate_shadow()
+    assert MotorProfile.capture(drv, "captured") == profile
+
+
+def test_apply_is_one_transaction(bus, drv):
+    profile = MotorProfile("df45", FIELDS)
+    transactions = bus.transactions
+    profile.apply(drv, force=True)
+    assert bus.transactions == transactions + 1
+    transactions = bus.transactions
+    assert profile.apply(drv) == []
+    assert bus.transactions == transactions
+
+
+def test_capture_is_one_transaction(bus, drv):
+    drv.invalidate_shadow()
+    transactions = bus.transactions
+    MotorProfile.capture(drv, "captured")
+    assert bus.transactions == transactions + 1
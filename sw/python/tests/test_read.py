@@ -0,0 +1,75 @@
+import errno
+
+import pytest
+
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+
+
+class NoRdwrBus(SimulatedSMBus):
+    """
+    Adapter without combined transfers.
+    """
+
+    def __init__(self, error=None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.error = error
+
+    def i2c_rdwr(self, *i2c_msgs) -> None:
+        if self.error is None:
+            raise NotImplementedError
+        raise OSError(self.error, "rdwr failed")
+
+
+def expected(drv, regs):
+    device = drv.bus.devices[drv.addr]
+    return [device.read_register(reg) for reg in regs]
+
+
+def test_status_is_one_combined_transaction(bus, drv):
+    bus.reset_counters()
+    status = drv.read_status_registers()
+    assert bus.transactions == 1
+    assert set(status) == set(drv.STATUS_FIELDS)
+
+
+def test_fields_read_only_needed_registers(bus, drv):
+    bus.reset_counters()
+    assert list(drv.read_status_registers(fields=["MotorSpeed"])) == ["MotorSpeed"]
+    assert (bus.transactions, bus.bytes_read) == (1, 2)
+    with pytest.raises(ValueError):
+        drv.read_status_registers(fields=["Speed"])
+
+
+@pytest.mark.parametrize("mode", ["combined", "block", "single"])
+def test_read_modes_return_the_same_values(bus, drv, mode):
+    regs = [drv.CONFIG3, drv.FaultReg, drv.SupplyVoltage, drv.CONFIG1, drv.CONFIG2]
+    drv.read_mode = mode
+    bus.reset_counters()
+    assert drv.read_registers(regs) == expected(drv, regs)
+    assert bus.transactions == {"combined": 1, "block": 3, "single": 5}[mode]
+
+
+def test_combined_reads_are_chunked(bus, drv):
+    regs = list(range(0x90, 0x97)) * 4
+    bus.reset_counters()
+    assert drv.read_registers(regs) == expected(drv, regs)
+    assert bus.transactions == 2
+
+
+@pytest.mark.parametrize("error", [None, errno.EOPNOTSUPP, errno.EINVAL])
+def test_unsupported_combined_read_falls_back_to_single(error):
+    bus = NoRdwrBus(error)
+    drv = MLAB_DRV10987(bus, initialize=False, enable_motor=False)
+    assert drv.read_mode == "single"
+    bus.reset_counters()
+    regs = list(drv.STATUS_REGISTERS)
+    assert drv.read_registers(regs) == expected(drv, regs)
+    assert bus.transactions == len(regs)
+
+
+def test_bus_errors_do_not_change_the_read_mode(bus, drv):
+    bus.devices[drv.addr].online = False
+    with pytest.raises(OSError):
+        drv.read_status_registers()
+    assert drv.read_mode == "combined"
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from MLAB_DRV10987 import registers
+from MLAB_DRV10987.driver import DEFAULT_CONFIG
+
+# Words written by the configure_CONFIGn defaults of the original driver, before the register map
+BASELINE_CONFIG = {
+    0x90: 0xc7bb,
+    0x91: 0x283b,
+    0x92: 0x08df,
+    0x93: 0x287b,
+    0x94: 0x407f,
+    0x95: 0x0f33,
+    0x96: 0x7e2a,
+}
+
+
+def random_fields(register, rng):
+    return {field.name: rng.randrange(1 << field.width) for field in register.fields}
+
+
+@pytest.mark.parametrize("register", registers.CONFIG_REGISTERS, ids=lambda register: register.name)
+def test_pack_unpack_round_trip(register):
+    rng = random.Random(register.address)
+    for _ in range(200):
+        fields = random_fields(register, rng)
+        value = register.pack(**fields)
+        assert 0 <= value <= 0xffff
+        assert value & ~register.mask == 0
+        assert register.unpack(value) == fields
+
+
+@pytest.mark.parametrize("register", registers.CONFIG_REGISTERS, ids=lambda register: register.name)
+def test_out_of_range_fields_raise(register):
+    for field in register.fields:
+        for value in (-1, 1 << field.width):
+            with pytest.raises(ValueError):
+                register.pack(**{field.name: value})
+
+
+def test_missing_fields_are_zero():
+    assert registers.CONFIG4.pack(StAccel=1) == 1 << 8
+
+
+def test_replace_keeps_other_fields():
+    value = registers.CONFIG2.replace(0x283b, KtValue=0x30)
+    assert registers.CONFIG2.unpack(value) == {"TCtrlAdvValue": 0b0111011, "CommAdvMode": 0, "KtValue": 0x30}
+
+
+def test_pack_many():
+    rows = [{"KtValue": n} for n in range(4)]
+    assert registers.CONFIG2.pack_many(rows) == [n << 8 for n in range(4)]
+
+
+def test_unpack_arrays():
+    np = pytest.importorskip("numpy")
+    fields = registers.CONFIG4.unpack(np.array([0x287b, 0x58ff]))
+    assert list(fields["StAccel"]) == [0x28, 0x18]
+
+
+def test_default_config_matches_baseline():
+    assert DEFAULT_CONFIG == BASELINE_CONFIG
+
+
+@pytest.mark.parametrize("register", registers.CONFIG_REGISTERS, ids=lambda register: register.name)
+def test_configure_defaults_write_baseline_words(bus, drv, register):
+    device = bus.devices[drv.addr]
+    device.registers[register.address] = 0
+    drv.invalidate_shadow(register.address)
+    getattr(drv, "configure_" + register.name)()
+    assert device.registers[register.address] == BASELINE_CONFIG[register.address]
+
+
+def test_op2cls_threshold():
+    assert registers.op2cls_threshold(0b01111) == pytest.approx(12.0)
+    assert registers.op2cls_threshold(0b10000) == pytest.approx(12.8)
+    assert registers.op2cls_threshold(0b11111) == pytest.approx(204.8)
+
+
+def test_register_table_is_consistent():
+    assert len(registers.BY_ADDRESS) == len(registers.REGISTERS)
+    for register in registers.REGISTERS:
+        assert registers.decode_registers({register.address: 0})[register.name] == dict.fromkeys(register.field_names, 0)
@@ -0,0 +1,44 @@
+import pytest
+
+from MLAB_DRV10987.regulator import SpeedRegulator
+
+
+def regulator(bus, drv, **kwargs):
+    return SpeedRegulator(drv, max_rpm=250 * 60, clock=bus.time, sleep=bus.advance, **kwargs)
+
+
+def test_regulator_reaches_target(bus, drv):
+    reg = regulator(bus, drv)
+    reg.target_rpm = 6000
+    reg.run(rate=100, duration=3)
+    assert reg.rpm == pytest.approx(6000, rel=0.02)
+    assert reg.stats()["ticks"] == reg.ticks
+
+
+def test_ticks_limit(bus, drv):
+    reg = regulator(bus, drv)
+    reg.run(rate=100, ticks=10)
+    assert reg.ticks == 10
+
+
+def test_idle_gap_does_not_wind_up(bus, drv):
+    bus.devices[drv.addr].load_current = 0
+    reg = regulator(bus, drv, kp=0.0)
+    reg.target_rpm = 6000
+    reg.run(rate=100, duration=3)
+    integral, command = reg.integral, reg.command
+
+    # The motor loses speed while nobody regulates
+    drv.set_SpeedCtrl_raw(0)
+    bus.advance(60)
+    reg.run(rate=100, ticks=1)
+    assert reg.integral == pytest.approx(integral)
+    assert reg.command == pytest.approx(command, abs=1)
+
+
+def test_integral_freezes_while_saturated(bus, drv):
+    reg = regulator(bus, drv, kp=0.0)
+    reg.target_rpm = 1e6
+    reg.run(rate=100, duration=1)
+    assert reg.command == 511
+    assert reg.integral == 0.0
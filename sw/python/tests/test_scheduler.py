@@ -0,0 +1,94 @@
+import pytest
+
+from MLAB_DRV10987.scheduler import Scheduler
+
+
+@pytest.fixture
+def scheduler(bus):
+    return Scheduler(clock=bus.time, sleep=bus.advance)
+
+
+def test_deadlines_do_not_drift(bus, scheduler):
+    starts = []
+
+    def work():
+        starts.append(bus.time())
+        bus.advance(0.003)
+
+    task = scheduler.add(work, rate=100)
+    scheduler.run(duration=9.995)
+    assert len(starts) == task.runs == 1000
+    assert starts == pytest.approx([n * 0.01 for n in range(1000)], abs=1e-9)
+    stats = task.stats()
+    assert stats["rate"] == pytest.approx(100)
+    assert stats["jitter"] == pytest.approx(0, abs=1e-9)
+    assert stats["work_max"] == pytest.approx(0.003)
+    assert (task.late, task.overruns, task.skipped) == (0, 0, 0)
+
+
+def test_phase_offsets_first_deadline(bus, scheduler):
+    starts = []
+    scheduler.add(lambda: starts.append(bus.time()), rate=10, phase=0.05)
+    scheduler.run(duration=0.3)
+    assert starts == pytest.approx([0.05, 0.15, 0.25])
+
+
+@pytest.mark.parametrize("work, late, overruns, skipped, runs", [
+    (0.05, 0, 0, 0, 10),
+    (0.15, 1, 1, 0, 10),
+    (0.25, 1, 1, 1, 9),
+])
+def test_late_overrun_and_skipped_counters(bus, scheduler, work, late, overruns, skipped, runs):
+    def slow_third_call():
+        if task.runs == 2:
+            bus.advance(work)
+
+    task = scheduler.add(slow_third_call, rate=10)
+    scheduler.run(duration=0.95)
+    assert (task.late, task.overruns, task.skipped, task.runs) == (late, overruns, skipped, runs)
+
+
+def test_stop_from_within_a_task(bus, scheduler):
+    def stop_on_fifth_call():
+        if task.runs == 4:
+            scheduler.stop()
+
+    task = scheduler.add(stop_on_fifth_call, rate=10)
+    scheduler.run()
+    assert task.runs == 5
+    assert bus.time() == pytest.approx(0.4)
+    assert not scheduler._running
+
+
+def test_add_while_running(bus, scheduler):
+    starts = []
+
+    def add_on_third_call():
+        if first.runs == 2:
+            scheduler.add(lambda: starts.append(bus.time()), rate=10, phase=0.05)
+
+    first = scheduler.add(add_on_third_call, rate=10)
+    scheduler.run(duration=0.92)
+    assert first.runs == 10
+    assert starts == pytest.approx([0.25 + n * 0.1 for n in range(7)])
+    assert len(scheduler.tasks) == 2
+
+
+def test_idle_gap_between_runs_is_not_a_period(bus, scheduler):
+    task = scheduler.add(lambda: None, rate=10)
+    scheduler.run(duration=0.95)
+    bus.advance(60)
+    scheduler.run(duration=0.95)
+    stats = task.stats()
+    assert stats["runs"] == 20
+    assert stats["period_max"] == pytest.approx(0.1)
+    assert stats["rate"] == pytest.approx(10)
+    assert stats["jitter"] == pytest.approx(0, abs=1e-9)
+    assert (task.late, task.overruns, task.skipped) == (0, 0, 0)
+
+
+def test_remove_last_task_ends_run(bus, scheduler):
+    task = scheduler.add(lambda: scheduler.remove(task), rate=10)
+    scheduler.run()
+    assert task.runs == 1
+    assert scheduler.tasks == []
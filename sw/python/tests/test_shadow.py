@@ -0,0 +1,77 @@
+import pytest
+
+
+def test_unchanged_write_is_skipped(bus, drv):
+    drv.write(drv.CONFIG1, 0x1234)
+    bus.reset_counters()
+    drv.write(drv.CONFIG1, 0x1234)
+    assert bus.transactions == 0
+    drv.write(drv.CONFIG1, 0x1234, force=True)
+    assert bus.transactions == 1
+
+
+def test_unshadowed_registers_are_always_written(bus, drv):
+    bus.reset_counters()
+    drv.clear_faults()
+    drv.clear_faults()
+    assert bus.transactions == 2
+
+
+def test_failed_write_invalidates_the_cache(bus, drv):
+    bus.devices[drv.addr].online = False
+    with pytest.raises(OSError):
+        drv.write(drv.CONFIG1, 0x1234)
+    bus.devices[drv.addr].online = True
+    bus.reset_counters()
+    assert drv.read_cached(drv.CONFIG1) == bus.devices[drv.addr].registers[drv.CONFIG1]
+    assert bus.transactions == 1
+
+
+def test_read_cached_hits_without_bus_access(bus, drv):
+    bus.reset_counters()
+    assert drv.read_cached(drv.CONFIG4) == bus.devices[drv.addr].registers[drv.CONFIG4]
+    assert bus.transactions == 0
+
+
+def test_resync_after_device_reset(bus, drv):
+    device = bus.devices[drv.addr]
+    device.reset()
+    assert drv.read_cached(drv.CONFIG2) != device.registers[drv.CONFIG2]
+    bus.reset_counters()
+    shadow = drv.resync_shadow()
+    assert bus.transactions == 1
+    assert shadow[drv.CONFIG2] == device.registers[drv.CONFIG2]
+    assert drv.needs_configuration()
+
+
+def test_invalidate_shadow(bus, drv):
+    drv.invalidate_shadow(drv.CONFIG1)
+    bus.reset_counters()
+    drv.read_cached(drv.CONFIG1)
+    drv.read_cached(drv.CONFIG2)
+    assert bus.transactions == 1
+    value = drv.read_cached(drv.CONFIG2)
+    drv.invalidate_shadow()
+    drv.write(drv.CONFIG2, value)
+    assert bus.transactions == 2
+
+
+def test_write_registers_sends_only_changes_in_one_transaction(bus, drv):
+    values = {drv.CONFIG1: drv.read_cached(drv.CONFIG1), drv.CONFIG2: 0x1111, drv.CONFIG3: 0x2222}
+    bus.reset_counters()
+    assert drv.write_registers(values) == [drv.CONFIG2, drv.CONFIG3]
+    assert bus.transactions == 1
+    device = bus.devices[drv.addr]
+    assert (device.registers[drv.CONFIG2], device.registers[drv.CONFIG3]) == (0x1111, 0x2222)
+    assert drv.write_registers(values) == []
+
+
+def test_speed_and_enable_use_the_cache(bus, drv):
+    bus.reset_counters()
+    drv.set_SpeedCtrl_raw(100)
+    drv.set_SpeedCtrl_raw(100)
+    drv.enable_motor()
+    assert bus.transactions == 1
+    drv.disable_motor()
+    assert not bus.devices[drv.addr].enabled
+    assert bus.transactions == 2
@@ -0,0 +1,40 @@
+import errno
+from multiprocessing import resource_tracker
+
+import pytest
+
+from MLAB_DRV10987 import shm
+
+
+def test_client_reads_published_status(bus, drv):
+    drv.set_SpeedCtrl(50)
+    bus.advance(2)
+    with shm.TelemetryPublisher([drv]) as publisher:
+        publisher.poll()
+        with shm.TelemetryClient(publisher.name) as client:
+            assert client.generation == 1
+            transactions = bus.transactions
+            assert client.read_status_registers() == drv.read_status_registers()
+            assert bus.transactions == transactions + 1
+
+
+def test_failed_driver_has_no_data(bus, drv):
+    bus.devices[drv.addr].online = False
+    with shm.TelemetryPublisher([drv]) as publisher:
+        assert publisher.poll() == 1
+        with shm.TelemetryClient(publisher.name) as client:
+            with pytest.raises(OSError) as error:
+                client.snapshot(0)
+            assert error.value.errno == errno.ENODATA
+
+
+def test_client_in_publisher_process_keeps_tracker_entry(drv, monkeypatch):
+    unregistered = []
+    monkeypatch.setattr(resource_tracker, "unregister", lambda name, rtype: unregistered.append(name))
+    publisher = shm.TelemetryPublisher([drv])
+    client = shm.TelemetryClient(publisher.name)
+    client.close()
+    assert unregistered == []
+    monkeypatch.undo()
+    publisher.close()
+    assert publisher.name not in shm._published
@@ -0,0 +1,236 @@
+import errno
+
+import pytest
+from smbus2 import i2c_msg
+
+from MLAB_DRV10987.simulator import FACTORY_EEPROM
+from MLAB_DRV10987.simulator import LATENCY_PROFILES
+from MLAB_DRV10987.simulator import SimulatedDRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+from MLAB_DRV10987.simulator import SimulatedTCA9548A
+
+ADDR = 0b1010010
+
+
+def write(bus, reg, value):
+    bus.write_i2c_block_data(ADDR, reg, [value >> 8, value & 0xff])
+
+
+def read(bus, reg):
+    high, low = bus.read_i2c_block_data(ADDR, reg, 2)
+    return high << 8 | low
+
+
+def test_power_up_from_eeprom():
+    device = SimulatedDRV10987()
+    assert {reg: device.registers[reg] for reg in FACTORY_EEPROM} == FACTORY_EEPROM
+    assert not device.shadow_mode
+    assert device.enabled
+
+
+def test_config_registers_take_effect_only_in_shadow_mode(bus):
+    device = bus.devices[ADDR]
+    write(bus, 0x91, 0x283b)
+    assert read(bus, 0x91) == 0x283b
+    assert device.config(0x91) == FACTORY_EEPROM[0x91]
+
+    write(bus, 0x35, 1 << 12)
+    assert device.shadow_mode
+    assert device.config(0x91) == 0x283b
+
+    write(bus, 0x35, 0)
+    assert device.config(0x91) == FACTORY_EEPROM[0x91]
+
+
+def unlock(bus):
+    write(bus, 0x31, 0x0000)
+    write(bus, 0x31, 0xC0DE)
+
+
+def test_eeprom_is_locked_without_access_code(bus):
+    device = bus.devices[ADDR]
+    write(bus, 0x91, 0x283b)
+    write(bus, 0x35, 0b0110)
+    assert device.eeprom == FACTORY_EEPROM
+    assert device.eeprom_writes == 0
+    assert read(bus, 0x32) == 0
+
+
+@pytest.mark.parametrize("codes, unlocked", [
+    ([0x0000, 0xC0DE], True),
+    ([0x1234, 0x0000, 0xC0DE], True),
+    ([0xC0DE, 0x0000], False),
+    ([0xC0DE], False),
+    ([0x0000, 0x1234, 0xC0DE], False),
+    ([0x0000, 0xC0DE, 0x1234], False),
+])
+def test_access_code_sequence(bus, codes, unlocked):
+    for code in codes:
+        write(bus, 0x31, code)
+    assert bus.devices[ADDR].eeprom_unlocked == unlocked
+
+
+def test_mass_write(bus):
+    device = bus.devices[ADDR]
+    unlock(bus)
+    assert read(bus, 0x32) == 1
+    write(bus, 0x91, 0x283b)
+    write(bus, 0x35, 1 << 12 | 0b0110)
+    assert device.eeprom == {**FACTORY_EEPROM, 0x91: 0x283b}
+    assert device.eeprom_writes == len(FACTORY_EEPROM)
+    assert device.shadow_mode
+    assert device.busy_until == pytest.approx(device.eeprom_write_time)
+    # The next transaction waits for the EEPROM on the virtual clock
+    assert read(bus, 0x32) == 1
+    assert bus.now == pytest.approx(device.eeprom_write_time)
+
+
+def test_single_write_and_refresh(bus):
+    device = bus.devices[ADDR]
+    unlock(bus)
+    write(bus, 0x33, 0x93)
+    assert read(bus, 0x34) == FACTORY_EEPROM[0x93]
+    write(bus, 0x34, 0x287b)
+    write(bus, 0x35, 0b0001)
+    assert device.eeprom[0x93] == 0x287b
+    assert device.eeprom_writes == 1
+
+    write(bus, 0x93, 0)
+    write(bus, 0x35, 0b1000)
+    assert read(bus, 0x93) == 0x287b
+
+
+def test_reset_reloads_eeprom(bus):
+    device = bus.devices[ADDR]
+    write(bus, 0x91, 0x283b)
+    write(bus, 0x35, 1 << 12)
+    device.inject_fault("OverCurr")
+    device.reset()
+    assert read(bus, 0x91) == FACTORY_EEPROM[0x91]
+    assert not device.shadow_mode
+    assert read(bus, 0x00) == 0
+
+
+def test_faults_clear_by_writing_ones(bus):
+    device = bus.devices[ADDR]
+    device.inject_fault("OverCurr")
+    device.inject_fault("Lock0")
+    assert read(bus, 0x00) == 1 << 11 | 1 << 0
+    write(bus, 0x00, 1 << 11)
+    assert read(bus, 0x00) == 1 << 0
+
+
+def test_nak_rate():
+    bus = SimulatedSMBus(seed=1)
+    bus.devices[ADDR].nak_rate = 0.3
+    failures = 0
+    for _ in range(1000):
+        try:
+            read(bus, 0x08)
+        except OSError as error:
+            assert error.errno == errno.EREMOTEIO
+            failures += 1
+    assert 250 < failures < 350
+    assert bus.transactions == 1000
+
+
+def test_nak_rate_is_seeded():
+    def failures(seed):
+        bus = SimulatedSMBus(seed=seed)
+        bus.devices[ADDR].nak_rate = 0.5
+        result = []
+        for _ in range(50):
+            try:
+                read(bus, 0x08)
+                result.append(False)
+            except OSError:
+                result.append(True)
+        return result
+
+    assert failures(3) == failures(3)
+    assert failures(3) != failures(4)
+
+
+def test_offline_device(bus):
+    device = bus.devices[ADDR]
+    device.online = False
+    for transaction in (lambda: read(bus, 0x08), lambda: write(bus, 0x30, 0x8100),
+                        lambda: bus.i2c_rdwr(i2c_msg.write(ADDR, [0x30, 0x81, 0x00]))):
+        with pytest.raises(OSError) as error:
+            transaction()
+        assert error.value.errno == errno.EREMOTEIO
+    assert device.registers[0x30] == 0
+    device.online = True
+    assert read(bus, 0x08) == 0x0100
+
+
+def test_unknown_address():
+    bus = SimulatedSMBus()
+    with pytest.raises(OSError):
+        bus.read_i2c_block_data(0x10, 0x00, 2)
+
+
+@pytest.mark.parametrize("profile", sorted(LATENCY_PROFILES))
+def test_latency_profiles(profile):
+    base, per_byte = LATENCY_PROFILES[profile]
+    bus = SimulatedSMBus(latency=profile)
+    read(bus, 0x08)
+    expected = base + 5 * per_byte
+    assert bus.busy_time == pytest.approx(expected)
+    assert bus.now == pytest.approx(expected)
+    write(bus, 0x30, 0x8100)
+    expected += base + 4 * per_byte
+    assert bus.busy_time == pytest.approx(expected)
+    assert bus.time() == pytest.approx(expected)
+    assert (bus.transactions, bus.bytes_written, bus.bytes_read) == (2, 7, 2)
+
+
+def test_latency_of_combined_transfer():
+    bus = SimulatedSMBus(latency=(1e-3, 1e-4))
+    write_msg = i2c_msg.write(ADDR, [0x01])
+    read_msg = i2c_msg.read(ADDR, 4)
+    bus.i2c_rdwr(write_msg, read_msg)
+    assert (bus.transactions, bus.bytes_written, bus.bytes_read) == (1, 2, 5)
+    assert bus.busy_time == pytest.approx(1e-3 + 7e-4)
+    assert bus.now == bus.busy_time
+
+
+def test_reset_counters_keeps_clock():
+    bus = SimulatedSMBus(latency="i2c-dev")
+    read(bus, 0x08)
+    now = bus.now
+    bus.reset_counters()
+    assert (bus.transactions, bus.bytes_written, bus.bytes_read, bus.busy_time) == (0, 0, 0, 0.0)
+    assert bus.now == now
+
+
+def test_motor_follows_duty_on_virtual_clock(bus):
+    device = bus.devices[ADDR]
+    write(bus, 0x30, 0x8000 | 511)
+    assert read(bus, 0x01) == 0
+    bus.advance(3.0)
+    # The model advances at the next transaction
+    assert device.speed == 0
+    assert read(bus, 0x01) > 0
+    assert device.speed == pytest.approx(device.max_speed, rel=0.01)
+    write(bus, 0x60, 0x8000)
+    bus.advance(3.0)
+    read(bus, 0x01)
+    assert device.speed == pytest.approx(0, abs=1)
+
+
+def test_devices_behind_multiplexer():
+    first, second = SimulatedDRV10987(), SimulatedDRV10987()
+    mux = SimulatedTCA9548A({0: {ADDR: first}, 1: {ADDR: second}})
+    bus = SimulatedSMBus(muxes={0x70: mux})
+    with pytest.raises(OSError):
+        read(bus, 0x08)
+    bus.write_byte(0x70, 0b10)
+    write(bus, 0x30, 0x8100)
+    assert (first.registers[0x30], second.registers[0x30]) == (0, 0x8100)
+    assert bus.read_byte(0x70) == 0b10
+    bus.write_byte(0x70, 0b11)
+    with pytest.raises(OSError) as error:
+        read(bus, 0x08)
+    assert error.value.errno == errno.EIO
+    assert mux.writes == 2
@@ -0,0 +1,118 @@
+import pytest
+
+from MLAB_DRV10987 import decode
+from MLAB_DRV10987.telemetry import TelemetryRecorder, convert_records, load_recording
+
+np = pytest.importorskip("numpy")
+
+
+class Counter():
+    """Timestamp source returning 0, 1, 2, ... so every sample can be identified."""
+
+    def __init__(self):
+        self.value = -1
+
+    def __call__(self):
+        self.value += 1
+        return float(self.value)
+
+
+def recorder(drv, **kwargs):
+    return TelemetryRecorder(drv, clock=Counter(), **kwargs)
+
+
+def test_records_before_wrap(drv):
+    rec = recorder(drv, capacity=8)
+    for _ in range(5):
+        rec.sample()
+    assert list(rec.records()["timestamp"]) == [0, 1, 2, 3, 4]
+
+
+def test_records_after_wrap_are_oldest_first(drv):
+    rec = recorder(drv, capacity=8)
+    for _ in range(21):
+        rec.sample()
+    assert list(rec.records()["timestamp"]) == list(range(13, 21))
+
+
+def test_open_sink_after_wrap_writes_the_buffer(drv, tmp_path):
+    rec = recorder(drv, capacity=8, flush_every=3)
+    for _ in range(21):
+        rec.sample()
+    rec.open_sink(tmp_path / "telemetry.bin")
+    for _ in range(4):
+        rec.sample()
+    rec.close()
+    assert list(load_recording(tmp_path / "telemetry.bin")["timestamp"]) == list(range(13, 25))
+
+
+def test_chunked_flush_round_trip(bus, drv, tmp_path):
+    path = tmp_path / "telemetry.bin"
+    drv.set_SpeedCtrl(50)
+    rec = recorder(drv, capacity=8, flush_every=3)
+    rec.open_sink(path)
+    for n in range(20):
+        rec.sample()
+        # Everything but the samples of the current chunk is on disk, nothing is overwritten unflushed
+        assert rec.count - rec.flushed < rec.flush_every
+        bus.advance(0.05)
+    samples = rec.records()
+    rec.close()
+    recording = load_recording(path)
+    assert isinstance(recording, np.memmap)
+    assert recording.dtype == samples.dtype
+    assert list(recording["timestamp"]) == list(range(20))
+    assert np.array_equal(recording[-8:], samples)
+    assert len(set(recording["MotorSpeed"].tolist())) > 1
+
+
+def test_load_recording_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        load_recording(path)
+
+
+def test_convert_records_matches_read_status_registers(bus, drv):
+    drv.set_SpeedCtrl(50)
+    bus.advance(1.0)
+    rec = recorder(drv, capacity=4)
+    rec.sample()
+    status = drv.read_status_registers()
+    columns = convert_records(rec.records())
+    assert decode.fault_flags(int(columns.pop("FaultReg")[0])) == status.pop("FaultFlags")
+    assert columns.pop("timestamp")[0] == 0
+    assert set(columns) == set(status)
+    for field, value in status.items():
+        assert columns[field][0] == pytest.approx(value), field
+    assert status["MotorSpeed"] > 0
+
+
+def test_convert_subset_of_registers(drv):
+    rec = recorder(drv, capacity=4, registers=[drv.MotorCurrent, drv.SupplyVoltage])
+    rec.sample()
+    assert set(rec.convert()) == {"timestamp", "MotorCurrent", "SupplyVoltage", "Power", "IPD"}
+
+
+def test_duplicate_registers_rejected(drv):
+    with pytest.raises(ValueError):
+        TelemetryRecorder(drv, registers=[drv.MotorSpeed, drv.MotorCurrent, drv.MotorSpeed])
+
+
+def test_flush_every_above_capacity_rejected(drv):
+    with pytest.raises(ValueError):
+        TelemetryRecorder(drv, capacity=4, flush_every=5)
+
+
+@pytest.mark.parametrize("count", [0, -1])
+def test_record_count_must_be_positive(drv, count):
+    rec = recorder(drv, capacity=4)
+    with pytest.raises(ValueError):
+        rec.record(rate=1000, count=count)
+    assert rec.count == 0
+
+
+def test_record_count(drv):
+    rec = recorder(drv, capacity=16)
+    stats = rec.record(rate=1000, count=5)
+    assert rec.count == stats["runs"] == 5
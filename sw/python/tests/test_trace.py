@@ -0,0 +1,43 @@
+import pytest
+
+from MLAB_DRV10987 import trace
+
+
+def test_combined_read_is_recorded_per_register(bus, drv):
+    stats = trace.attach(drv, trace.BusStats())
+    drv.read_status_registers()
+    series = stats.to_dict()
+    assert sorted(series) == [f"rdwr:0x52:0x{reg:02x}" for reg in sorted(drv.STATUS_REGISTERS)]
+    for entry in series.values():
+        assert entry["calls"] == 1
+        assert entry["bytes"] == 3
+
+
+def test_combined_latency_is_split(bus, drv):
+    clock = iter([0.0, 0.007]).__next__
+    stats = trace.BusStats()
+    drv.bus = trace.TracedBus(drv.bus, stats, clock=clock)
+    drv.read_registers([drv.MotorSpeed, drv.MotorCurrent])
+    entries = stats.to_dict()
+    assert entries["rdwr:0x52:0x01"]["time"] == pytest.approx(0.0035)
+    assert entries["rdwr:0x52:0x04"]["time"] == pytest.approx(0.0035)
+
+
+def test_combined_write_is_recorded_per_register(bus, drv):
+    stats = trace.attach(drv)
+    drv.write_registers({drv.SpeedCtrl: 0x8010, drv.CONFIG1: 0x1234})
+    entries = stats.to_dict()
+    assert entries["rdwr:0x52:0x30"]["bytes"] == 3
+    assert entries["rdwr:0x52:0x90"]["bytes"] == 3
+
+
+def test_failed_combined_transfer_counts_errors(bus, drv):
+    stats = trace.attach(drv)
+    bus.devices[drv.addr].online = False
+    with pytest.raises(OSError):
+        drv.read_registers([drv.MotorSpeed, drv.MotorCurrent])
+    entries = stats.to_dict()
+    assert entries["rdwr:0x52:0x01"]["errors"] == 1
+    assert entries["rdwr:0x52:0x04"]["errors"] == 1
+    trace.detach(drv)
+    assert drv.bus is bus
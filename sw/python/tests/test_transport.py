@@ -0,0 +1,135 @@
+import errno
+
+import pytest
+
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.mux import TCA9548A
+from MLAB_DRV10987.simulator import SimulatedDRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+from MLAB_DRV10987.simulator import SimulatedTCA9548A
+from MLAB_DRV10987.transport import ResilientBus
+
+
+def resilient(bus, **kwargs):
+    return ResilientBus(bus, clock=bus.time, sleep=bus.advance, **kwargs)
+
+
+def test_retry_recovers_transient_error(bus, drv):
+    device = bus.devices[drv.addr]
+    rbus = resilient(bus)
+    drv.bus = rbus
+    device.nak_rate = 0.5
+    for _ in range(20):
+        drv.read(drv.MotorSpeed)
+    stats = rbus.status()["devices"][((), drv.addr)]
+    assert stats["retries"] > 0
+    assert stats["trips"] == 0
+
+
+def test_breaker_trips_and_recovers(bus, drv):
+    device = bus.devices[drv.addr]
+    rbus = resilient(bus, breaker_threshold=2, breaker_timeout=1.0)
+    drv.bus = rbus
+    device.online = False
+    for _ in range(2):
+        with pytest.raises(OSError) as error:
+            drv.read(drv.MotorSpeed)
+        assert error.value.errno == errno.EREMOTEIO
+    transactions = bus.transactions
+    with pytest.raises(OSError) as error:
+        drv.read(drv.MotorSpeed)
+    assert error.value.errno == errno.EHOSTDOWN
+    assert bus.transactions == transactions
+
+    device.online = True
+    bus.advance(1.0)
+    assert drv.read(drv.DeviceId) == 0x0100
+    stats = rbus.status()["devices"][((), drv.addr)]
+    assert stats["trips"] == 1
+    assert stats["rejected"] == 1
+    assert not stats["open"]
+
+
+def test_non_idempotent_writes_are_not_repeated(bus, drv):
+    device = bus.devices[drv.addr]
+    rbus = resilient(bus)
+    drv.bus = rbus
+    device.online = False
+    for reg in (drv.FaultReg, drv.EepromProgramming1, drv.EepromProgramming5):
+        transactions = bus.transactions
+        with pytest.raises(OSError):
+            drv.write(reg, 0xff, force=True)
+        assert bus.transactions == transactions + 1
+        rbus.reset_breaker()
+
+    transactions = bus.transactions
+    with pytest.raises(OSError):
+        drv.write_registers({drv.CONFIG1: 1, drv.FaultReg: 0xff})
+    assert bus.transactions == transactions + 1
+
+
+def test_idempotent_writes_are_repeated(bus, drv):
+    device = bus.devices[drv.addr]
+    rbus = resilient(bus, breaker_threshold=10)
+    drv.bus = rbus
+    device.online = False
+    transactions = bus.transactions
+    with pytest.raises(OSError):
+        drv.write(drv.SpeedCtrl, 0x8100)
+    assert bus.transactions == transactions + 1 + rbus.retries
+
+
+def test_breakers_are_per_multiplexer_channel():
+    devices = {channel: SimulatedDRV10987() for channel in range(3)}
+    bus = SimulatedSMBus(muxes={0x70: SimulatedTCA9548A({channel: {0x52: device} for channel, device in devices.items()})})
+    rbus = resilient(bus, breaker_threshold=2)
+    mux = TCA9548A(rbus)
+    drivers = [MLAB_DRV10987(mux.channel(channel)) for channel in devices]
+
+    devices[1].online = False
+    for _ in range(3):
+        with pytest.raises(OSError):
+            drivers[1].read(MLAB_DRV10987.MotorSpeed)
+    for driver in (drivers[0], drivers[2]):
+        assert driver.read(MLAB_DRV10987.DeviceId) == 0x0100
+
+    status = rbus.status()["devices"]
+    assert status[(((0x70, 0b010),), 0x52)]["open"]
+    assert not status[(((0x70, 0b001),), 0x52)]["open"]
+    assert not status[(((0x70, 0b100),), 0x52)]["open"]
+
+
+def stuck_register(device, reg):
+    write_register = device.write_register
+
+    def write(address, value):
+        if address != reg:
+            write_register(address, value)
+    device.write_register = write
+
+
+def test_combined_writes_are_verified(bus, drv):
+    device = bus.devices[drv.addr]
+    rbus = resilient(bus, verify_writes=True, retries=1)
+    drv.bus = rbus
+    values = {drv.CONFIG2: 0x2a3b, drv.CONFIG4: 0x187b}
+    transactions = bus.transactions
+    drv.write_registers(values)
+    assert {reg: device.registers[reg] for reg in values} == values
+    # One combined transfer and one readback per written register
+    assert bus.transactions == transactions + 3
+
+    stuck_register(device, drv.CONFIG4)
+    with pytest.raises(OSError) as error:
+        drv.write_registers({drv.CONFIG2: 0x2b3b, drv.CONFIG4: 0x197b})
+    assert error.value.errno == errno.EIO
+    assert rbus.status()["devices"][((), drv.addr)]["retries"] == 1
+
+
+def test_combined_writes_are_not_verified_by_default(bus, drv):
+    device = bus.devices[drv.addr]
+    drv.bus = resilient(bus)
+    stuck_register(device, drv.CONFIG4)
+    transactions = bus.transactions
+    drv.write_registers({drv.CONFIG2: 0x2a3b, drv.CONFIG4: 0x187b})
+    assert bus.transactions == transactions + 1
@@ -0,0 +1,76 @@
+import pytest
+
+from MLAB_DRV10987 import registers
+from MLAB_DRV10987.driver import MLAB_DRV10987
+from MLAB_DRV10987.simulator import SimulatedDRV10987
+from MLAB_DRV10987.simulator import SimulatedSMBus
+from MLAB_DRV10987.tuning import SpinUpTuner
+
+# Small grid with starts aggressive enough to lose the rotor, so that pruning kicks in
+GRID = {"AlginTime": (3, 5, 7), "StAccel": (15, 63), "AccelRangeSel": (0, 1), "OpLCurr": (3, 1)}
+
+
+@pytest.fixture
+def tuner():
+    bus = SimulatedSMBus({MLAB_DRV10987.DRVADDR: SimulatedDRV10987(startup=True)})
+    drv = MLAB_DRV10987(bus)
+    return SpinUpTuner(drv, speed=50, target_speed=125, interval=0.01, grid=GRID, max_passes=1,
+                       clock=bus.time, sleep=bus.advance)
+
+
+def test_tuned_start_is_not_slower(tuner):
+    measured = []
+    pruned = []
+    measure, evaluate = tuner.measure, tuner.evaluate
+
+    def record_measure(settings, limit=None):
+        measured.append(tuner._key(settings))
+        return measure(settings, limit)
+
+    def record_evaluate(settings):
+        result = evaluate(settings)
+        if result is None:
+            pruned.append(tuner._key(settings))
+        return result
+
+    tuner.measure = record_measure
+    tuner.evaluate = record_evaluate
+    start = tuner.current_settings()
+    best = tuner.run()
+
+    initial = tuner.results[tuner._key(start)]
+    assert initial.status == "ok"
+    assert best.status == "ok"
+    assert best.target_time <= initial.target_time
+    assert best.closed_loop_time <= initial.closed_loop_time
+
+    stats = tuner.stats()
+    assert stats["fault"] > 0
+    assert stats["pruned"] == len(pruned) > 0
+    assert stats["trials"] == len(measured) == len(set(measured))
+    assert not set(pruned) & set(measured)
+    assert not set(pruned) & set(tuner.results)
+
+
+def test_best_settings_are_applied(tuner):
+    best = tuner.run()
+    drv = tuner.driver
+    device = drv.bus.devices[drv.addr]
+    assert device.shadow_mode
+    assert device.speed == 0
+    for register in (registers.CONFIG3, registers.CONFIG4):
+        fields = register.unpack(device.registers[register.address])
+        assert {field: fields[field] for field in best.settings if field in fields} == \
+            {field: value for field, value in best.settings.items() if field in fields}
+    profile = tuner.profile("tuned")
+    assert profile.words[registers.CONFIG4.address] == device.registers[registers.CONFIG4.address]
+
+
+def test_unknown_grid_field_rejected(drv):
+    with pytest.raises(ValueError):
+        SpinUpTuner(drv, speed=50, target_speed=125, grid={"KtValue": (1, 2)})
+
+
+def test_profile_requires_run(tuner):
+    with pytest.raises(RuntimeError):
+        tuner.profile("tuned")